@@ -8,7 +8,7 @@ import { Input } from "@/components/ui/input"
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from "@/components/ui/card"
 import { Switch } from "@/components/ui/switch"
 import { Textarea } from "@/components/ui/textarea"
-import { settingsAPI, getCurrentUser, authAPI, getAuthToken } from "@/lib/api"
+import { settingsAPI, getCurrentUser, authAPI, getAuthToken, resolveUploadUrl } from "@/lib/api"
 import { useToast } from "@/hooks/use-toast"
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"
@@ -35,8 +35,7 @@ export default function AdminOurStory() {
             const response = await fetch(`${API_BASE_URL}/api/upload/video`, {
                 method: 'POST', headers: { 'Authorization': `Bearer ${getAuthToken()}` }, body: fd
             })
-            if (!response.ok) throw new Error('Upload failed')
-            return (await response.json()).url
+            return await resolveUploadUrl(API_BASE_URL, response)
         } catch { toast({ title: "Upload failed", variant: "destructive" }); return null }
     }
 
@@ -10,7 +10,7 @@ import { Card, CardContent } from "@/components/ui/card"
 import { DropdownMenu, DropdownMenuContent, DropdownMenuItem, DropdownMenuTrigger } from "@/components/ui/dropdown-menu"
 import { Dialog, DialogContent, DialogHeader, DialogTitle } from "@/components/ui/dialog"
 import { Textarea } from "@/components/ui/textarea"
-import { productsAPI, categoriesAPI, getCurrentUser, authAPI, Product, Category, getAuthToken } from "@/lib/api"
+import { productsAPI, categoriesAPI, getCurrentUser, authAPI, Product, Category, getAuthToken, resolveUploadUrl } from "@/lib/api"
 import { useToast } from "@/hooks/use-toast"
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"
@@ -109,8 +109,7 @@ export default function AdminProducts() {
         headers: { 'Authorization': `Bearer ${getAuthToken()}` },
         body: fd
       })
-      if (!response.ok) throw new Error((await response.json()).detail || 'Upload failed')
-      return (await response.json()).url
+      return await resolveUploadUrl(API_BASE_URL, response)
     } catch (error: any) {
       toast({ title: "Upload Error", description: error.message, variant: "destructive" })
       return null
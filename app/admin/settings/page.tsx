@@ -43,28 +43,13 @@ export default function AdminSettings() {
 
   const fetchSettings = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/api/settings/payment`, {
-        headers: { 'Authorization': `Bearer ${getAuthToken()}` }
-      })
+      // Payment, shipping and WhatsApp settings come in one bundle
+      const response = await fetch(`${API_BASE_URL}/api/settings`, { cache: 'no-store' })
       if (response.ok) {
         const data = await response.json()
-        setPaymentSettings(data)
-      }
-      // Fetch shipping settings
-      const shippingRes = await fetch(`${API_BASE_URL}/api/settings/shipping`, {
-        headers: { 'Authorization': `Bearer ${getAuthToken()}` }
-      })
-      if (shippingRes.ok) {
-        const shippingData = await shippingRes.json()
-        setShippingSettings(shippingData)
-      }
-      // Fetch WhatsApp settings
-      const whatsappRes = await fetch(`${API_BASE_URL}/api/settings/whatsapp`, {
-        headers: { 'Authorization': `Bearer ${getAuthToken()}` }
-      })
-      if (whatsappRes.ok) {
-        const whatsappData = await whatsappRes.json()
-        setWhatsappSettings(whatsappData)
+        setPaymentSettings(data.payment_methods)
+        setShippingSettings(data.shipping_settings)
+        setWhatsappSettings(data.whatsapp_settings)
       }
     } catch (error: any) {
       if (error.message?.includes("401")) { authAPI.logout(); router.push("/login") }
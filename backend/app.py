@@ -2,49 +2,57 @@
 Flask Backend API for Ecommerce Clothing Website
 Provides all endpoints needed by the Next.js frontend
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 from functools import wraps
 import jwt
 import os
-from datetime import datetime, timedelta
+import time
+from datetime import date, datetime, timedelta
 from dotenv import load_dotenv
-import cloudinary
-import cloudinary.uploader
 
 # Load environment variables
 load_dotenv()
 
-# Configure Cloudinary with optimized settings
-cloudinary.config(
-    cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-    api_key=os.getenv('CLOUDINARY_API_KEY'),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET'),
-    secure=True
-)
-
 # Initialize Razorpay client
 import razorpay
 razorpay_client = razorpay.Client(auth=(os.getenv('RAZORPAY_KEY_ID'), os.getenv('RAZORPAY_KEY_SECRET')))
 
 
 # Import database and models
-from database import init_database, init_pool
+from database import init_database, init_pool, transaction, get_pool_stats
+from catalog_cache import cached, get_catalog_cache_stats
+from settings_cache import SETTING_DEFAULTS, get_settings_bundle, get_settings_cache_stats
+from http_cache import conditional, cache_control, no_store, matching_etag
+from json_provider import FastJSONProvider
+from compression import init_compression, get_compression_stats
+from rollups import get_order_stats_series, rebuild_daily_order_stats
+from exports import EXPORT_FORMATS, serialize
+from auth_context import TokenRevokedError, build_claims, resolve_user, get_user_cache_stats
+from passwords import get_password_stats
+from mailer import enqueue_email, start_mail_workers, get_mail_stats
+from otp_store import OTPLockedError
+from storage import media_storage, LocalStorage, MEDIA_CACHE_MAX_AGE
+from uploads import gallery_uploader
+from media_assets import upload_deduplicated
+from upload_jobs import upload_jobs, get_upload_job
 from models import (
     # User operations
-    create_user, find_user_by_email, find_user_by_id, verify_password, get_all_customers,
+    create_user, create_guest_user, find_user_by_email, find_user_by_id, update_user, update_user_password, verify_password, upgrade_password_hash, get_all_customers,
     # Product operations
     create_product, get_all_products, get_product_by_id, update_product, delete_product,
+    get_products_page, PRODUCT_PAGE_DEFAULT_LIMIT,
     # Order operations
     create_order, get_all_orders, get_user_orders, get_order_by_id, update_order_status,
+    get_user_orders_page, USER_ORDERS_DEFAULT_LIMIT,
     # Dashboard
     get_dashboard_stats,
     # Categories
     create_category, get_all_categories, get_active_categories, update_category, delete_category, get_categories_with_subcategories,
     # Settings
-    get_sale_banner, update_sale_banner, get_hero_slides, update_hero_slides, get_scrolling_text, update_scrolling_text,
+    get_setting, update_setting, get_sale_banner, update_sale_banner, get_hero_slides, update_hero_slides, get_scrolling_text, update_scrolling_text,
     # Homepage Sections
-    get_our_story, update_our_story, get_testimonials, update_testimonials, get_shop_the_look, update_shop_the_look,
+    get_home_page, get_our_story, update_our_story, get_testimonials, update_testimonials, get_shop_the_look, update_shop_the_look,
     # Featured Products
     get_featured_products, set_product_featured,
     # Collections
@@ -57,11 +65,15 @@ from models import (
     # Reviews
     create_review, get_product_reviews, get_all_reviews, verify_review, delete_review, get_product_rating,
     # Contact Submissions
-    create_contact, get_all_contacts, get_contact_by_id, update_contact_status, delete_contact
+    create_contact, get_all_contacts, get_contact_by_id, update_contact_status, delete_contact,
+    # Transactions / exports
+    get_transactions, EXPORTS, stream_export
 )
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+init_compression(app)
 CORS(app, resources={r"/*": {"origins": ["https://vurel.in", "https://www.vurel.in", "https://vurelecommerce.vercel.app", "http://localhost:3000"]}})
 
 # Configuration
@@ -89,11 +101,13 @@ def token_required(f):
         
         try:
             data = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-            current_user = find_user_by_id(data['user_id'])
+            current_user = resolve_user(data)
             if not current_user:
                 return jsonify({'detail': 'User not found'}), 401
         except jwt.ExpiredSignatureError:
             return jsonify({'detail': 'Token has expired'}), 401
+        except TokenRevokedError:
+            return jsonify({'detail': 'Token has been revoked'}), 401
         except jwt.InvalidTokenError:
             return jsonify({'detail': 'Invalid token'}), 401
         
@@ -109,12 +123,10 @@ def admin_required(f):
         return f(current_user, *args, **kwargs)
     return decorated
 
-def generate_token(user_id):
-    """Generate JWT token for a user"""
-    payload = {
-        'user_id': user_id,
-        'exp': datetime.utcnow() + timedelta(hours=JWT_EXPIRY_HOURS)
-    }
+def generate_token(user):
+    """Generate JWT token carrying the user's claims"""
+    payload = build_claims(user)
+    payload['exp'] = datetime.utcnow() + timedelta(hours=JWT_EXPIRY_HOURS)
     return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
 
 # ==================== AUTH ROUTES ====================
@@ -146,7 +158,7 @@ def register():
         
         # Get the created user
         user = find_user_by_id(user_id)
-        token = generate_token(user_id)
+        token = generate_token(user)
         
         return jsonify({
             'access_token': token,
@@ -181,9 +193,10 @@ def login():
         # Verify password
         if not verify_password(user['password_hash'], data['password']):
             return jsonify({'detail': 'Invalid email or password'}), 401
+        upgrade_password_hash(user, data['password'])
         
         # Generate token
-        token = generate_token(user['id'])
+        token = generate_token(user)
         
         return jsonify({
             'access_token': token,
@@ -236,21 +249,16 @@ def update_user_profile(current_user):
     """Update user profile"""
     try:
         data = request.get_json()
-        from database import execute_query
         
         # Update user profile
-        query = """
-            UPDATE users SET first_name = %s, last_name = %s, phone = %s, date_of_birth = %s
-            WHERE id = %s
-        """
         date_of_birth = data.get('date_of_birth') if data.get('date_of_birth') else None
-        execute_query(query, (
+        update_user(
+            current_user['id'],
             data.get('first_name', current_user['first_name']),
             data.get('last_name', current_user['last_name']),
             data.get('phone', ''),
-            date_of_birth,
-            current_user['id']
-        ))
+            date_of_birth
+        )
         
         return jsonify({'message': 'Profile updated successfully'})
     except Exception as e:
@@ -298,6 +306,8 @@ def send_otp():
             'otp_code_dev_only': otp_code  # REMOVE IN PRODUCTION
         })
         
+    except OTPLockedError:
+        return jsonify({'detail': 'Too many OTP attempts. Please try again later.'}), 429
     except Exception as e:
         print(f"Send OTP error: {e}")
         return jsonify({'detail': str(e)}), 500
@@ -322,7 +332,7 @@ def verify_otp_route():
             set_user_verified(email)
             user = find_user_by_email(email)
             if user:
-                token = generate_token(user['id'])
+                token = generate_token(user)
                 return jsonify({
                     'message': 'Email verified successfully',
                     'access_token': token,
@@ -340,7 +350,7 @@ def verify_otp_route():
         if purpose == 'login':
             user = find_user_by_email(email)
             if user:
-                token = generate_token(user['id'])
+                token = generate_token(user)
                 return jsonify({
                     'message': 'Login successful',
                     'access_token': token,
@@ -402,27 +412,15 @@ def register_with_otp():
             'otp_code_dev_only': otp_code  # REMOVE IN PRODUCTION
         }), 201
         
+    except OTPLockedError:
+        return jsonify({'detail': 'Too many OTP attempts. Please try again later.'}), 429
     except Exception as e:
         print(f"Register with OTP error: {e}")
         return jsonify({'detail': str(e)}), 500
 
 # Email sending utility
 def send_email_otp(to_email, otp_code, purpose='login'):
-    """Send OTP via email using SMTP"""
-    import smtplib
-    from email.mime.text import MIMEText
-    from email.mime.multipart import MIMEMultipart
-    
-    smtp_host = os.getenv('SMTP_HOST', 'smtp.gmail.com')
-    smtp_port = int(os.getenv('SMTP_PORT', 587))
-    smtp_user = os.getenv('SMTP_USER')
-    smtp_password = os.getenv('SMTP_PASSWORD')
-    from_name = os.getenv('SMTP_FROM_NAME', 'Vurel Store')
-    
-    if not smtp_user or not smtp_password or smtp_password == 'your-app-password':
-        print(f"📧 Email not configured. OTP for {to_email}: {otp_code}")
-        return False
-    
+    """Queue an OTP email; delivery happens on the mailer worker threads"""
     subject_map = {
         'login': 'Your Vurel Login OTP',
         'register': 'Verify Your Vurel Account',
@@ -444,21 +442,13 @@ def send_email_otp(to_email, otp_code, purpose='login'):
     """
     
     try:
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = f"{from_name} <{smtp_user}>"
-        msg['To'] = to_email
-        msg.attach(MIMEText(html_body, 'html'))
-        
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_password)
-            server.sendmail(smtp_user, to_email, msg.as_string())
-        
-        print(f"✅ Email sent to {to_email}")
+        if not enqueue_email(to_email, subject, html_body):
+            print(f"📧 Email not configured. OTP for {to_email}: {otp_code}")
+            return False
+        print(f"📧 Email queued for {to_email}")
         return True
     except Exception as e:
-        print(f"❌ Email send error: {e}")
+        print(f"❌ Email queue error: {e}")
         return False
 
 @app.route('/api/auth/forgot-password', methods=['POST'])
@@ -484,6 +474,8 @@ def forgot_password():
             'otp_code_dev_only': otp_code  # REMOVE IN PRODUCTION
         })
         
+    except OTPLockedError:
+        return jsonify({'detail': 'Too many OTP attempts. Please try again later.'}), 429
     except Exception as e:
         print(f"Forgot password error: {e}")
         return jsonify({'detail': str(e)}), 500
@@ -506,11 +498,8 @@ def reset_password():
         if not verify_otp(email, otp_code, 'reset'):
             return jsonify({'detail': 'Invalid or expired OTP'}), 400
         
-        # Update password
-        from database import execute_query
-        import bcrypt
-        hashed = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-        execute_query("UPDATE users SET password_hash = %s WHERE email = %s", (hashed, email))
+        # Update password (also signs out existing sessions)
+        update_user_password(email, new_password)
         
         return jsonify({'message': 'Password reset successfully'})
         
@@ -520,17 +509,46 @@ def reset_password():
 
 # ==================== PUBLIC PRODUCT ROUTES ====================
 
+PRODUCT_LIST_PARAMS = ('after', 'limit', 'sort', 'category', 'min_price', 'max_price', 'status', 'size', 'color')
+
 @app.route('/api/products', methods=['GET'])
+@conditional('catalog')
 def get_products():
-    """Get all products (public)"""
+    """Get products (public)
+
+    Without query parameters returns the full list as before. Any of
+    after/limit/sort or a filter (category, min_price, max_price, status,
+    size, color) switches to a keyset-paginated page:
+    {'items': [...], 'next_cursor': ..., 'has_more': ...}
+    """
     try:
-        products = get_all_products()
-        return jsonify(products)
+        if not any(param in request.args for param in PRODUCT_LIST_PARAMS):
+            products = get_all_products()
+            return jsonify(products)
+        
+        filters = {
+            'category': request.args.get('category'),
+            'status': request.args.get('status'),
+            'min_price': request.args.get('min_price', type=float),
+            'max_price': request.args.get('max_price', type=float),
+            'size': request.args.get('size'),
+            'color': request.args.get('color')
+        }
+        page = get_products_page(
+            filters=filters,
+            sort=request.args.get('sort', 'newest'),
+            after=request.args.get('after'),
+            limit=request.args.get('limit', PRODUCT_PAGE_DEFAULT_LIMIT, type=int)
+        )
+        return jsonify(page)
+    except ValueError as e:
+        return jsonify({'detail': str(e)}), 400
     except Exception as e:
         print(f"Get products error: {e}")
         return jsonify({'detail': str(e)}), 500
 
 @app.route('/api/products/<int:product_id>', methods=['GET'])
+@conditional('catalog')
 def get_product(product_id):
     """Get a single product (public)"""
     try:
@@ -542,9 +560,31 @@ def get_product(product_id):
         print(f"Get product error: {e}")
         return jsonify({'detail': str(e)}), 500
 
+# ==================== HOMEPAGE ====================
+
+@cached('home_payload')
+def home_payload():
+    """Serialized /api/home body, rebuilt after any catalog or homepage settings change"""
+    return app.json.dumps(get_home_page())
+
+@app.route('/api/home', methods=['GET'])
+@conditional('catalog')
+def public_get_home():
+    """Everything the homepage renders in one response
+
+    Sale banner, hero, scrolling text, our story, testimonials, shop the look
+    (with product cards), featured products and home collections.
+    """
+    try:
+        return Response(home_payload(), mimetype='application/json')
+    except Exception as e:
+        print(f"Get home error: {e}")
+        return jsonify({'detail': str(e)}), 500
+
 # ==================== PUBLIC COLLECTIONS ROUTES ====================
 
 @app.route('/api/collections/home', methods=['GET'])
+@conditional('catalog')
 def get_collections_for_home():
     """Get collections to display on homepage"""
     try:
@@ -555,6 +595,7 @@ def get_collections_for_home():
         return jsonify({'detail': str(e)}), 500
 
 @app.route('/api/collections', methods=['GET'])
+@conditional('catalog')
 def get_public_collections():
     """Get all active collections"""
     try:
@@ -567,6 +608,7 @@ def get_public_collections():
         return jsonify({'detail': str(e)}), 500
 
 @app.route('/api/collections/<int:collection_id>', methods=['GET'])
+@conditional('catalog')
 def get_public_collection(collection_id):
     """Get a single collection by ID"""
     try:
@@ -579,6 +621,7 @@ def get_public_collection(collection_id):
         return jsonify({'detail': str(e)}), 500
 
 @app.route('/api/collections/<int:collection_id>/products', methods=['GET'])
+@conditional('catalog')
 def get_public_collection_products(collection_id):
     """Get all products in a collection"""
     try:
@@ -609,69 +652,61 @@ def create_new_order():
             token = auth_header.split(' ')[1]
             try:
                 payload = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-                user = find_user_by_id(payload['user_id'])
+                user = resolve_user(payload)
                 if user:
                     customer_id = user['id']
             except:
                 pass
         
-        # If no authenticated user, create account from order data
-        if not customer_id:
-            email = data.get('customer_email')
-            name = data.get('customer_name', 'Guest').split(' ', 1)
-            first_name = name[0] if len(name) > 0 else 'Guest'
-            last_name = name[1] if len(name) > 1 else ''
-            phone = data.get('customer_phone', '')
-            
-            if email:
-                # Check if user exists
-                existing_user = find_user_by_email(email)
-                if existing_user:
-                    customer_id = existing_user['id']
-                    user = existing_user
-                else:
-                    # Create new user account with random password
-                    import secrets
-                    temp_password = secrets.token_urlsafe(12)
-                    
-                    from database import execute_query
-                    import bcrypt
-                    password_hash = bcrypt.hashpw(temp_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                    
-                    query = """
-                        INSERT INTO users (first_name, last_name, email, password_hash, phone, is_verified)
-                        VALUES (%s, %s, %s, %s, %s, TRUE)
-                    """
-                    customer_id = execute_query(query, (first_name, last_name, email, password_hash, phone))
-                    user = find_user_by_id(customer_id)
+        # Guest account, order and coupon usage are written as one unit of work
+        with transaction() as tx:
+            # If no authenticated user, create account from order data
+            if not customer_id:
+                email = data.get('customer_email')
+                name = data.get('customer_name', 'Guest').split(' ', 1)
+                first_name = name[0] if len(name) > 0 else 'Guest'
+                last_name = name[1] if len(name) > 1 else ''
+                phone = data.get('customer_phone', '')
                 
-                # Generate token for auto-login
-                if user:
-                    access_token = generate_token(user['id'])
-        
-        # Create the order
-        order_id = create_order(
-            customer_id=customer_id,
-            items=data['items'],
-            total=data['total'],
-            shipping_address=data.get('shipping_address'),
-            payment_method=data.get('payment_method', 'COD'),
-            customer_name=data.get('customer_name'),
-            customer_email=data.get('customer_email'),
-            customer_phone=data.get('customer_phone'),
-            payment_id=data.get('payment_id')
-        )
-        
-        # Use coupon if provided
-        if data.get('coupon_id'):
-            use_coupon(data['coupon_id'])
-        
-        order = get_order_by_id(order_id)
+                if email:
+                    # Check if user exists
+                    existing_user = find_user_by_email(email, tx=tx)
+                    if existing_user:
+                        customer_id = existing_user['id']
+                        user = existing_user
+                    else:
+                        # Passwordless shadow account; the customer signs in via OTP or sets a password later
+                        user = create_guest_user(first_name, last_name, email, phone, tx=tx)
+                        customer_id = user['id']
+                    
+                    # Generate token for auto-login
+                    if user:
+                        access_token = generate_token(user)
+            
+            # Create the order
+            order_id = create_order(
+                customer_id=customer_id,
+                items=data['items'],
+                total=data['total'],
+                shipping_address=data.get('shipping_address'),
+                payment_method=data.get('payment_method', 'COD'),
+                customer_name=data.get('customer_name'),
+                customer_email=data.get('customer_email'),
+                customer_phone=data.get('customer_phone'),
+                payment_id=data.get('payment_id'),
+                tx=tx
+            )
+            
+            # Use coupon if provided
+            if data.get('coupon_id'):
+                use_coupon(data['coupon_id'], tx=tx)
+            
+            order = get_order_by_id(order_id, tx=tx)
         
         response_data = {
             'id': order['id'],
             'status': order.get('status', 'Pending'),
-            'total': float(order['total']),
+            'total': order['total'],
             'message': 'Order placed successfully!'
         }
         
@@ -699,10 +734,27 @@ def create_new_order():
 @app.route('/api/user/orders', methods=['GET'])
 @token_required
 def get_my_orders(current_user):
-    """Get all orders for the current user"""
+    """Get orders for the current user
+
+    Returns the full list by default. With limit/before/summary returns a
+    keyset-paginated page {'items', 'next_cursor', 'has_more'}; summary=1
+    omits the items JSON and adds item_count.
+    """
     try:
-        orders = get_user_orders(current_user['id'])
-        return jsonify(orders)
+        if not any(param in request.args for param in ('limit', 'before', 'summary')):
+            orders = get_user_orders(current_user['id'], current_user['email'])
+            return jsonify(orders)
+        
+        page = get_user_orders_page(
+            current_user['id'],
+            current_user['email'],
+            limit=request.args.get('limit', USER_ORDERS_DEFAULT_LIMIT, type=int),
+            before=request.args.get('before'),
+            summary=request.args.get('summary', '').lower() in ('1', 'true', 'yes')
+        )
+        return jsonify(page)
+    except ValueError as e:
+        return jsonify({'detail': str(e)}), 400
     except Exception as e:
         print(f"Get user orders error: {e}")
         return jsonify({'detail': str(e)}), 500
@@ -789,44 +841,32 @@ def verify_razorpay_payment():
 def get_all_transactions(current_user):
     """Get all transactions for admin panel"""
     try:
-        from database import execute_query
-        
-        query = """
-            SELECT 
-                o.id as order_id,
-                COALESCE(o.customer_name, CONCAT(u.first_name, ' ', u.last_name)) as customer_name,
-                COALESCE(o.customer_email, u.email) as customer_email,
-                COALESCE(o.customer_phone, u.phone) as customer_phone,
-                o.total as amount,
-                o.payment_method,
-                o.payment_id,
-                o.status,
-                o.created_at
-            FROM orders o
-            LEFT JOIN users u ON o.customer_id = u.id
-            ORDER BY o.created_at DESC
-        """
-        
-        results = execute_query(query, fetch_all=True)
-        transactions = []
-        for row in results:
-            transactions.append({
-                'order_id': row.get('order_id'),
-                'customer_name': row.get('customer_name') or 'Guest',
-                'customer_email': row.get('customer_email') or '',
-                'customer_phone': row.get('customer_phone') or '',
-                'amount': float(row.get('amount')) if row.get('amount') else 0,
-                'payment_method': row.get('payment_method') or 'cod',
-                'payment_id': row.get('payment_id') or '',
-                'status': row.get('status'),
-                'created_at': str(row.get('created_at')) if row.get('created_at') else ''
-            })
-        
-        return jsonify(transactions)
+        return jsonify(get_transactions())
     except Exception as e:
         print(f"Get transactions error: {e}")
         return jsonify({'detail': str(e)}), 500
 
+@app.route('/api/admin/export/<resource>', methods=['GET'])
+@token_required
+@admin_required
+def admin_export(current_user, resource):
+    """Stream orders, transactions, customers or contacts as NDJSON or CSV (?format=)"""
+    fmt = request.args.get('format', 'ndjson')
+    if resource not in EXPORTS:
+        return jsonify({'detail': f"Unknown export '{resource}'"}), 404
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'detail': f"Unsupported format '{fmt}'"}), 400
+
+    filename = f"{resource}-{datetime.now().strftime('%Y%m%d')}.{fmt}"
+    return Response(
+        stream_with_context(serialize(stream_export(resource), fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no'  # Let reverse proxies pass chunks through
+        }
+    )
+
 # ==================== ADMIN DASHBOARD ====================
 
 
@@ -842,6 +882,108 @@ def admin_dashboard(current_user):
         print(f"Dashboard error: {e}")
         return jsonify({'detail': str(e)}), 500
 
+@app.route('/api/admin/stats/orders', methods=['GET'])
+@token_required
+@admin_required
+def admin_order_stats(current_user):
+    """Revenue, order count and AOV time series (?start=&end=&granularity=day|week|month)"""
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        stats = get_order_stats_series(
+            start=date.fromisoformat(start) if start else None,
+            end=date.fromisoformat(end) if end else None,
+            granularity=request.args.get('granularity', 'day')
+        )
+        return jsonify(stats)
+    except ValueError as e:
+        return jsonify({'detail': str(e)}), 400
+    except Exception as e:
+        print(f"Order stats error: {e}")
+        return jsonify({'detail': str(e)}), 500
+
+@app.route('/api/admin/stats/rebuild', methods=['POST'])
+@token_required
+@admin_required
+def admin_rebuild_order_stats(current_user):
+    """Recompute the daily order rollups from the orders table"""
+    try:
+        days = rebuild_daily_order_stats()
+        return jsonify({'message': 'Order stats rebuilt', 'days': days})
+    except Exception as e:
+        print(f"Rebuild order stats error: {e}")
+        return jsonify({'detail': str(e)}), 500
+
+@app.route('/api/admin/db-pool', methods=['GET'])
+@token_required
+@admin_required
+def admin_db_pool_stats(current_user):
+    """Get live database connection pool counters"""
+    try:
+        return jsonify(get_pool_stats())
+    except Exception as e:
+        return jsonify({'detail': str(e)}), 500
+
+@app.route('/api/admin/catalog-cache', methods=['GET'])
+@token_required
+@admin_required
+def admin_catalog_cache_stats(current_user):
+    """Get catalog cache hit/miss counters"""
+    try:
+        return jsonify(get_catalog_cache_stats())
+    except Exception as e:
+        return jsonify({'detail': str(e)}), 500
+
+@app.route('/api/admin/settings-cache', methods=['GET'])
+@token_required
+@admin_required
+def admin_settings_cache_stats(current_user):
+    """Get settings cache hit/load counters"""
+    try:
+        return jsonify(get_settings_cache_stats())
+    except Exception as e:
+        return jsonify({'detail': str(e)}), 500
+
+@app.route('/api/admin/compression', methods=['GET'])
+@token_required
+@admin_required
+def admin_compression_stats(current_user):
+    """Get response compression counters"""
+    try:
+        return jsonify(get_compression_stats())
+    except Exception as e:
+        return jsonify({'detail': str(e)}), 500
+
+@app.route('/api/admin/auth-cache', methods=['GET'])
+@token_required
+@admin_required
+def admin_auth_cache_stats(current_user):
+    """Get authenticated user cache hit/miss counters"""
+    try:
+        return jsonify(get_user_cache_stats())
+    except Exception as e:
+        return jsonify({'detail': str(e)}), 500
+
+@app.route('/api/admin/password-hasher', methods=['GET'])
+@token_required
+@admin_required
+def admin_password_hasher_stats(current_user):
+    """Get password hashing pool queue depth and latency"""
+    try:
+        return jsonify(get_password_stats())
+    except Exception as e:
+        return jsonify({'detail': str(e)}), 500
+
+@app.route('/api/admin/mail-queue', methods=['GET'])
+@token_required
+@admin_required
+def admin_mail_queue_stats(current_user):
+    """Get email delivery counters and queue depth"""
+    try:
+        return jsonify(get_mail_stats())
+    except Exception as e:
+        return jsonify({'detail': str(e)}), 500
+
 # ==================== ADMIN CUSTOMERS ROUTES ====================
 
 @app.route('/api/admin/customers', methods=['GET'])
@@ -1043,13 +1185,13 @@ def admin_update_order(current_user, order_id):
         print(f"Update order error: {e}")
         return jsonify({'detail': str(e)}), 500
 
-# ==================== FILE UPLOAD (CLOUDINARY) ====================
+# ==================== FILE UPLOAD ====================
 
 @app.route('/api/upload/image', methods=['POST'])
 @token_required
 @admin_required
 def upload_image(current_user):
-    """Upload an image to Cloudinary with optimized compression"""
+    """Upload an image to media storage (Cloudinary applies optimized compression)"""
     try:
         if 'file' not in request.files:
             return jsonify({'detail': 'No file provided'}), 400
@@ -1058,24 +1200,17 @@ def upload_image(current_user):
         if file.filename == '':
             return jsonify({'detail': 'No file selected'}), 400
         
-        # Upload to Cloudinary with optimization
-        # quality: 90 for crystal clear images, auto format for best compression
-        result = cloudinary.uploader.upload(
-            file,
-            folder="ecommerce/products",
-            quality="auto:best",  # Best quality with smart compression
-            fetch_format="auto",  # Auto-select best format (webp, jpg, etc)
-            transformation=[
-                {"quality": 90, "fetch_format": "auto"},
-                {"flags": "preserve_transparency"}
-            ]
+        # Upload unless these exact bytes were uploaded before
+        result = upload_deduplicated(
+            file.stream, media_storage.upload, 'image', folder="ecommerce/products", filename=file.filename
         )
         
         return jsonify({
             'url': result['secure_url'],
             'public_id': result['public_id'],
             'width': result.get('width'),
-            'height': result.get('height')
+            'height': result.get('height'),
+            'deduplicated': result['deduplicated']
         }), 201
         
     except Exception as e:
@@ -1095,25 +1230,18 @@ def upload_gallery_images(current_user):
         if not files or all(f.filename == '' for f in files):
             return jsonify({'detail': 'No files selected'}), 400
         
-        uploaded_urls = []
-        for file in files:
-            if file.filename:
-                result = cloudinary.uploader.upload(
-                    file,
-                    folder="ecommerce/gallery",
-                    quality="auto:best",
-                    fetch_format="auto",
-                    transformation=[
-                        {"quality": 90, "fetch_format": "auto"},
-                        {"flags": "preserve_transparency"}
-                    ]
-                )
-                uploaded_urls.append({
-                    'url': result['secure_url'],
-                    'public_id': result['public_id']
-                })
+        # Read the bodies up front; the request's file streams close when it returns
+        pending = [(f.filename, f.read()) for f in files if f.filename]
+        results = gallery_uploader.upload_all(pending, folder="ecommerce/gallery")
         
-        return jsonify({'images': uploaded_urls}), 201
+        uploaded = [{'url': r['url'], 'public_id': r['public_id']} for r in results if 'url' in r]
+        failed = [r for r in results if 'error' in r]
+        for r in failed:
+            print(f"Gallery upload failed for {r['filename']}: {r['error']}")
+        
+        # 207 when only some files made it, so the admin can retry the rest
+        status = 201 if not failed else (207 if uploaded else 502)
+        return jsonify({'images': uploaded, 'results': results, 'failed': len(failed)}), status
         
     except Exception as e:
         print(f"Gallery upload error: {e}")
@@ -1123,7 +1251,11 @@ def upload_gallery_images(current_user):
 @token_required
 @admin_required
 def upload_video(current_user):
-    """Upload a video to Cloudinary"""
+    """Accept a video and upload it to media storage in the background
+
+    Returns 202 with a job id; poll GET /api/upload/jobs/<id> for progress
+    and the final URL.
+    """
     try:
         if 'file' not in request.files:
             return jsonify({'detail': 'No file provided'}), 400
@@ -1132,33 +1264,53 @@ def upload_video(current_user):
         if file.filename == '':
             return jsonify({'detail': 'No file selected'}), 400
         
-        print(f"Video upload started: {file.filename}")
-        
         # Simple video upload without complex transformations
-        result = cloudinary.uploader.upload(
+        job = upload_jobs.submit(
             file,
-            folder="ecommerce/videos",
-            resource_type="video"
+            kind='video',
+            options={'folder': "ecommerce/videos"},
+            user_id=current_user['id']
         )
+        print(f"Video upload queued: {file.filename} ({job['job_id']})")
         
-        print(f"Video upload success: {result.get('secure_url')}")
-        
-        return jsonify({
-            'url': result['secure_url'],
-            'public_id': result['public_id'],
-            'duration': result.get('duration'),
-            'format': result.get('format')
-        }), 201
+        job['status_url'] = f"/api/upload/jobs/{job['job_id']}"
+        return jsonify(job), 202
         
     except Exception as e:
-        import traceback
         print(f"Video upload error: {e}")
-        print(traceback.format_exc())
         return jsonify({'detail': str(e)}), 500
 
+@app.route('/api/upload/jobs/<job_id>', methods=['GET'])
+@token_required
+@admin_required
+def get_upload_job_status(current_user, job_id):
+    """Get progress of a background upload job"""
+    try:
+        job = get_upload_job(job_id)
+        if not job:
+            return jsonify({'detail': 'Upload job not found'}), 404
+        return jsonify(job)
+    except Exception as e:
+        print(f"Upload job status error: {e}")
+        return jsonify({'detail': str(e)}), 500
+
+@app.route('/media/<path:public_id>', methods=['GET'])
+def serve_media(public_id):
+    """Serve files from the local storage backend
+
+    Paths are content hashes, so responses can be cached for a year.
+    """
+    # .tmp holds uploads still being written
+    if not isinstance(media_storage, LocalStorage) or public_id.startswith('.'):
+        return jsonify({'detail': 'Not found'}), 404
+    response = send_from_directory(media_storage.root, public_id, max_age=MEDIA_CACHE_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={MEDIA_CACHE_MAX_AGE}, immutable'
+    return response
+
 # ==================== CATEGORIES ROUTES ====================
 
 @app.route('/api/categories', methods=['GET'])
+@conditional('catalog')
 def public_get_categories():
     """Get active categories (public)"""
     try:
@@ -1169,6 +1321,7 @@ def public_get_categories():
         return jsonify({'detail': str(e)}), 500
 
 @app.route('/api/categories/grouped', methods=['GET'])
+@conditional('catalog')
 def public_get_categories_grouped():
     """Get categories with their subcategories grouped (public)"""
     try:
@@ -1230,9 +1383,25 @@ def admin_delete_category(current_user, category_id):
     except Exception as e:
         return jsonify({'detail': str(e)}), 500
 
+# ==================== PUBLIC SETTINGS BUNDLE ====================
+
+@app.route('/api/settings', methods=['GET'])
+def public_get_settings():
+    """All public settings in one response, with an ETag for revalidation"""
+    try:
+        _, body, etag = get_settings_bundle()
+        matched = matching_etag(etag)
+        response = Response(status=304) if matched else Response(body, mimetype='application/json')
+        response.set_etag(matched or etag)
+        return cache_control(response)
+    except Exception as e:
+        print(f"Get settings error: {e}")
+        return jsonify({'detail': str(e)}), 500
+
 # ==================== SALE BANNER SETTINGS ====================
 
 @app.route('/api/settings/sale-banner', methods=['GET'])
+@conditional('settings')
 def public_get_sale_banner():
     """Get sale banner settings (public)"""
     try:
@@ -1271,6 +1440,7 @@ def admin_update_sale_banner(current_user):
 # ==================== HERO SETTINGS ====================
 
 @app.route('/api/settings/hero', methods=['GET'])
+@conditional('settings')
 def public_get_hero():
     """Get hero slider settings (public)"""
     try:
@@ -1279,6 +1449,7 @@ def public_get_hero():
         return jsonify({'detail': str(e)}), 500
 
 @app.route('/api/settings/scrolling-text', methods=['GET'])
+@conditional('settings')
 def public_get_scrolling_text():
     """Get scrolling text settings (public)"""
     try:
@@ -1334,6 +1505,7 @@ def admin_update_scrolling_text(current_user):
 
 # Our Story
 @app.route('/api/settings/our-story', methods=['GET'])
+@conditional('settings')
 def public_get_our_story():
     try:
         return jsonify(get_our_story())
@@ -1353,6 +1525,7 @@ def admin_update_our_story(current_user):
 
 # Testimonials
 @app.route('/api/settings/testimonials', methods=['GET'])
+@conditional('settings')
 def public_get_testimonials():
     try:
         return jsonify(get_testimonials())
@@ -1372,6 +1545,7 @@ def admin_update_testimonials(current_user):
 
 # Shop The Look
 @app.route('/api/settings/shop-the-look', methods=['GET'])
+@conditional('settings')
 def public_get_shop_the_look():
     try:
         return jsonify(get_shop_the_look())
@@ -1390,6 +1564,7 @@ def admin_update_shop_the_look(current_user):
         return jsonify({'detail': str(e)}), 500
 
 @app.route('/api/featured-products', methods=['GET'])
+@conditional('catalog')
 def public_get_featured():
     """Get featured products (public)"""
     try:
@@ -1413,6 +1588,7 @@ def admin_toggle_featured(current_user, product_id):
 # ==================== COLLECTIONS ====================
 
 @app.route('/api/collections', methods=['GET'])
+@conditional('catalog')
 def public_get_collections():
     """Get collections for home page (public)"""
     try:
@@ -1422,6 +1598,7 @@ def public_get_collections():
         return jsonify({'detail': str(e)}), 500
 
 @app.route('/api/collections/<int:collection_id>', methods=['GET'])
+@conditional('catalog')
 def public_get_collection(collection_id):
     """Get a single collection with products"""
     try:
@@ -1674,17 +1851,14 @@ def admin_delete_review(current_user, review_id):
 # ==================== PAYMENT SETTINGS ====================
 
 @app.route('/api/settings/payment', methods=['GET'])
+@conditional('settings')
 def get_payment_settings():
     """Get payment method settings (public)"""
     try:
-        from database import execute_query
-        result = execute_query("SELECT * FROM site_settings WHERE setting_key = 'payment_methods'", fetch_one=True)
-        if result:
-            import json
-            return jsonify(json.loads(result.get('setting_value', '{}')))
-        return jsonify({'cod_enabled': True, 'online_enabled': True})
+        return jsonify(get_setting('payment_methods'))
     except Exception as e:
-        return jsonify({'cod_enabled': True, 'online_enabled': True})
+        print(f"Get payment settings error: {e}")
+        return no_store(jsonify(SETTING_DEFAULTS['payment_methods']))
 
 @app.route('/api/admin/settings/payment', methods=['PUT'])
 @token_required
@@ -1692,21 +1866,11 @@ def get_payment_settings():
 def update_payment_settings(current_user):
     """Update payment method settings"""
     try:
-        from database import execute_query
-        import json
         data = request.get_json()
-        settings_json = json.dumps({
+        update_setting('payment_methods', {
             'cod_enabled': data.get('cod_enabled', True),
             'online_enabled': data.get('online_enabled', True)
         })
-        
-        # Check if setting exists
-        existing = execute_query("SELECT id FROM site_settings WHERE setting_key = 'payment_methods'", fetch_one=True)
-        if existing:
-            execute_query("UPDATE site_settings SET setting_value = %s WHERE setting_key = 'payment_methods'", (settings_json,))
-        else:
-            execute_query("INSERT INTO site_settings (setting_key, setting_value) VALUES ('payment_methods', %s)", (settings_json,))
-        
         return jsonify({'message': 'Payment settings updated'})
     except Exception as e:
         print(f"Update payment settings error: {e}")
@@ -1715,18 +1879,14 @@ def update_payment_settings(current_user):
 # ==================== SHIPPING SETTINGS ====================
 
 @app.route('/api/settings/shipping', methods=['GET'])
+@conditional('settings')
 def get_shipping_settings():
     """Get shipping settings (public)"""
     try:
-        from database import execute_query
-        result = execute_query("SELECT * FROM site_settings WHERE setting_key = 'shipping_settings'", fetch_one=True)
-        if result:
-            import json
-            return jsonify(json.loads(result.get('setting_value', '{}')))
-        # Default values: Free delivery for orders >= 800, else 85 charge
-        return jsonify({'free_delivery_minimum': 800, 'delivery_charge': 85})
+        return jsonify(get_setting('shipping_settings'))
     except Exception as e:
-        return jsonify({'free_delivery_minimum': 800, 'delivery_charge': 85})
+        print(f"Get shipping settings error: {e}")
+        return no_store(jsonify(SETTING_DEFAULTS['shipping_settings']))
 
 @app.route('/api/admin/settings/shipping', methods=['PUT'])
 @token_required
@@ -1734,21 +1894,11 @@ def get_shipping_settings():
 def update_shipping_settings(current_user):
     """Update shipping settings"""
     try:
-        from database import execute_query
-        import json
         data = request.get_json()
-        settings_json = json.dumps({
+        update_setting('shipping_settings', {
             'free_delivery_minimum': data.get('free_delivery_minimum', 800),
             'delivery_charge': data.get('delivery_charge', 85)
         })
-        
-        # Check if setting exists
-        existing = execute_query("SELECT id FROM site_settings WHERE setting_key = 'shipping_settings'", fetch_one=True)
-        if existing:
-            execute_query("UPDATE site_settings SET setting_value = %s WHERE setting_key = 'shipping_settings'", (settings_json,))
-        else:
-            execute_query("INSERT INTO site_settings (setting_key, setting_value) VALUES ('shipping_settings', %s)", (settings_json,))
-        
         return jsonify({'message': 'Shipping settings updated'})
     except Exception as e:
         print(f"Update shipping settings error: {e}")
@@ -1757,17 +1907,14 @@ def update_shipping_settings(current_user):
 # ==================== WHATSAPP SETTINGS ====================
 
 @app.route('/api/settings/whatsapp', methods=['GET'])
+@conditional('settings')
 def get_whatsapp_settings():
     """Get WhatsApp settings (public)"""
     try:
-        from database import execute_query
-        result = execute_query("SELECT * FROM site_settings WHERE setting_key = 'whatsapp_settings'", fetch_one=True)
-        if result:
-            import json
-            return jsonify(json.loads(result.get('setting_value', '{}')))
-        return jsonify({'whatsapp_number': '', 'whatsapp_message': 'Hi! I am interested in your products.'})
+        return jsonify(get_setting('whatsapp_settings'))
     except Exception as e:
-        return jsonify({'whatsapp_number': '', 'whatsapp_message': 'Hi! I am interested in your products.'})
+        print(f"Get WhatsApp settings error: {e}")
+        return no_store(jsonify(SETTING_DEFAULTS['whatsapp_settings']))
 
 @app.route('/api/admin/settings/whatsapp', methods=['PUT'])
 @token_required
@@ -1775,21 +1922,11 @@ def get_whatsapp_settings():
 def update_whatsapp_settings(current_user):
     """Update WhatsApp settings"""
     try:
-        from database import execute_query
-        import json
         data = request.get_json()
-        settings_json = json.dumps({
+        update_setting('whatsapp_settings', {
             'whatsapp_number': data.get('whatsapp_number', ''),
             'whatsapp_message': data.get('whatsapp_message', 'Hi! I am interested in your products.')
         })
-        
-        # Check if setting exists
-        existing = execute_query("SELECT id FROM site_settings WHERE setting_key = 'whatsapp_settings'", fetch_one=True)
-        if existing:
-            execute_query("UPDATE site_settings SET setting_value = %s WHERE setting_key = 'whatsapp_settings'", (settings_json,))
-        else:
-            execute_query("INSERT INTO site_settings (setting_key, setting_value) VALUES ('whatsapp_settings', %s)", (settings_json,))
-        
         return jsonify({'message': 'WhatsApp settings updated'})
     except Exception as e:
         print(f"Update WhatsApp settings error: {e}")
@@ -1811,7 +1948,7 @@ def home():
             'categories': ['/api/categories', '/api/admin/categories'],
             'settings': ['/api/settings/sale-banner', '/api/admin/settings/sale-banner'],
             'admin': ['/api/admin/dashboard', '/api/admin/products', '/api/admin/orders', '/api/admin/customers'],
-            'upload': ['/api/upload/image', '/api/upload/gallery', '/api/upload/video']
+            'upload': ['/api/upload/image', '/api/upload/gallery', '/api/upload/video', '/api/upload/jobs/<id>']
         }
     })
 
@@ -1892,23 +2029,58 @@ def admin_delete_contact(current_user, contact_id):
         print(f"Delete contact error: {e}")
         return jsonify({'detail': str(e)}), 500
 
-# ==================== MAIN ====================
+# ==================== STARTUP ====================
 
-if __name__ == '__main__':
-    print("🚀 Starting Ecommerce Backend API...")
-    
-    # Initialize database
-    if init_database():
-        print("✅ Database initialized")
-    else:
-        print("⚠️  Database initialization failed - make sure MySQL is running")
-    
-    # Initialize connection pool
+def create_app():
+    """One-time startup (schema migrations); returns the module-level app
+
+    Not a factory: the routes are registered on `app` at import time, and
+    this wraps it so gunicorn can load `app:create_app()` and run the
+    migrations once. Under gunicorn (preload_app) that happens in the
+    master, so migrations apply once per deploy instead of racing in every
+    worker. Per-process resources are started by init_worker() after the
+    fork. init_database() reports its own outcome (up to date, pending, or
+    the failure).
+    """
+    init_database()
+    return app
+
+def warm_caches():
+    """Load the hot public reads so a new worker's first requests are cache hits"""
+    started = time.perf_counter()
+    warmed = []
+    for name, load in (('products', get_all_products), ('home', home_payload), ('settings', get_settings_bundle)):
+        try:
+            load()
+            warmed.append(name)
+        except Exception as e:
+            print(f"⚠️  Cache warmup failed for {name}: {e}")
+    print(f"🔥 Warmed {', '.join(warmed) or 'no'} caches in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+def init_worker():
+    """Per-process startup: connection pool, mail threads, then warm caches
+
+    Called by gunicorn's post_fork hook, before the worker accepts requests.
+    Connections and threads must not be created before the fork.
+    """
+    # Initialize connection pool (opens DB_POOL_PREWARM connections)
     if init_pool():
         print("✅ Connection pool ready")
     else:
         print("⚠️  Connection pool failed - API may not work correctly")
     
+    # Drain any email left queued by a previous run
+    start_mail_workers()
+    
+    warm_caches()
+
+if __name__ == '__main__':
+    print("🚀 Starting Ecommerce Backend API...")
+    
+    # Development server; production runs `gunicorn -c gunicorn.conf.py "app:create_app()"`
+    create_app()
+    init_worker()
+    
     print(f"🌐 Server running at http://localhost:8000")
     print("📄 API endpoints available:")
     print("   - POST /api/auth/register")
@@ -0,0 +1,112 @@
+"""
+Authenticated user context for token_required
+
+Tokens carry only the user's id and token version as claims; names, email
+and the admin flag are read from the users row. Requests resolve the user
+from a short-lived in-process cache and only query the database on a miss,
+so a warm request costs a signature check and a dictionary lookup.
+
+Writes that change a user (profile, admin flag) call invalidate_user();
+writes that must also revoke existing tokens (password reset) bump
+users.token_version first. Other worker processes pick up the change when
+their entry expires, after at most AUTH_USER_CACHE_TTL seconds.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+import jwt
+from database import execute_query
+
+AUTH_CONFIG = {
+    'ttl': int(os.getenv('AUTH_USER_CACHE_TTL', 60)),
+    'max_entries': int(os.getenv('AUTH_USER_CACHE_MAX_ENTRIES', 10000))
+}
+
+class TokenRevokedError(jwt.InvalidTokenError):
+    """The token's version is older than the user's current token_version"""
+
+class UserCache:
+    """TTL + LRU cache of user rows keyed by id"""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> (user, expires_at)
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                self.stats['hits'] += 1
+                return entry[0]
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, user_id, user):
+        with self._lock:
+            self._entries[user_id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self.stats['invalidations'] += 1
+
+    def get_stats(self):
+        with self._lock:
+            snapshot = dict(self.stats)
+            snapshot['entries'] = len(self._entries)
+        return snapshot
+
+user_cache = UserCache(**AUTH_CONFIG)
+
+def build_claims(user):
+    """JWT claims describing a user (expiry is added by the caller)"""
+    return {
+        'user_id': user['id'],
+        'ver': user.get('token_version') or 0
+    }
+
+def load_user(user_id):
+    """Read the user row used as request context"""
+    query = """
+        SELECT id, first_name, last_name, email, phone, date_of_birth, is_admin, token_version, created_at
+        FROM users WHERE id = %s
+    """
+    return execute_query(query, (user_id,), fetch_one=True)
+
+def resolve_user(claims):
+    """Return the current user for decoded token claims, or None if the user is gone
+
+    Raises TokenRevokedError when the token predates the user's token_version.
+    Tokens issued before versioning carry no `ver` claim and count as version 0.
+    """
+    user_id = claims['user_id']
+    version = claims.get('ver', 0)
+    user = user_cache.get(user_id)
+    # A newer version than we hold means our entry is stale, not the token
+    if user is None or version > user['token_version']:
+        user = load_user(user_id)
+        if not user:
+            user_cache.invalidate(user_id)
+            return None
+        user_cache.put(user_id, user)
+    if version != user['token_version']:
+        raise TokenRevokedError('Token has been revoked')
+    # Routes get their own copy; the cached row is shared between requests
+    return dict(user)
+
+def invalidate_user(user_id):
+    """Drop a user from this worker's cache after their row changed"""
+    user_cache.invalidate(user_id)
+
+def get_user_cache_stats():
+    """Get hit/miss counters of the authenticated user cache"""
+    return user_cache.get_stats()
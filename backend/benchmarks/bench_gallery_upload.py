@@ -0,0 +1,60 @@
+"""
+Benchmark: sequential vs parallel gallery uploads
+
+Uses a fake uploader that sleeps for a fixed latency instead of calling
+Cloudinary, so the numbers show the fan-out effect only.
+
+Run from backend/:  python benchmarks/bench_gallery_upload.py [--files 10] [--latency 0.3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uploads import ParallelUploader
+
+def fake_uploader(latency, fail_every=0):
+    calls = {'n': 0}
+
+    def upload(data, **options):
+        calls['n'] += 1
+        time.sleep(latency)
+        if fail_every and calls['n'] % fail_every == 0:
+            raise RuntimeError('simulated upload failure')
+        n = calls['n']
+        return {'secure_url': f'https://example.test/gallery/{n}.jpg', 'public_id': f'gallery/{n}'}
+    return upload
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.3, help="seconds per fake upload")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--fail-every', type=int, default=0, help="fail every Nth upload")
+    args = parser.parse_args(argv)
+
+    files = [(f'image-{i}.jpg', b'\xff\xd8' + os.urandom(1024)) for i in range(args.files)]
+
+    upload = fake_uploader(args.latency, args.fail_every)
+    started = time.perf_counter()
+    for _, data in files:
+        try:
+            upload(data)
+        except RuntimeError:
+            pass
+    sequential = time.perf_counter() - started
+
+    uploader = ParallelUploader(upload=fake_uploader(args.latency, args.fail_every), workers=args.workers, timeout=60)
+    started = time.perf_counter()
+    results = uploader.upload_all(files)
+    parallel = time.perf_counter() - started
+
+    failed = sum(1 for r in results if 'error' in r)
+    print(f"{args.files} files, {args.latency * 1000:.0f} ms per upload")
+    print(f"sequential:            {sequential * 1000:8.1f} ms")
+    print(f"parallel ({args.workers} workers):  {parallel * 1000:8.1f} ms  ({failed} failed)")
+
+if __name__ == '__main__':
+    main()
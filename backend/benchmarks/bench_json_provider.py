@@ -0,0 +1,127 @@
+"""
+Benchmark: JSON responses for large product and order lists
+
+before  RowDecoder converting DECIMAL columns to float, then Flask's default
+        stdlib provider (datetimes as RFC 822 strings)
+after   RowDecoder parsing JSON columns only, then FastJSONProvider
+        encoding Decimal and datetime itself (orjson, and the stdlib
+        fallback for comparison)
+
+Run from backend/:  python benchmarks/bench_json_provider.py [--products 5000] [--orders 5000]
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+import json_provider
+from json_provider import FastJSONProvider
+from row_decoder import PRODUCT_ROWS, ORDER_ROWS
+
+ROUNDS = 5
+
+def legacy_decoder(decimal_columns, decoder):
+    """The decode step before FastJSONProvider: DECIMAL -> float, then JSON columns"""
+    def decode(rows):
+        for row in rows:
+            for column in decimal_columns:
+                if row[column] is not None:
+                    row[column] = float(row[column])
+        return decoder.decode_rows(rows)
+    return decode
+
+LEGACY_PRODUCT_ROWS = legacy_decoder(('price', 'original_price'), PRODUCT_ROWS)
+LEGACY_ORDER_ROWS = legacy_decoder(('total',), ORDER_ROWS)
+
+def make_products(n):
+    """Rows shaped like mysql-connector output for SELECT * FROM products"""
+    colors = json.dumps([{'name': 'Navy', 'value': '#0D2440'}, {'name': 'Cream', 'value': '#F5F0E6'}])
+    sizes = json.dumps(['XS', 'S', 'M', 'L', 'XL'])
+    gallery = json.dumps([f'https://res.cloudinary.com/demo/image/upload/v1/gallery/{i}.jpg' for i in range(4)])
+    return [{
+        'id': i,
+        'name': f'Product {i}',
+        'description': 'A relaxed linen shirt ' * 5,
+        'category': 'Shirts',
+        'price': Decimal('1499.00'),
+        'original_price': Decimal('1999.00'),
+        'stock': 25,
+        'status': 'Active',
+        'image_url': 'https://res.cloudinary.com/demo/image/upload/v1/products/p.jpg',
+        'colors': colors,
+        'sizes': sizes,
+        'gallery_images': gallery,
+        'video_url': None,
+        'is_featured': 0,
+        'faqs': '[]',
+        'related_products': '[1, 2, 3]',
+        'created_at': datetime(2025, 1, 1, 12, 30),
+        'updated_at': datetime(2025, 2, 1, 8, 0)
+    } for i in range(n)]
+
+def make_orders(n):
+    """Rows shaped like the admin order listing"""
+    items = json.dumps([{'id': 1, 'name': 'Linen Shirt', 'price': 1499, 'quantity': 2, 'size': 'M', 'color': 'Navy'}])
+    address = json.dumps({'line1': '12 MG Road', 'city': 'Bengaluru', 'pincode': '560001'})
+    return [{
+        'id': i,
+        'customer_name': 'Asha Rao',
+        'customer_email': 'asha@example.com',
+        'customer_phone': '9999999999',
+        'total': Decimal('2998.00'),
+        'status': 'Pending',
+        'items': items,
+        'shipping_address': address,
+        'payment_method': 'COD',
+        'created_at': datetime(2025, 3, 1, 9, 15)
+    } for i in range(n)]
+
+def best_of(fn, rows):
+    best = float('inf')
+    for _ in range(ROUNDS):
+        batch = copy.deepcopy(rows)
+        started = time.perf_counter()
+        fn(batch)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--orders', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    default = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+
+    def stdlib_fast(rows):
+        saved, json_provider.orjson = json_provider.orjson, None
+        try:
+            return fast.dumps_bytes(rows)
+        finally:
+            json_provider.orjson = saved
+
+    for name, rows, legacy, decoder in (
+        ('products', make_products(args.products), LEGACY_PRODUCT_ROWS, PRODUCT_ROWS),
+        ('orders', make_orders(args.orders), LEGACY_ORDER_ROWS, ORDER_ROWS),
+    ):
+        before = best_of(lambda r: default.dumps(legacy(r)), rows)
+        print(f"{len(rows)} {name}")
+        print(f"  before (float loop + stdlib jsonify): {before:8.1f} ms")
+        if json_provider.orjson:
+            after = best_of(lambda r: fast.dumps_bytes(decoder.decode_rows(r)), rows)
+            print(f"  after  (FastJSONProvider, orjson):    {after:8.1f} ms  ({before / after:.1f}x)")
+        fallback = best_of(lambda r: stdlib_fast(decoder.decode_rows(r)), rows)
+        print(f"  after  (FastJSONProvider, stdlib):    {fallback:8.1f} ms  ({before / fallback:.1f}x)")
+
+if __name__ == '__main__':
+    main()
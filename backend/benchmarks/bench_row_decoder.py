@@ -0,0 +1,97 @@
+"""
+Microbenchmark: decoding 10k product rows
+
+Compares the per-row decode block that models.py used to copy around with
+RowDecoder as models.py uses it now (JSON columns only; DECIMALs are left
+for json_provider), parsing through orjson. The stdlib fallback is timed too; it
+runs at roughly legacy speed, so the win depends on orjson being installed.
+
+Run from backend/:  python benchmarks/bench_row_decoder.py
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from row_decoder import PRODUCT_ROWS
+
+ROWS = 10000
+ROUNDS = 5
+
+def make_rows():
+    """Rows shaped like mysql-connector output for SELECT * FROM products"""
+    colors = json.dumps([{'name': 'Navy', 'value': '#0D2440'}, {'name': 'Cream', 'value': '#F5F0E6'}])
+    sizes = json.dumps(['XS', 'S', 'M', 'L', 'XL'])
+    gallery = json.dumps([f'https://res.cloudinary.com/demo/image/upload/v1/gallery/{i}.jpg' for i in range(4)])
+    faqs = json.dumps([{'question': 'Is it machine washable?', 'answer': 'Yes, on a cold cycle.'}])
+    related = json.dumps([1, 2, 3])
+    return [{
+        'id': i,
+        'name': f'Product {i}',
+        'description': 'A relaxed linen shirt ' * 5,
+        'category': 'Shirts',
+        'price': Decimal('1499.00'),
+        'original_price': Decimal('1999.00'),
+        'stock': 25,
+        'status': 'Active',
+        'image_url': 'https://res.cloudinary.com/demo/image/upload/v1/products/p.jpg',
+        'colors': colors,
+        'sizes': sizes,
+        'gallery_images': gallery,
+        'video_url': None,
+        'is_featured': 0,
+        'faqs': faqs,
+        'related_products': related,
+        'created_at': datetime(2025, 1, 1)
+    } for i in range(ROWS)]
+
+def legacy_decode(result):
+    for product in result:
+        if product.get('price'):
+            product['price'] = float(product['price'])
+        if product.get('original_price'):
+            product['original_price'] = float(product['original_price'])
+        if product.get('colors') and isinstance(product['colors'], str):
+            product['colors'] = json.loads(product['colors'])
+        if product.get('sizes') and isinstance(product['sizes'], str):
+            product['sizes'] = json.loads(product['sizes'])
+        if product.get('gallery_images') and isinstance(product['gallery_images'], str):
+            product['gallery_images'] = json.loads(product['gallery_images'])
+        if product.get('faqs') and isinstance(product['faqs'], str):
+            product['faqs'] = json.loads(product['faqs'])
+        if product.get('related_products') and isinstance(product['related_products'], str):
+            product['related_products'] = json.loads(product['related_products'])
+    return result
+
+def bench(name, decode):
+    best = None
+    for _ in range(ROUNDS):
+        rows = make_rows()
+        started = time.perf_counter()
+        decode(rows)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<28} {best * 1000:8.1f} ms   {ROWS / best:12,.0f} rows/s")
+    return best
+
+if __name__ == '__main__':
+    import row_decoder
+
+    print(f"Decoding {ROWS:,} product rows (best of {ROUNDS})")
+    baseline = bench('legacy per-row block', legacy_decode)
+
+    fast_loads = row_decoder.json_loads
+    row_decoder.json_loads = json.loads
+    fallback_time = bench('RowDecoder (stdlib fallback)', PRODUCT_ROWS.decode_rows)
+    row_decoder.json_loads = fast_loads
+    print(f"  fallback vs legacy: {baseline / fallback_time:.2f}x")
+
+    if fast_loads is json.loads:
+        print("orjson not installed, RowDecoder has no fast parser to use")
+    else:
+        fast_time = bench('RowDecoder (orjson)', PRODUCT_ROWS.decode_rows)
+        print(f"  orjson vs legacy:   {baseline / fast_time:.2f}x")
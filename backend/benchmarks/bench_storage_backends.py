@@ -0,0 +1,68 @@
+"""
+Benchmark: media storage backend throughput
+
+Uploads the same set of random files through each backend, one at a time
+and through a ParallelUploader, and reports files/s and MB/s. The local
+backend writes to a temporary MEDIA_ROOT. Cloudinary only runs with
+--cloudinary (it uploads real assets and deletes them afterwards).
+
+Run from backend/:  python benchmarks/bench_storage_backends.py [--files 20] [--size-kb 512] [--cloudinary]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import CloudinaryStorage, LocalStorage
+from uploads import ParallelUploader
+
+def run(storage, files, workers):
+    started = time.perf_counter()
+    results = [storage.upload(io.BytesIO(data), kind='image', folder='ecommerce/bench', filename=name)
+               for name, data in files]
+    sequential = time.perf_counter() - started
+
+    uploader = ParallelUploader(upload=storage.upload, workers=workers, timeout=600)
+    started = time.perf_counter()
+    parallel_results = uploader.upload_all(files, kind='image', folder='ecommerce/bench')
+    parallel = time.perf_counter() - started
+
+    public_ids = {r['public_id'] for r in results} | {r['public_id'] for r in parallel_results if 'public_id' in r}
+    failed = sum(1 for r in parallel_results if 'error' in r)
+    return sequential, parallel, public_ids, failed
+
+def report(name, files, workers, sequential, parallel, failed):
+    megabytes = sum(len(data) for _, data in files) / (1024 * 1024)
+    print(f"{name}")
+    print(f"  sequential:            {sequential * 1000:8.1f} ms  {len(files) / sequential:8.1f} files/s  {megabytes / sequential:8.1f} MB/s")
+    print(f"  parallel ({workers} workers):  {parallel * 1000:8.1f} ms  {len(files) / parallel:8.1f} files/s  {megabytes / parallel:8.1f} MB/s  ({failed} failed)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=20)
+    parser.add_argument('--size-kb', type=int, default=512)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--cloudinary', action='store_true', help="also upload to the configured Cloudinary account")
+    args = parser.parse_args(argv)
+
+    files = [(f'image-{i}.jpg', b'\xff\xd8' + os.urandom(args.size_kb * 1024)) for i in range(args.files)]
+    print(f"{args.files} files x {args.size_kb} KB")
+
+    with tempfile.TemporaryDirectory() as root:
+        local = LocalStorage(root=root, base_url='http://localhost:8000/media')
+        sequential, parallel, _, failed = run(local, files, args.workers)
+        report(f"local ({root})", files, args.workers, sequential, parallel, failed)
+
+    if args.cloudinary:
+        cloud = CloudinaryStorage()
+        sequential, parallel, public_ids, failed = run(cloud, files, args.workers)
+        report("cloudinary", files, args.workers, sequential, parallel, failed)
+        for public_id in public_ids:
+            cloud.destroy(public_id, 'image')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+In-process cache for decoded product catalog reads
+
+Entries expire after a TTL and are evicted least-recently-used once the
+entry or byte budget is exceeded. Admin writes bump a shared version row in
+site_settings so every worker drops its cache within a few seconds.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from database import execute_query
+
+CACHE_CONFIG = {
+    'ttl': int(os.getenv('CATALOG_CACHE_TTL', 300)),
+    'max_entries': int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', 512)),
+    'max_bytes': int(os.getenv('CATALOG_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+    'version_check_interval': float(os.getenv('CATALOG_VERSION_CHECK_INTERVAL', 5))
+}
+
+VERSION_KEY = 'catalog_version'
+
+def _estimate_size(value):
+    """Rough size of a cached value in bytes"""
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except Exception:
+        return 1024
+
+class CatalogCache:
+    """TTL + LRU cache with a shared invalidation version"""
+
+    def __init__(self, ttl, max_entries, max_bytes, version_check_interval):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version_check_interval = version_check_interval
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._generation = 0  # Bumped on clear so in-flight loads are not stored
+        self._version = None
+        self._modified_at = None
+        self._version_checked_at = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss"""
+        self._check_version()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[0]
+            self.stats['misses'] += 1
+            generation = self._generation
+
+        value = loader()
+        self._store(key, value, generation)
+        return value
+
+    def _store(self, key, value, generation):
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old[2]
+            self._entries[key] = (value, time.monotonic() + self.ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation += 1
+            self.stats['invalidations'] += 1
+
+    def _check_version(self):
+        """Drop local entries when another worker bumped the shared version"""
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_interval:
+            return
+        self._version_checked_at = now
+        try:
+            version, modified_at = read_version()
+        except Exception as e:
+            print(f"Catalog version check error: {e}")
+            return
+        if version != self._version:
+            if self._version is not None:
+                self.clear()
+            self._version = version
+        self._modified_at = modified_at
+
+    def validator(self):
+        """(version, last changed) of the shared catalog, or (None, None) if unknown"""
+        self._check_version()
+        return self._version, self._modified_at
+
+    def invalidate(self):
+        """Clear this worker's cache and bump the shared version for the others"""
+        self.clear()
+        try:
+            bump_catalog_version()
+            self._version, self._modified_at = read_version()
+            self._version_checked_at = time.monotonic()
+        except Exception as e:
+            print(f"Catalog version bump error: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            snapshot = dict(self.stats)
+            snapshot.update({
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'version': self._version
+            })
+        return snapshot
+
+def read_version(key=VERSION_KEY):
+    """Read a shared version counter (the catalog's by default) and when it last changed"""
+    result = execute_query(
+        "SELECT setting_value, updated_at FROM site_settings WHERE setting_key = %s",
+        (key,), fetch_one=True
+    )
+    if not result or not result.get('setting_value'):
+        return 0, None
+    value = result['setting_value']
+    value = json.loads(value) if isinstance(value, str) else value
+    return value.get('version', 0), result.get('updated_at')
+
+def bump_catalog_version(key=VERSION_KEY):
+    """Increment a shared version counter (the catalog's by default)"""
+    execute_query("""
+        INSERT INTO site_settings (setting_key, setting_value) VALUES (%s, JSON_OBJECT('version', 1))
+        ON DUPLICATE KEY UPDATE setting_value = JSON_OBJECT('version', JSON_EXTRACT(setting_value, '$.version') + 1)
+    """, (key,))
+
+catalog_cache = CatalogCache(**CACHE_CONFIG)
+
+def cached(name):
+    """Decorator caching a catalog read, keyed by name and positional args
+
+    Cached values are shared between requests and must be treated as read-only.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args):
+            return catalog_cache.get_or_load((name,) + args, lambda: f(*args))
+        return wrapper
+    return decorator
+
+def invalidate_catalog():
+    """Invalidate cached catalog reads in every worker"""
+    catalog_cache.invalidate()
+
+def get_catalog_cache_stats():
+    """Get hit/miss counters and size of the catalog cache"""
+    return catalog_cache.get_stats()
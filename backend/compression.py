@@ -0,0 +1,101 @@
+"""
+Response compression (brotli / gzip)
+
+An after_request hook compresses text and JSON responses of at least
+COMPRESS_MIN_SIZE bytes with the best encoding the client accepts: brotli
+when the Brotli package is installed, otherwise gzip. Streamed responses
+(admin exports) and files sent from disk are left alone.
+
+Responses with a strong ETag (catalog, homepage and settings reads, see
+http_cache.py) have the same body for the same URL and ETag, so their
+compressed variants are kept in the catalog cache and reused instead of
+being recompressed on every request. A compressed variant's ETag gets the
+encoding appended ("catalog12-gzip"), and http_cache accepts it back in
+If-None-Match.
+"""
+import gzip
+import os
+import threading
+from flask import request
+from catalog_cache import catalog_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_CONFIG = {
+    'enabled': os.getenv('COMPRESS_RESPONSES', 'true').lower() == 'true',
+    'min_size': int(os.getenv('COMPRESS_MIN_SIZE', 1024)),
+    'gzip_level': int(os.getenv('COMPRESS_GZIP_LEVEL', 6)),
+    'brotli_quality': int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))
+}
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'text/html', 'text/plain', 'text/csv', 'text/css'
+}
+
+_stats_lock = threading.Lock()
+_stats = {'compressed': 0, 'bytes_in': 0, 'bytes_out': 0, 'skipped_small': 0}
+
+def negotiate_encoding(accept_encodings):
+    """'br', 'gzip' or None for a request's Accept-Encoding"""
+    if brotli and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=COMPRESSION_CONFIG['brotli_quality'])
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=COMPRESSION_CONFIG['gzip_level'], mtime=0)
+
+def compress_response(response):
+    """after_request hook: compress the body if it is worth it and the client accepts it"""
+    # 304s need Vary too: their ETag names the encoded variant ("catalog7-gzip")
+    if response.status_code == 304 or response.mimetype in COMPRESSIBLE_MIMETYPES:
+        response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    encoding = negotiate_encoding(request.accept_encodings)
+    if not encoding:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESSION_CONFIG['min_size']:
+        with _stats_lock:
+            _stats['skipped_small'] += 1
+        return response
+
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        key = ('compressed', request.full_path, etag, encoding)
+        compressed = catalog_cache.get_or_load(key, lambda: compress(data, encoding))
+        response.set_etag(f"{etag}-{encoding}")
+    else:
+        compressed = compress(data, encoding)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    with _stats_lock:
+        _stats['compressed'] += 1
+        _stats['bytes_in'] += len(data)
+        _stats['bytes_out'] += len(compressed)
+    return response
+
+def init_compression(app):
+    """Register the compression hook on a Flask app (no-op when COMPRESS_RESPONSES=false)"""
+    if COMPRESSION_CONFIG['enabled']:
+        app.after_request(compress_response)
+
+def get_compression_stats():
+    """Responses compressed and bytes saved by this worker"""
+    with _stats_lock:
+        snapshot = dict(_stats)
+    snapshot['ratio'] = round(snapshot['bytes_out'] / snapshot['bytes_in'], 3) if snapshot['bytes_in'] else None
+    snapshot['encodings'] = ['br', 'gzip'] if brotli else ['gzip']
+    return snapshot
@@ -2,8 +2,12 @@
 Database configuration and connection utilities for MySQL
 """
 import mysql.connector
-from mysql.connector import pooling
+from mysql.connector import errors
 import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,6 +21,189 @@ DB_CONFIG = {
     'autocommit': True
 }
 
+# Pool configuration
+POOL_CONFIG = {
+    'size': int(os.getenv('DB_POOL_SIZE', 10)),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),  # Max seconds to wait for a free connection
+    'recycle': int(os.getenv('DB_POOL_RECYCLE', 3600)),  # Reopen connections older than this
+    'ping_after': int(os.getenv('DB_POOL_PING_AFTER', 30)),  # Ping connections idle longer than this
+    'prewarm': int(os.getenv('DB_POOL_PREWARM', 2))  # Connections opened at startup
+}
+
+# ==================== CONNECTION POOL ====================
+
+class PooledConnection:
+    """Proxy around a raw connection; close() hands it back to the pool"""
+
+    def __init__(self, pool, conn, created_at):
+        self._pool = pool
+        self._conn = conn
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            self._pool._release(self._conn, self._created_at)
+            self._conn = None
+
+    def discard(self):
+        """Close the underlying connection instead of returning it to the pool"""
+        if self._conn is not None:
+            self._pool._release(self._conn, self._created_at, healthy=False)
+            self._conn = None
+
+class ConnectionPool:
+    """Bounded MySQL connection pool
+
+    Checkouts wait up to `timeout` seconds for a free connection instead of
+    failing immediately. Connections are recycled after `recycle` seconds and
+    pinged when they have been idle longer than `ping_after` seconds.
+    """
+
+    def __init__(self, size, timeout, recycle, ping_after, **config):
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self.config = config
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, created_at, last_used)
+        self._opened = 0
+        self._in_use = 0
+        self._wait_times = deque(maxlen=1000)
+        self.stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'checkout_failures': 0,
+            'connections_created': 0,
+            'connections_recycled': 0
+        }
+
+    def _connect(self):
+        conn = mysql.connector.connect(**self.config)
+        with self._cond:
+            self.stats['connections_created'] += 1
+        return conn, time.monotonic()
+
+    def prewarm(self, count):
+        """Open up to `count` connections ahead of the first request"""
+        opened = []
+        with self._cond:
+            count = max(0, min(count, self.size - self._opened))
+            self._opened += count
+        try:
+            for _ in range(count):
+                opened.append(self._connect())
+        finally:
+            with self._cond:
+                self._opened -= count - len(opened)
+                now = time.monotonic()
+                for conn, created_at in opened:
+                    self._idle.append((conn, created_at, now))
+                self._cond.notify_all()
+        return len(opened)
+
+    def get_connection(self, timeout=None):
+        """Check out a connection, waiting up to `timeout` seconds"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+        entry = None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._opened < self.size:
+                    self._opened += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats['checkout_failures'] += 1
+                    raise errors.PoolError(
+                        f"No connection available within {timeout}s (pool size {self.size})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+            self._in_use += 1
+            self.stats['checkouts'] += 1
+            if waited:
+                self.stats['waits'] += 1
+                self._wait_times.append(time.monotonic() - started)
+
+        # Connect / recycle / ping outside the lock
+        try:
+            conn, created_at = self._prepare(entry)
+        except Exception:
+            with self._cond:
+                self._opened -= 1
+                self._in_use -= 1
+                self.stats['checkout_failures'] += 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, conn, created_at)
+
+    def _prepare(self, entry):
+        if entry is None:
+            return self._connect()
+        conn, created_at, last_used = entry
+        now = time.monotonic()
+        if now - created_at > self.recycle:
+            self._discard(conn)
+            with self._cond:
+                self.stats['connections_recycled'] += 1
+            return self._connect()
+        if now - last_used > self.ping_after:
+            conn.ping(reconnect=True, attempts=1, delay=0)
+        return conn, created_at
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _release(self, conn, created_at, healthy=True):
+        try:
+            if healthy and conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            healthy = False
+        if not healthy:
+            self._discard(conn)
+        with self._cond:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((conn, created_at, time.monotonic()))
+            else:
+                self._opened -= 1
+            self._cond.notify()
+
+    def get_stats(self):
+        """Snapshot of pool counters"""
+        with self._cond:
+            waits = sorted(self._wait_times)
+            snapshot = dict(self.stats)
+            snapshot.update({
+                'size': self.size,
+                'opened': self._opened,
+                'in_use': self._in_use,
+                'idle': len(self._idle)
+            })
+
+        def percentile(p):
+            if not waits:
+                return 0
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))] * 1000, 2)
+
+        snapshot['wait_ms_p50'] = percentile(0.50)
+        snapshot['wait_ms_p99'] = percentile(0.99)
+        return snapshot
+
 # Connection pool
 connection_pool = None
 
@@ -24,12 +211,15 @@ def init_pool():
     """Initialize the connection pool"""
     global connection_pool
     try:
-        connection_pool = pooling.MySQLConnectionPool(
-            pool_name="ecommerce_pool",
-            pool_size=5,
+        connection_pool = ConnectionPool(
+            POOL_CONFIG['size'],
+            POOL_CONFIG['timeout'],
+            POOL_CONFIG['recycle'],
+            POOL_CONFIG['ping_after'],
             **DB_CONFIG
         )
-        print("✅ Database connection pool created successfully")
+        warmed = connection_pool.prewarm(POOL_CONFIG['prewarm'])
+        print(f"✅ Database connection pool created successfully (size {POOL_CONFIG['size']}, {warmed} warm)")
         return True
     except Exception as e:
         print(f"❌ Failed to create connection pool: {e}")
@@ -42,275 +232,36 @@ def get_connection():
         init_pool()
     return connection_pool.get_connection()
 
+def get_pool_stats():
+    """Get live connection pool counters"""
+    if connection_pool is None:
+        return {'size': POOL_CONFIG['size'], 'opened': 0, 'in_use': 0, 'idle': 0}
+    return connection_pool.get_stats()
+
 def init_database():
-    """Initialize database tables"""
+    """Bring the database schema up to date
+
+    Applies pending migrations from migrations/ (see migrate.py). When the
+    schema is already at head this costs a single query. Set
+    DB_AUTO_MIGRATE=false to only report pending migrations and apply them
+    out-of-band with `python migrate.py up`.
+    """
     try:
-        # First connect without database to create it if needed
-        conn = mysql.connector.connect(
-            host=DB_CONFIG['host'],
-            user=DB_CONFIG['user'],
-            password=DB_CONFIG['password']
-        )
-        cursor = conn.cursor()
-        
-        # Create database if not exists
-        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['database']}")
-        cursor.execute(f"USE {DB_CONFIG['database']}")
-        
-        # Create users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                first_name VARCHAR(100) NOT NULL,
-                last_name VARCHAR(100) NOT NULL,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                is_admin BOOLEAN DEFAULT FALSE,
-                is_verified BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Add is_verified column if not exists
-        cursor.execute("""
-            SELECT COUNT(*) as cnt FROM information_schema.columns 
-            WHERE table_schema = %s AND table_name = 'users' AND column_name = 'is_verified'
-        """, (DB_CONFIG['database'],))
-        result = cursor.fetchone()
-        if result and result[0] == 0:
-            cursor.execute("ALTER TABLE users ADD COLUMN is_verified BOOLEAN DEFAULT FALSE")
-        
-        # Create OTP codes table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS otp_codes (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                email VARCHAR(255) NOT NULL,
-                code VARCHAR(6) NOT NULL,
-                purpose ENUM('register', 'login', 'reset') DEFAULT 'register',
-                expires_at TIMESTAMP NOT NULL,
-                used BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Add profile columns if not exists
-        for column, definition in [('phone', 'VARCHAR(20)'), ('date_of_birth', 'DATE')]:
-            cursor.execute("""
-                SELECT COUNT(*) as cnt FROM information_schema.columns 
-                WHERE table_schema = %s AND table_name = 'users' AND column_name = %s
-            """, (DB_CONFIG['database'], column))
-            result = cursor.fetchone()
-            if result and result[0] == 0:
-                cursor.execute(f"ALTER TABLE users ADD COLUMN {column} {definition}")
-        
-        # Create products table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                description TEXT,
-                category VARCHAR(100) NOT NULL,
-                price DECIMAL(10, 2) NOT NULL,
-                stock INT DEFAULT 0,
-                status VARCHAR(50) DEFAULT 'Active',
-                image_url VARCHAR(500),
-                colors JSON,
-                sizes JSON,
-                gallery_images JSON,
-                video_url VARCHAR(500),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create orders table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS orders (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                customer_id INT NULL,
-                customer_name VARCHAR(200),
-                customer_email VARCHAR(255),
-                customer_phone VARCHAR(50),
-                total DECIMAL(10, 2) NOT NULL,
-                status VARCHAR(50) DEFAULT 'Pending',
-                items JSON NOT NULL,
-                shipping_address TEXT,
-                payment_method VARCHAR(50),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE SET NULL
-            )
-        """)
-        
-        # Add customer columns to orders if not exists
-        for column, definition in [
-            ('customer_name', 'VARCHAR(200)'), 
-            ('customer_email', 'VARCHAR(255)'), 
-            ('customer_phone', 'VARCHAR(50)'),
-            ('payment_id', 'VARCHAR(100)'),  # For Razorpay payment ID
-            ('completed_at', 'TIMESTAMP NULL')  # When order was completed/delivered
-        ]:
-            cursor.execute("""
-                SELECT COUNT(*) as cnt FROM information_schema.columns 
-                WHERE table_schema = %s AND table_name = 'orders' AND column_name = %s
-            """, (DB_CONFIG['database'], column))
-            result = cursor.fetchone()
-            if result and result[0] == 0:
-                cursor.execute(f"ALTER TABLE orders ADD COLUMN {column} {definition}")
-        
-        # Create categories table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS categories (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL UNIQUE,
-                description TEXT,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create site_settings table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS site_settings (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                setting_key VARCHAR(100) NOT NULL UNIQUE,
-                setting_value JSON NOT NULL,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create collections table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS collections (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                title VARCHAR(255) NOT NULL,
-                description TEXT,
-                cover_image VARCHAR(500),
-                format_type ENUM('short', 'long') DEFAULT 'short',
-                is_active BOOLEAN DEFAULT TRUE,
-                show_on_home BOOLEAN DEFAULT FALSE,
-                display_order INT DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create collection_products table (junction table)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS collection_products (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                collection_id INT NOT NULL,
-                product_id INT NOT NULL,
-                display_order INT DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (collection_id) REFERENCES collections(id) ON DELETE CASCADE,
-                FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
-                UNIQUE KEY unique_collection_product (collection_id, product_id)
-            )
-        """)
-        
-        # Add is_featured column to products if not exists
-        cursor.execute("""
-            SELECT COUNT(*) as cnt FROM information_schema.columns 
-            WHERE table_schema = %s AND table_name = 'products' AND column_name = 'is_featured'
-        """, (DB_CONFIG['database'],))
-        result = cursor.fetchone()
-        if result and result[0] == 0:
-            cursor.execute("ALTER TABLE products ADD COLUMN is_featured BOOLEAN DEFAULT FALSE")
-        
-        # Add faqs column to products if not exists
-        cursor.execute("""
-            SELECT COUNT(*) as cnt FROM information_schema.columns 
-            WHERE table_schema = %s AND table_name = 'products' AND column_name = 'faqs'
-        """, (DB_CONFIG['database'],))
-        result = cursor.fetchone()
-        if result and result[0] == 0:
-            cursor.execute("ALTER TABLE products ADD COLUMN faqs JSON")
-        
-        # Add related_products column to products if not exists
-        cursor.execute("""
-            SELECT COUNT(*) as cnt FROM information_schema.columns 
-            WHERE table_schema = %s AND table_name = 'products' AND column_name = 'related_products'
-        """, (DB_CONFIG['database'],))
-        result = cursor.fetchone()
-        if result and result[0] == 0:
-            cursor.execute("ALTER TABLE products ADD COLUMN related_products JSON")
-        
-        # Create coupons table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS coupons (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                code VARCHAR(50) NOT NULL UNIQUE,
-                discount_type ENUM('percentage', 'fixed') DEFAULT 'percentage',
-                discount_value DECIMAL(10, 2) NOT NULL,
-                min_order_amount DECIMAL(10, 2) DEFAULT 0,
-                max_uses INT DEFAULT NULL,
-                used_count INT DEFAULT 0,
-                expires_at TIMESTAMP NULL,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create reviews table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS reviews (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                product_id INT NOT NULL,
-                user_id INT NULL,
-                reviewer_name VARCHAR(100) NOT NULL,
-                rating INT NOT NULL CHECK (rating >= 1 AND rating <= 5),
-                review_text TEXT,
-                is_verified BOOLEAN DEFAULT FALSE,
-                is_admin_review BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
-            )
-        """)
-        
-        # Create contact_submissions table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS contact_submissions (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                first_name VARCHAR(100) NOT NULL,
-                last_name VARCHAR(100) NOT NULL,
-                email VARCHAR(255) NOT NULL,
-                subject VARCHAR(255) NOT NULL,
-                message TEXT NOT NULL,
-                status ENUM('new', 'read', 'replied', 'closed') DEFAULT 'new',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Insert default settings
-        cursor.execute("""
-            INSERT IGNORE INTO site_settings (setting_key, setting_value) VALUES 
-            ('sale_banner', '{"enabled": true, "text": "LIMITED TIME OFFER - UP TO 50% OFF", "end_date": "2025-12-31T23:59:59"}')
-        """)
-        cursor.execute("""
-            INSERT IGNORE INTO site_settings (setting_key, setting_value) VALUES 
-            ('featured_products', '{"product_ids": []}')
-        """)
-        cursor.execute("""
-            INSERT IGNORE INTO site_settings (setting_key, setting_value) VALUES 
-            ('hero_slides', '{"slides": [{"title": "New Season Arrivals", "subtitle": "Spring/Summer 2024", "description": "Discover our latest collection", "image": "/elegant-fashion-model-blue-tones.jpg", "cta": "Shop Now", "href": "/shop"}, {"title": "Exclusive Collection", "subtitle": "Limited Edition", "description": "Handcrafted pieces for the modern wardrobe", "image": "/luxury-fashion-store-sapphire-blue.jpg", "cta": "Explore", "href": "/shop"}, {"title": "Summer Sale", "subtitle": "Up to 50% Off", "description": "Dont miss our biggest sale of the season", "image": "/summer-fashion-collection-navy-blue-aesthetic.jpg", "cta": "Shop Sale", "href": "/shop"}], "recommended_size": "1920x1080"}')
-        """)
-        cursor.execute("""
-            INSERT IGNORE INTO site_settings (setting_key, setting_value) VALUES 
-            ('shop_the_look', '{"enabled": true, "title": "Shop The Look", "product_ids": []}')
-        """)
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        print("✅ Database tables initialized successfully")
-        return True
-        
+        from migrate import migrate_to_head
+        return migrate_to_head(auto_migrate=os.getenv('DB_AUTO_MIGRATE', 'true').lower() != 'false')
     except Exception as e:
-        print(f"❌ Failed to initialize database: {e}")
+        print(f"❌ Failed to initialize database (is MySQL running?): {e}")
         return False
 
-def execute_query(query, params=None, fetch_one=False, fetch_all=False):
-    """Execute a query and optionally fetch results"""
+def execute_query(query, params=None, fetch_one=False, fetch_all=False, tx=None):
+    """Execute a query and optionally fetch results
+
+    When a Transaction is passed as `tx` the statement runs on its pinned
+    connection and is committed together with the rest of the unit of work.
+    """
+    if tx is not None:
+        return tx.execute(query, params, fetch_one=fetch_one, fetch_all=fetch_all)
+
     conn = None
     cursor = None
     try:
@@ -338,3 +289,108 @@ def execute_query(query, params=None, fetch_one=False, fetch_all=False):
             cursor.close()
         if conn:
             conn.close()
+
+def execute_update(query, params=None, tx=None):
+    """Execute an INSERT/UPDATE/DELETE and return the number of affected rows"""
+    if tx is not None:
+        tx.execute(query, params)
+        return tx.cursor.rowcount
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(query, params or ())
+        conn.commit()
+        return cursor.rowcount
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        raise e
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def stream_query(query, params=None, batch_size=500):
+    """Yield the result of a SELECT in lists of up to `batch_size` rows
+
+    Uses an unbuffered cursor so rows are pulled from the server as they are
+    consumed instead of being materialized in memory. The pooled connection
+    is held until the generator is exhausted or closed; a connection left
+    with unread rows (e.g. the client went away mid-export) is discarded.
+    """
+    conn = get_connection()
+    cursor = None
+    finished = False
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(query, params or ())
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+        finished = True
+    finally:
+        if finished:
+            cursor.close()
+            conn.close()
+        else:
+            conn.discard()
+
+# ==================== UNIT OF WORK ====================
+
+class Transaction:
+    """A unit of work pinned to a single pooled connection
+
+    Statements run through `execute` share one connection and are committed
+    (or rolled back) once, when the surrounding `transaction()` block exits.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        # Buffered so a fetch_one never leaves unread rows on the shared cursor
+        self.cursor = conn.cursor(dictionary=True, buffered=True)
+
+    def execute(self, query, params=None, fetch_one=False, fetch_all=False):
+        """Execute a query inside the transaction, same contract as execute_query"""
+        self.cursor.execute(query, params or ())
+        if fetch_one:
+            return self.cursor.fetchone()
+        if fetch_all:
+            return self.cursor.fetchall()
+        return self.cursor.lastrowid
+
+    def close(self):
+        self.cursor.close()
+
+@contextmanager
+def transaction():
+    """Run several statements on one connection with a single commit/rollback
+
+    Usage:
+        with transaction() as tx:
+            user_id = execute_query(insert_user, params, tx=tx)
+            create_order(user_id, ..., tx=tx)
+    """
+    conn = get_connection()
+    tx = None
+    try:
+        conn.start_transaction()
+        tx = Transaction(conn)
+        yield tx
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if tx:
+            tx.close()
+        conn.close()
+
+def unit_of_work(tx=None):
+    """Join the caller's transaction if given, otherwise start a new one"""
+    return nullcontext(tx) if tx is not None else transaction()
@@ -0,0 +1,194 @@
+"""
+EXPLAIN-based check for full table scans in the backend's queries
+
+Collects every SELECT/UPDATE/DELETE statement in the modules that talk to
+MySQL: string literals and module-level query constants as written, and
+f-string queries with their fields filled from SAMPLE_BINDINGS (a
+representative filter, column list or placeholder run). Runs EXPLAIN for
+each against the configured database and fails when a plan does a full
+table scan (type ALL) over more than --max-rows estimated rows.
+
+Run it against a local database loaded with realistic data:
+    python explain_check.py --max-rows 1000
+"""
+import argparse
+import ast
+import os
+import re
+import sys
+import mysql.connector
+from database import DB_CONFIG
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_SOURCES = [
+    os.path.join(BACKEND_DIR, name) for name in (
+        'models.py', 'auth_context.py', 'otp_store.py', 'settings_cache.py', 'catalog_cache.py',
+        'rollups.py', 'mailer.py', 'upload_jobs.py', 'media_assets.py'
+    )
+]
+
+# Listings that intentionally read the whole table (admin screens, full catalog,
+# exports and maintenance rebuilds)
+ALLOW_FULL_SCAN = {
+    'get_all_customers', 'get_all_products', 'get_all_orders', 'get_dashboard_stats',
+    'get_all_categories', 'get_active_categories', 'get_categories_with_subcategories',
+    'get_all_collections', 'get_all_coupons', 'get_all_reviews', 'get_all_contacts',
+    'TRANSACTIONS_QUERY', 'EXPORTS', 'get_rollup_totals', 'rebuild_daily_order_stats',
+    'recount_media_refs'
+}
+
+# Case-sensitive: SQL keywords are upper case, docstrings ("Update a product") are not
+STATEMENT = re.compile(r'^\s*(SELECT|UPDATE|DELETE)\b')
+
+# Stand-ins for the runtime-built parts of f-string queries, keyed by the field's source
+SAMPLE_BINDINGS = {
+    'placeholders': '%s, %s',
+    'where': 'WHERE category = %s AND status = %s',
+    'sort_column': 'created_at',
+    'direction': 'DESC',
+    'cursor_condition': 'AND (created_at < %s OR (created_at = %s AND id < %s))',
+    'branch_limit': 'LIMIT %s',
+    "' UNION '.join(branches)": (
+        '(SELECT id FROM orders WHERE customer_id = %s ORDER BY created_at DESC, id DESC LIMIT %s)'
+        ' UNION '
+        '(SELECT id FROM orders WHERE customer_email = %s ORDER BY created_at DESC, id DESC LIMIT %s)'
+    ),
+    "', '.join(update_fields)": 'name = %s, stock = %s',
+    "', '.join(updates)": 'name = %s',
+    "', '.join(fields)": 'is_active = %s',
+    'period': 'stat_date'
+}
+
+def _docstrings(tree):
+    """ids of the docstring constants of the module, its classes and functions"""
+    ids = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) and node.body:
+            first = node.body[0]
+            if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant):
+                ids.add(id(first.value))
+    return ids
+
+def _module_constants(tree):
+    """Module-level NAME = "..." assignments, used to fill f-string fields"""
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    constants[target.id] = node.value.value
+    return constants
+
+def _scopes(body, prefix=''):
+    """(name, node) for each function, method and module-level assignment"""
+    for node in body:
+        if isinstance(node, ast.ClassDef):
+            yield from _scopes(node.body, f"{prefix}{node.name}.")
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield prefix + node.name, node
+        elif isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name):
+            yield prefix + node.targets[0].id, node
+
+def render(node, constants):
+    """SQL text of a string expression with sample bindings filled in (None if a field has none)"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        parts = [render(part, constants) for part in node.values]
+        return None if None in parts else ''.join(parts)
+    if isinstance(node, ast.FormattedValue):
+        return render(node.value, constants)
+    if isinstance(node, ast.IfExp):
+        return render(node.body, constants)
+    if isinstance(node, ast.Name) and node.id in constants:
+        return constants[node.id]
+    return SAMPLE_BINDINGS.get(ast.unparse(node))
+
+def collect_queries(path):
+    """Yield (scope, line, sql) for the query statements in a module
+
+    sql is None for an f-string query with a field SAMPLE_BINDINGS doesn't cover.
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+    skip = _docstrings(tree)
+    constants = _module_constants(tree)
+    for scope, scope_node in _scopes(tree.body):
+        # Literal pieces of f-strings are planned as part of the whole f-string
+        fragments = {id(part) for node in ast.walk(scope_node) if isinstance(node, ast.JoinedStr) for part in node.values}
+        for node in ast.walk(scope_node):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                if id(node) not in skip and id(node) not in fragments and STATEMENT.match(node.value):
+                    yield scope, node.lineno, node.value
+            elif isinstance(node, ast.JoinedStr) and id(node) not in fragments:
+                head = node.values[0] if node.values else None
+                if isinstance(head, ast.Constant) and STATEMENT.match(head.value):
+                    yield scope, node.lineno, render(node, constants)
+
+def bind_placeholders(sql):
+    """Replace %s placeholders with literals EXPLAIN can plan against"""
+    sql = re.sub(r'LIMIT\s+%s', 'LIMIT 1', sql, flags=re.IGNORECASE)
+    # A quoted constant still lets MySQL use indexes on both INT and VARCHAR columns
+    return sql.replace('%s', "'1'")
+
+def explain(cursor, sql):
+    cursor.execute(f"EXPLAIN {bind_placeholders(sql)}")
+    return cursor.fetchall()
+
+def check(sources, max_rows, allow):
+    conn = mysql.connector.connect(
+        host=DB_CONFIG['host'],
+        user=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        database=DB_CONFIG['database']
+    )
+    cursor = conn.cursor(dictionary=True)
+    failures = 0
+    errors = 0
+    try:
+        for path in sources:
+            for scope, line, sql in collect_queries(path):
+                location = f"{os.path.basename(path)}:{line} {scope}"
+                if sql is None:
+                    errors += 1
+                    print(f"ERROR {location}: f-string field without a SAMPLE_BINDINGS entry")
+                    continue
+                try:
+                    plan = explain(cursor, sql)
+                except mysql.connector.Error as e:
+                    errors += 1
+                    print(f"ERROR {location}: {e}")
+                    continue
+                for row in plan:
+                    rows = row.get('rows') or 0
+                    if row.get('type') == 'ALL' and rows > max_rows:
+                        if scope in allow:
+                            print(f"allow {location}: full scan of {row.get('table')} (~{rows} rows)")
+                        else:
+                            failures += 1
+                            print(f"FAIL  {location}: full scan of {row.get('table')} (~{rows} rows)")
+    finally:
+        cursor.close()
+        conn.close()
+    return failures, errors
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail on full table scans in model queries")
+    parser.add_argument('--max-rows', type=int, default=int(os.getenv('EXPLAIN_MAX_SCAN_ROWS', 1000)),
+                        help="largest full table scan (estimated rows) that is tolerated")
+    parser.add_argument('--source', action='append', help="module to scan (default: every module that queries MySQL)")
+    parser.add_argument('--allow', action='append', default=[], help="function or query constant allowed to scan")
+    parser.add_argument('--strict', action='store_true', help="ignore the built-in allow list")
+    args = parser.parse_args(argv)
+
+    allow = set(args.allow) if args.strict else ALLOW_FULL_SCAN | set(args.allow)
+    failures, errors = check(args.source or DEFAULT_SOURCES, args.max_rows, allow)
+    if failures or errors:
+        print(f"❌ {failures} full scan(s) over {args.max_rows} rows, {errors} query error(s)")
+        return 1
+    print(f"✅ No full table scans over {args.max_rows} rows")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
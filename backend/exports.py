@@ -0,0 +1,60 @@
+"""
+Streaming serializers for admin exports (NDJSON and CSV)
+
+Each serializer consumes batches of row dicts (see models.stream_export)
+and yields one text chunk per batch, so a response body never holds more
+than one batch in memory.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+def _csv_value(value):
+    """Flatten a value into a single CSV cell"""
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_default)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def ndjson_chunks(batches):
+    """One JSON object per line"""
+    for rows in batches:
+        yield ''.join(json.dumps(row, default=_default) + '\n' for row in rows)
+
+def csv_chunks(batches):
+    """Header row taken from the first row's columns, then one line per row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    for rows in batches:
+        if not header_written:
+            writer.writerow(rows[0].keys())
+            header_written = True
+        for row in rows:
+            writer.writerow([_csv_value(v) for v in row.values()])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+def serialize(batches, fmt):
+    """Yield text chunks for the given export format"""
+    if fmt == 'csv':
+        return csv_chunks(batches)
+    return ndjson_chunks(batches)
@@ -0,0 +1,56 @@
+"""
+Gunicorn configuration
+
+    gunicorn -c gunicorn.conf.py "app:create_app()"
+
+The app is preloaded in the master, so create_app() runs migrations once.
+Each worker then starts its own connection pool, mail threads and warm
+caches in post_fork, before it accepts requests.
+
+Sizing (all overridable from the environment):
+    workers  WEB_CONCURRENCY, default 2 x CPUs + 1, capped so that
+             workers x DB_POOL_SIZE stays within DB_MAX_CONNECTIONS
+    threads  GUNICORN_THREADS, default DB_POOL_SIZE: one pooled connection
+             per request thread, so threads never queue on the pool
+    class    GUNICORN_WORKER_CLASS, gthread (default) or gevent. gevent needs
+             `pip install gevent`, and bcrypt hashing blocks its event loop,
+             so prefer gthread unless most time is spent waiting on I/O.
+"""
+import multiprocessing
+import os
+
+_pool_size = int(os.getenv('DB_POOL_SIZE', 10))
+_max_db_connections = int(os.getenv('DB_MAX_CONNECTIONS', 150))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv(
+    'WEB_CONCURRENCY',
+    max(1, min(multiprocessing.cpu_count() * 2 + 1, _max_db_connections // _pool_size))
+))
+threads = int(os.getenv('GUNICORN_THREADS', _pool_size))
+# gevent only: concurrent requests per worker (they still share DB_POOL_SIZE connections)
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', _pool_size * 10))
+
+preload_app = True
+
+# Recycle workers periodically; the jitter keeps them from restarting together
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Video uploads (up to 100MB) are spooled to disk inside the request
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+accesslog = '-'
+errorlog = '-'
+
+def when_ready(server):
+    server.log.info(f"{workers} x {worker_class} workers, {threads} threads, DB pool {_pool_size} per worker")
+
+def post_fork(server, worker):
+    # Pools and threads created in the master would be shared by every worker
+    from app import init_worker
+    init_worker()
@@ -0,0 +1,108 @@
+"""
+HTTP validators and Cache-Control for public read endpoints
+
+Catalog and settings responses are versioned by the shared counters their
+caches already track (catalog_version / settings_version in site_settings),
+so the ETag and Last-Modified are known before the view runs. A matching
+If-None-Match (or If-Modified-Since) gets a 304 without querying or
+serializing anything.
+
+Cache-Control makes browsers revalidate on every use (max-age=0,
+must-revalidate), so an admin re-reading a list right after saving sees
+the change, while an unchanged response still costs only a 304. A CDN in
+front of the app can be allowed to serve responses for
+HTTP_CACHE_CDN_MAX_AGE seconds (s-maxage, shared caches only); edits then
+reach visitors behind the CDN after at most that long.
+
+Error fallbacks that answer 200 with default data are marked no-store
+(see no_store) and get no validators.
+
+Last-Modified comes from the version row's updated_at, which is assumed to
+be UTC (the MySQL session time zone).
+"""
+import os
+from datetime import timezone
+from functools import wraps
+from flask import Response, make_response, request
+from catalog_cache import catalog_cache
+from settings_cache import settings_cache
+
+HTTP_CACHE_CONFIG = {
+    'cdn_max_age': int(os.getenv('HTTP_CACHE_CDN_MAX_AGE', 0))
+}
+
+# Compressed responses carry the encoding as an ETag suffix (see compression.py)
+ETAG_ENCODING_SUFFIXES = ('', '-br', '-gzip')
+
+VALIDATORS = {
+    'catalog': catalog_cache.validator,
+    'settings': settings_cache.validator
+}
+
+def cache_control(response):
+    """Let clients store a response but revalidate it (by ETag) before each use"""
+    value = 'max-age=0, must-revalidate'
+    if HTTP_CACHE_CONFIG['cdn_max_age']:
+        value += f", s-maxage={HTTP_CACHE_CONFIG['cdn_max_age']}"
+    response.headers['Cache-Control'] = value
+    return response
+
+def no_store(response):
+    """Keep a response (e.g. a fallback served while the database is down) out of every cache"""
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def _validators(scopes):
+    """(etag, last modified) for the given scopes, or (None, None) while a version is unknown"""
+    etag_parts = []
+    modified_at = None
+    for scope in scopes:
+        version, changed = VALIDATORS[scope]()
+        if version is None:
+            return None, None
+        etag_parts.append(f"{scope}{version}")
+        if changed:
+            changed = changed.replace(tzinfo=timezone.utc) if changed.tzinfo is None else changed
+            modified_at = max(modified_at, changed) if modified_at else changed
+    return '-'.join(etag_parts), modified_at
+
+def matching_etag(etag):
+    """The variant of etag (plain or compressed) named in If-None-Match, if any"""
+    for suffix in ETAG_ENCODING_SUFFIXES:
+        if request.if_none_match.contains(etag + suffix):
+            return etag + suffix
+    return None
+
+def _not_modified(etag, modified_at):
+    """The ETag to answer a 304 with, or None if the client's copy is stale"""
+    if request.if_none_match:
+        return matching_etag(etag)
+    if modified_at and request.if_modified_since and request.if_modified_since >= modified_at:
+        return etag
+    return None
+
+def conditional(*scopes):
+    """Decorator: ETag/Last-Modified from the scopes' versions, 304 when unchanged
+
+    Only 200 responses get validators and Cache-Control; errors and
+    no-store fallbacks pass through.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            etag, modified_at = _validators(scopes)
+            if etag is None:
+                return f(*args, **kwargs)
+            matched = _not_modified(etag, modified_at)
+            if matched:
+                response = Response(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200 or response.cache_control.no_store:
+                    return response
+            response.set_etag(matched or etag)
+            if modified_at:
+                response.last_modified = modified_at
+            return cache_control(response)
+        return wrapper
+    return decorator
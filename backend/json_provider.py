@@ -0,0 +1,59 @@
+"""
+JSON provider for Flask's jsonify / app.json
+
+Serializes straight from database rows: DECIMAL values become numbers and
+date/datetime values ISO 8601 strings (naive datetimes are marked UTC), so
+models don't need per-row conversion loops before returning.
+
+Uses orjson when it is installed and the stdlib encoder otherwise, with
+the same output rules either way. Compare the two with
+benchmarks/bench_json_provider.py.
+"""
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value):
+    """Types neither encoder handles natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _stdlib_default(value):
+    if isinstance(value, datetime):
+        return (value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return _default(value)
+
+class FastJSONProvider(JSONProvider):
+    """orjson-backed provider (stdlib fallback)"""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def dumps_bytes(self, obj):
+        if orjson:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(obj, default=_stdlib_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson:
+            return orjson.loads(s)
+        return json.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand the encoded bytes to the response without a str round trip
+        return self._app.response_class(self.dumps_bytes(self._prepare_response_obj(args, kwargs)), mimetype=self.mimetype)
@@ -0,0 +1,269 @@
+"""
+Outbound email delivery through a database-backed queue
+
+enqueue_email() writes the message to email_outbox and returns right away.
+MAIL_WORKERS background threads per process claim due rows in batches,
+send them over an SMTP session that stays logged in between messages, and
+reschedule failures with exponential backoff until MAIL_MAX_ATTEMPTS.
+
+Message bodies (which include OTP codes) are cleared once a row is sent or
+has permanently failed, and those rows are deleted after
+MAIL_RETENTION_DAYS by whichever worker runs the hourly purge first.
+
+Local testing without a real mail server:
+    python smtp_debug_server.py --port 1025
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_STARTTLS=false
+"""
+import os
+import smtplib
+import socket
+import threading
+import time
+from collections import deque
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from database import execute_query, execute_update
+
+MAIL_CONFIG = {
+    'host': os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+    'port': int(os.getenv('SMTP_PORT', 587)),
+    'user': os.getenv('SMTP_USER'),
+    'password': os.getenv('SMTP_PASSWORD'),
+    'from_name': os.getenv('SMTP_FROM_NAME', 'Vurel Store'),
+    'starttls': os.getenv('SMTP_STARTTLS', 'true').lower() != 'false',
+    'timeout': float(os.getenv('SMTP_TIMEOUT', 15)),
+    'idle_timeout': float(os.getenv('SMTP_IDLE_TIMEOUT', 60)),  # Close SMTP sessions idle longer than this
+    'workers': int(os.getenv('MAIL_WORKERS', 2)),
+    'batch_size': int(os.getenv('MAIL_BATCH_SIZE', 20)),
+    'max_attempts': int(os.getenv('MAIL_MAX_ATTEMPTS', 5)),
+    'retry_base': int(os.getenv('MAIL_RETRY_BASE', 30)),  # Seconds before the first retry, doubled per attempt
+    'poll_interval': float(os.getenv('MAIL_POLL_INTERVAL', 5)),
+    'lock_timeout': int(os.getenv('MAIL_LOCK_TIMEOUT', 600)),  # Reclaim rows a dead worker left in 'sending'
+    'retention_days': int(os.getenv('MAIL_RETENTION_DAYS', 7)),  # Keep sent/failed rows this long
+    'purge_interval': int(os.getenv('MAIL_PURGE_INTERVAL', 3600)),
+    'purge_batch': int(os.getenv('MAIL_PURGE_BATCH', 1000))
+}
+
+def mail_configured():
+    password = MAIL_CONFIG['password']
+    return bool(MAIL_CONFIG['user'] and password and password != 'your-app-password')
+
+class SMTPSession:
+    """An authenticated SMTP connection reused across messages"""
+
+    def __init__(self, mailer):
+        self.mailer = mailer
+        self.config = mailer.config
+        self._server = None
+        self._last_used = 0
+
+    def _open(self):
+        server = smtplib.SMTP(self.config['host'], self.config['port'], timeout=self.config['timeout'])
+        try:
+            if self.config['starttls']:
+                server.starttls()
+            server.login(self.config['user'], self.config['password'])
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        self.mailer._count('smtp_connects')
+
+    def send(self, to_email, message):
+        reused = self._server is not None
+        if self._server is None:
+            self._open()
+        try:
+            self._server.sendmail(self.config['user'], to_email, message)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self.close()
+            if not reused:
+                raise
+            # The server dropped an idle session; reconnect once before giving up
+            self._open()
+            self._server.sendmail(self.config['user'], to_email, message)
+        self._last_used = time.monotonic()
+
+    def close_if_idle(self):
+        if self._server is not None and time.monotonic() - self._last_used > self.config['idle_timeout']:
+            self.close()
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                self._server.close()
+            self._server = None
+
+class Mailer:
+    """Queue writer plus the per-process delivery worker threads"""
+
+    def __init__(self, config):
+        self.config = config
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._send_times = deque(maxlen=1000)
+        self._next_purge = 0
+        self.stats = {
+            'enqueued': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'batches': 0, 'smtp_connects': 0, 'purged': 0
+        }
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def enqueue(self, to_email, subject, html_body):
+        """Store a message for delivery and wake a worker"""
+        message_id = execute_query(
+            "INSERT INTO email_outbox (to_email, subject, html_body) VALUES (%s, %s, %s)",
+            (to_email, subject, html_body)
+        )
+        self._count('enqueued')
+        self.start()
+        self._wake.set()
+        return message_id
+
+    def start(self):
+        """Start the worker threads once per process (also after a fork)"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        for i in range(self.config['workers']):
+            worker_id = f"{socket.gethostname()}:{os.getpid()}:{i}"
+            threading.Thread(target=self._run, args=(worker_id,), name=f"mailer-{i}", daemon=True).start()
+
+    def _run(self, worker_id):
+        session = SMTPSession(self)
+        while True:
+            try:
+                claimed = self._deliver_batch(worker_id, session)
+            except Exception as e:
+                print(f"❌ Mail worker error: {e}")
+                claimed = 0
+            if claimed < self.config['batch_size']:
+                self._purge_if_due()
+                if self._wake.wait(self.config['poll_interval']):
+                    self._wake.clear()
+                session.close_if_idle()
+
+    def _purge_if_due(self):
+        """Delete sent/failed rows past the retention window, at most once per purge_interval"""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_purge:
+                return
+            self._next_purge = now + self.config['purge_interval']
+        try:
+            while True:
+                deleted = execute_update("""
+                    DELETE FROM email_outbox
+                    WHERE status IN ('sent', 'failed') AND created_at < NOW() - INTERVAL %s DAY
+                    LIMIT %s
+                """, (self.config['retention_days'], self.config['purge_batch']))
+                self._count('purged', deleted)
+                if deleted < self.config['purge_batch']:
+                    break
+        except Exception as e:
+            print(f"❌ Email outbox purge failed: {e}")
+
+    def _claim(self, worker_id):
+        execute_query("""
+            UPDATE email_outbox SET status = 'sending', locked_by = %s, locked_at = NOW()
+            WHERE (status = 'pending' AND next_attempt_at <= NOW())
+               OR (status = 'sending' AND locked_at < NOW() - INTERVAL %s SECOND)
+            ORDER BY id
+            LIMIT %s
+        """, (worker_id, self.config['lock_timeout'], self.config['batch_size']))
+        return execute_query("""
+            SELECT id, to_email, subject, html_body, attempts FROM email_outbox
+            WHERE status = 'sending' AND locked_by = %s
+        """, (worker_id,), fetch_all=True)
+
+    def _build_message(self, row):
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = row['subject']
+        msg['From'] = f"{self.config['from_name']} <{self.config['user']}>"
+        msg['To'] = row['to_email']
+        msg.attach(MIMEText(row['html_body'], 'html'))
+        return msg.as_string()
+
+    def _deliver_batch(self, worker_id, session):
+        """Send one claimed batch; returns how many rows were claimed"""
+        rows = self._claim(worker_id)
+        if not rows:
+            return 0
+        self._count('batches')
+        sent_ids = []
+        for row in rows:
+            started = time.monotonic()
+            try:
+                session.send(row['to_email'], self._build_message(row))
+            except Exception as e:
+                self._reschedule(row, e)
+                continue
+            with self._lock:
+                self._send_times.append(time.monotonic() - started)
+            sent_ids.append(row['id'])
+
+        if sent_ids:
+            placeholders = ', '.join(['%s'] * len(sent_ids))
+            execute_query(f"""
+                UPDATE email_outbox SET status = 'sent', sent_at = NOW(), attempts = attempts + 1,
+                    locked_by = NULL, last_error = NULL, html_body = ''
+                WHERE id IN ({placeholders})
+            """, tuple(sent_ids))
+            self._count('sent', len(sent_ids))
+        return len(rows)
+
+    def _reschedule(self, row, error):
+        """Back off and retry, or give up after max_attempts"""
+        attempts = row['attempts'] + 1
+        if attempts >= self.config['max_attempts']:
+            execute_query("""
+                UPDATE email_outbox SET status = 'failed', attempts = %s, locked_by = NULL, last_error = %s,
+                    html_body = ''
+                WHERE id = %s
+            """, (attempts, str(error)[:1000], row['id']))
+            self._count('failed')
+            print(f"❌ Email to {row['to_email']} failed after {attempts} attempts: {error}")
+            return
+        delay = self.config['retry_base'] * 2 ** (attempts - 1)
+        execute_query("""
+            UPDATE email_outbox SET status = 'pending', attempts = %s, locked_by = NULL, last_error = %s,
+                next_attempt_at = NOW() + INTERVAL %s SECOND
+            WHERE id = %s
+        """, (attempts, str(error)[:1000], delay, row['id']))
+        self._count('retried')
+        print(f"⚠️  Email to {row['to_email']} failed (attempt {attempts}), retrying in {delay}s: {error}")
+
+    def get_stats(self):
+        with self._lock:
+            times = sorted(self._send_times)
+            snapshot = dict(self.stats)
+        snapshot['workers'] = self.config['workers']
+        snapshot['send_ms_p50'] = round(times[int(len(times) * 0.50)] * 1000, 2) if times else 0
+        snapshot['send_ms_p99'] = round(times[min(len(times) - 1, int(len(times) * 0.99))] * 1000, 2) if times else 0
+        rows = execute_query("SELECT status, COUNT(*) as count FROM email_outbox GROUP BY status", fetch_all=True)
+        snapshot['queue'] = {row['status']: row['count'] for row in rows}
+        return snapshot
+
+mailer = Mailer(MAIL_CONFIG)
+
+def enqueue_email(to_email, subject, html_body):
+    """Queue an email for background delivery; returns False when SMTP isn't configured"""
+    if not mail_configured():
+        return False
+    mailer.enqueue(to_email, subject, html_body)
+    return True
+
+def start_mail_workers():
+    """Start delivery threads so a backlog left by a previous run drains without new mail"""
+    if mail_configured():
+        mailer.start()
+
+def get_mail_stats():
+    """Get delivery counters and queue depth by status"""
+    return mailer.get_stats()
@@ -0,0 +1,164 @@
+"""
+Content-addressed registry of uploaded media
+
+Every uploaded file is hashed (SHA-256, streamed in chunks) and recorded in
+media_assets with the URL storage returned for it. Uploading the same bytes
+again returns the stored asset without another upload.
+
+ref_count tracks how many products use an asset (image_url, video_url,
+gallery_images). Assets that drop to zero are candidates for cleanup:
+
+    python media_assets.py recount            # rebuild ref_count from products
+    python media_assets.py orphans --days 7   # list unreferenced assets
+    python media_assets.py cleanup --days 7   # delete them from storage too
+"""
+import argparse
+import hashlib
+import sys
+from database import execute_query, execute_update
+from row_decoder import json_loads
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+def sha256_stream(fileobj):
+    """Hash a seekable file object in chunks and rewind it; returns (hex digest, size)"""
+    digest = hashlib.sha256()
+    size = 0
+    fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+def find_asset(sha256):
+    return execute_query(
+        "SELECT id, url, public_id, kind, width, height FROM media_assets WHERE sha256 = %s",
+        (sha256,), fetch_one=True
+    )
+
+def record_asset(sha256, kind, result, size):
+    """Remember an upload; a concurrent upload of the same bytes keeps the first URL"""
+    execute_query("""
+        INSERT INTO media_assets (sha256, kind, url, public_id, bytes, width, height)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE last_used_at = CURRENT_TIMESTAMP
+    """, (sha256, kind, result['secure_url'], result['public_id'], size, result.get('width'), result.get('height')))
+
+def upload_deduplicated(fileobj, upload, kind='image', **options):
+    """Upload through `upload` unless identical bytes were uploaded before
+
+    Returns the storage result dict with an added 'deduplicated' flag.
+    """
+    sha256, size = sha256_stream(fileobj)
+    asset = find_asset(sha256)
+    if asset:
+        execute_query("UPDATE media_assets SET last_used_at = CURRENT_TIMESTAMP WHERE id = %s", (asset['id'],))
+        return {
+            'secure_url': asset['url'],
+            'public_id': asset['public_id'],
+            'width': asset['width'],
+            'height': asset['height'],
+            'deduplicated': True
+        }
+    result = upload(fileobj, kind=kind, **options)
+    record_asset(sha256, kind, result, size)
+    result['deduplicated'] = False
+    return result
+
+# ==================== REFERENCE COUNTING ====================
+
+def product_media_urls(product):
+    """Distinct media URLs a product row (or update payload) refers to"""
+    if not product:
+        return set()
+    urls = {product.get('image_url'), product.get('video_url')}
+    gallery = product.get('gallery_images') or []
+    if isinstance(gallery, (str, bytes)):
+        gallery = json_loads(gallery)
+    # Gallery entries are {url, color} objects; older products stored bare URL strings
+    urls.update(entry.get('url') if isinstance(entry, dict) else entry for entry in gallery)
+    urls.discard(None)
+    urls.discard('')
+    return urls
+
+def _bump_refs(urls, delta):
+    if not urls:
+        return
+    placeholders = ', '.join(['%s'] * len(urls))
+    execute_query(
+        f"UPDATE media_assets SET ref_count = GREATEST(ref_count + %s, 0) WHERE url IN ({placeholders})",
+        (delta, *urls)
+    )
+
+def adjust_media_refs(old_urls, new_urls):
+    """Move reference counts from the URLs a product dropped to the ones it gained"""
+    old_urls, new_urls = set(old_urls), set(new_urls)
+    _bump_refs(new_urls - old_urls, 1)
+    _bump_refs(old_urls - new_urls, -1)
+
+def recount_media_refs():
+    """Rebuild every ref_count from the products table"""
+    counts = {}
+    products = execute_query("SELECT image_url, video_url, gallery_images FROM products", fetch_all=True)
+    for product in products:
+        for url in product_media_urls(product):
+            counts[url] = counts.get(url, 0) + 1
+    execute_query("UPDATE media_assets SET ref_count = 0")
+    for url, count in counts.items():
+        execute_query("UPDATE media_assets SET ref_count = %s WHERE url = %s", (count, url))
+    return len(counts)
+
+# ==================== CLEANUP ====================
+
+def find_orphans(min_age_days=7):
+    """Unreferenced assets not uploaded or reused within the last min_age_days"""
+    return execute_query("""
+        SELECT id, kind, url, public_id, bytes, last_used_at FROM media_assets
+        WHERE ref_count = 0 AND last_used_at < NOW() - INTERVAL %s DAY
+        ORDER BY last_used_at
+    """, (min_age_days,), fetch_all=True)
+
+def still_referenced(url):
+    """Last check before deleting: ref_count only covers products"""
+    result = execute_query("""
+        SELECT
+            (SELECT COUNT(*) FROM collections WHERE cover_image = %s) +
+            (SELECT COUNT(*) FROM site_settings WHERE setting_value LIKE %s) as refs
+    """, (url, f"%{url}%"), fetch_one=True)
+    return result['refs'] > 0
+
+def cleanup_orphans(min_age_days, storage):
+    """Delete orphaned assets from a storage backend (see storage.py) and forget them
+
+    Assets stored by another backend are left alone.
+    """
+    removed = 0
+    for asset in find_orphans(min_age_days):
+        if not storage.owns(asset['url']) or still_referenced(asset['url']):
+            continue
+        storage.destroy(asset['public_id'], asset['kind'])
+        removed += execute_update("DELETE FROM media_assets WHERE id = %s AND ref_count = 0", (asset['id'],))
+    return removed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Media asset reference counts and cleanup")
+    parser.add_argument('command', choices=['recount', 'orphans', 'cleanup'])
+    parser.add_argument('--days', type=int, default=7, help="only assets unused for this many days")
+    args = parser.parse_args(argv)
+
+    if args.command == 'recount':
+        print(f"✅ Recounted references for {recount_media_refs()} media URLs")
+    elif args.command == 'orphans':
+        for asset in find_orphans(args.days):
+            print(f"{asset['public_id']:<60} {asset['bytes'] or 0:>12} bytes  last used {asset['last_used_at']}")
+    else:
+        from storage import media_storage
+        print(f"✅ Removed {cleanup_orphans(args.days, media_storage)} orphaned assets")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
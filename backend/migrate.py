@@ -0,0 +1,193 @@
+"""
+Versioned schema migrations for the MySQL database
+
+Migrations live in migrations/ as NNNN_description.py modules exposing
+upgrade(cursor). Applied versions are recorded in schema_migrations, so at
+startup a single query tells whether the schema is already at head.
+
+Usage (from backend/):
+    python migrate.py status   # show applied and pending migrations
+    python migrate.py up       # apply pending migrations
+"""
+import argparse
+import importlib.util
+import os
+import re
+import sys
+import mysql.connector
+from database import DB_CONFIG
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.py$')
+LOCK_NAME = 'schema_migrations'
+LOCK_TIMEOUT = 60
+
+# ==================== MIGRATION HELPERS ====================
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = %s AND table_name = %s AND column_name = %s
+    """, (DB_CONFIG['database'], table, column))
+    return cursor.fetchone()[0] > 0
+
+def index_exists(cursor, table, index_name):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = %s AND table_name = %s AND index_name = %s
+    """, (DB_CONFIG['database'], table, index_name))
+    return cursor.fetchone()[0] > 0
+
+def add_column_if_missing(cursor, table, column, definition):
+    """Add a column unless a database set up by hand already has it"""
+    if not column_exists(cursor, table, column):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def create_index_if_missing(cursor, table, index_name, columns):
+    """Create an index unless a database set up by hand already has it"""
+    if not index_exists(cursor, table, index_name):
+        cursor.execute(f"CREATE INDEX {index_name} ON {table} ({columns})")
+
+# ==================== RUNNER ====================
+
+def discover_migrations():
+    """List (version, name, path) for every migration file, in order"""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    migrations.sort()
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Duplicate migration version numbers in migrations/")
+    return migrations
+
+def head_version():
+    migrations = discover_migrations()
+    return migrations[-1][0] if migrations else 0
+
+def load_migration(name, path):
+    spec = importlib.util.spec_from_file_location(f"migrations.{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _connect(with_database=True):
+    config = {
+        'host': DB_CONFIG['host'],
+        'user': DB_CONFIG['user'],
+        'password': DB_CONFIG['password']
+    }
+    if with_database:
+        config['database'] = DB_CONFIG['database']
+    return mysql.connector.connect(**config)
+
+def current_version():
+    """Highest applied version, or None when the database/table doesn't exist yet"""
+    conn = None
+    try:
+        conn = _connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT MAX(version) FROM schema_migrations")
+        row = cursor.fetchone()
+        cursor.close()
+        return row[0] or 0
+    except mysql.connector.errors.ProgrammingError:
+        # Unknown database or missing schema_migrations table
+        return None
+    finally:
+        if conn:
+            conn.close()
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def run_migrations(verbose=True):
+    """Create the database if needed and apply all pending migrations"""
+    conn = _connect(with_database=False)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['database']}")
+        cursor.execute(f"USE {DB_CONFIG['database']}")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Serialize concurrent runners (e.g. several workers starting at once)
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Timed out waiting for the schema migration lock")
+        try:
+            done = applied_versions(cursor)
+            applied = 0
+            for version, name, path in discover_migrations():
+                if version in done:
+                    continue
+                if verbose:
+                    print(f"⏳ Applying migration {version:04d}_{name}")
+                load_migration(name, path).upgrade(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, name)
+                )
+                conn.commit()
+                applied += 1
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cursor.fetchone()
+
+        if verbose:
+            print(f"✅ Database schema at version {head_version()} ({applied} migration(s) applied)")
+        return applied
+    finally:
+        cursor.close()
+        conn.close()
+
+def migrate_to_head(auto_migrate=True):
+    """Startup entry point: one query when already at head, otherwise migrate"""
+    head = head_version()
+    current = current_version()
+    if current is not None and current >= head:
+        print(f"✅ Database schema up to date (version {current})")
+        return True
+    if not auto_migrate:
+        print(f"⚠️  Database schema at version {current}, head is {head} - run `python migrate.py up`")
+        return False
+    run_migrations()
+    return True
+
+def print_status():
+    current = current_version()
+    done = set()
+    if current is not None:
+        conn = _connect()
+        cursor = conn.cursor()
+        done = applied_versions(cursor)
+        cursor.close()
+        conn.close()
+    for version, name, _ in discover_migrations():
+        state = 'applied' if version in done else 'pending'
+        print(f"{version:04d}_{name:<40} {state}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument('command', nargs='?', default='up', choices=['up', 'status'])
+    args = parser.parse_args(argv)
+    try:
+        if args.command == 'status':
+            print_status()
+        else:
+            run_migrations()
+        return 0
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
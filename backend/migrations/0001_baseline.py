@@ -0,0 +1,222 @@
+"""
+Baseline schema: every table, column and index init_database used to create
+
+Written defensively so it also applies to databases that were set up by the
+old probe-and-alter startup code or by database_schema.sql.
+"""
+from migrate import add_column_if_missing, create_index_if_missing
+
+def upgrade(cursor):
+    # Create users table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            first_name VARCHAR(100) NOT NULL,
+            last_name VARCHAR(100) NOT NULL,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            is_admin BOOLEAN DEFAULT FALSE,
+            is_verified BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Add is_verified column if not exists
+    add_column_if_missing(cursor, 'users', 'is_verified', 'BOOLEAN DEFAULT FALSE')
+    
+    # Create OTP codes table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS otp_codes (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            email VARCHAR(255) NOT NULL,
+            code VARCHAR(6) NOT NULL,
+            purpose ENUM('register', 'login', 'reset') DEFAULT 'register',
+            expires_at TIMESTAMP NOT NULL,
+            used BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Add profile columns if not exists
+    for column, definition in [('phone', 'VARCHAR(20)'), ('date_of_birth', 'DATE')]:
+        add_column_if_missing(cursor, 'users', column, definition)
+    
+    # Create products table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            category VARCHAR(100) NOT NULL,
+            price DECIMAL(10, 2) NOT NULL,
+            stock INT DEFAULT 0,
+            status VARCHAR(50) DEFAULT 'Active',
+            image_url VARCHAR(500),
+            colors JSON,
+            sizes JSON,
+            gallery_images JSON,
+            video_url VARCHAR(500),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create orders table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            customer_id INT NULL,
+            customer_name VARCHAR(200),
+            customer_email VARCHAR(255),
+            customer_phone VARCHAR(50),
+            total DECIMAL(10, 2) NOT NULL,
+            status VARCHAR(50) DEFAULT 'Pending',
+            items JSON NOT NULL,
+            shipping_address TEXT,
+            payment_method VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE SET NULL
+        )
+    """)
+    
+    # Add customer columns to orders if not exists
+    for column, definition in [
+        ('customer_name', 'VARCHAR(200)'), 
+        ('customer_email', 'VARCHAR(255)'), 
+        ('customer_phone', 'VARCHAR(50)'),
+        ('payment_id', 'VARCHAR(100)'),  # For Razorpay payment ID
+        ('completed_at', 'TIMESTAMP NULL')  # When order was completed/delivered
+    ]:
+        add_column_if_missing(cursor, 'orders', column, definition)
+    
+    # Create categories table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS categories (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL UNIQUE,
+            description TEXT,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create site_settings table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS site_settings (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            setting_key VARCHAR(100) NOT NULL UNIQUE,
+            setting_value JSON NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create collections table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS collections (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            description TEXT,
+            cover_image VARCHAR(500),
+            format_type ENUM('short', 'long') DEFAULT 'short',
+            is_active BOOLEAN DEFAULT TRUE,
+            show_on_home BOOLEAN DEFAULT FALSE,
+            display_order INT DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create collection_products table (junction table)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS collection_products (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            collection_id INT NOT NULL,
+            product_id INT NOT NULL,
+            display_order INT DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (collection_id) REFERENCES collections(id) ON DELETE CASCADE,
+            FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
+            UNIQUE KEY unique_collection_product (collection_id, product_id)
+        )
+    """)
+    
+    # Add is_featured column to products if not exists
+    add_column_if_missing(cursor, 'products', 'is_featured', 'BOOLEAN DEFAULT FALSE')
+    
+    # Add faqs column to products if not exists
+    add_column_if_missing(cursor, 'products', 'faqs', 'JSON')
+    
+    # Add related_products column to products if not exists
+    add_column_if_missing(cursor, 'products', 'related_products', 'JSON')
+    
+    # Add product listing indexes if not exists (keyset pagination and filters)
+    for index_name, columns in [
+        ('idx_products_created', 'created_at, id'),
+        ('idx_products_category_created', 'category, created_at, id'),
+        ('idx_products_status_created', 'status, created_at, id'),
+        ('idx_products_price', 'price, id')
+    ]:
+        create_index_if_missing(cursor, 'products', index_name, columns)
+    
+    # Create coupons table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS coupons (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            code VARCHAR(50) NOT NULL UNIQUE,
+            discount_type ENUM('percentage', 'fixed') DEFAULT 'percentage',
+            discount_value DECIMAL(10, 2) NOT NULL,
+            min_order_amount DECIMAL(10, 2) DEFAULT 0,
+            max_uses INT DEFAULT NULL,
+            used_count INT DEFAULT 0,
+            expires_at TIMESTAMP NULL,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create reviews table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS reviews (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            product_id INT NOT NULL,
+            user_id INT NULL,
+            reviewer_name VARCHAR(100) NOT NULL,
+            rating INT NOT NULL CHECK (rating >= 1 AND rating <= 5),
+            review_text TEXT,
+            is_verified BOOLEAN DEFAULT FALSE,
+            is_admin_review BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
+        )
+    """)
+    
+    # Create contact_submissions table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS contact_submissions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            first_name VARCHAR(100) NOT NULL,
+            last_name VARCHAR(100) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            subject VARCHAR(255) NOT NULL,
+            message TEXT NOT NULL,
+            status ENUM('new', 'read', 'replied', 'closed') DEFAULT 'new',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Insert default settings
+    cursor.execute("""
+        INSERT IGNORE INTO site_settings (setting_key, setting_value) VALUES 
+        ('sale_banner', '{"enabled": true, "text": "LIMITED TIME OFFER - UP TO 50% OFF", "end_date": "2025-12-31T23:59:59"}')
+    """)
+    cursor.execute("""
+        INSERT IGNORE INTO site_settings (setting_key, setting_value) VALUES 
+        ('featured_products', '{"product_ids": []}')
+    """)
+    cursor.execute("""
+        INSERT IGNORE INTO site_settings (setting_key, setting_value) VALUES 
+        ('hero_slides', '{"slides": [{"title": "New Season Arrivals", "subtitle": "Spring/Summer 2024", "description": "Discover our latest collection", "image": "/elegant-fashion-model-blue-tones.jpg", "cta": "Shop Now", "href": "/shop"}, {"title": "Exclusive Collection", "subtitle": "Limited Edition", "description": "Handcrafted pieces for the modern wardrobe", "image": "/luxury-fashion-store-sapphire-blue.jpg", "cta": "Explore", "href": "/shop"}, {"title": "Summer Sale", "subtitle": "Up to 50% Off", "description": "Dont miss our biggest sale of the season", "image": "/summer-fashion-collection-navy-blue-aesthetic.jpg", "cta": "Shop Sale", "href": "/shop"}], "recommended_size": "1920x1080"}')
+    """)
+    cursor.execute("""
+        INSERT IGNORE INTO site_settings (setting_key, setting_value) VALUES 
+        ('shop_the_look', '{"enabled": true, "title": "Shop The Look", "product_ids": []}')
+    """)
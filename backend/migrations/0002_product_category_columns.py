@@ -0,0 +1,13 @@
+"""
+Columns the models use that were only ever added by hand
+
+products.original_price (sale pricing) and categories.parent_id
+(subcategories) are read and written by models.py and are present in
+database_schema.sql, but init_database never created them.
+"""
+from migrate import add_column_if_missing, create_index_if_missing
+
+def upgrade(cursor):
+    add_column_if_missing(cursor, 'products', 'original_price', 'DECIMAL(10, 2) NULL')
+    add_column_if_missing(cursor, 'categories', 'parent_id', 'INT NULL')
+    create_index_if_missing(cursor, 'categories', 'idx_categories_parent', 'parent_id')
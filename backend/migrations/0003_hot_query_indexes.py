@@ -0,0 +1,26 @@
+"""
+Secondary indexes for the predicates and sort orders used in models.py
+
+products(category) is already served by idx_products_category_created from
+the baseline, so it is not duplicated here. OTP lookups by (email, purpose)
+use the unique key added in 0007.
+"""
+from migrate import create_index_if_missing
+
+INDEXES = [
+    # Admin order listings / dashboard recent orders
+    ('orders', 'idx_orders_created', 'created_at'),
+    # User order history by account and by guest email
+    ('orders', 'idx_orders_customer_created', 'customer_id, created_at'),
+    ('orders', 'idx_orders_email_created', 'customer_email, created_at'),
+    # Verified reviews for a product, newest first, and rating aggregate
+    ('reviews', 'idx_reviews_product_verified_created', 'product_id, is_verified, created_at'),
+    # Featured products, newest first
+    ('products', 'idx_products_featured_created', 'is_featured, created_at'),
+    # Homepage collections
+    ('collections', 'idx_collections_home', 'show_on_home, is_active, display_order'),
+]
+
+def upgrade(cursor):
+    for table, index_name, columns in INDEXES:
+        create_index_if_missing(cursor, table, index_name, columns)
@@ -0,0 +1,27 @@
+"""
+Daily order rollups for the admin dashboard
+
+daily_order_stats holds one row per day (order count, revenue from
+non-cancelled orders, cancelled count). It is maintained incrementally by
+create_order / update_order_status; this migration backfills it from orders.
+"""
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_order_stats (
+            stat_date DATE PRIMARY KEY,
+            order_count INT NOT NULL DEFAULT 0,
+            cancelled_count INT NOT NULL DEFAULT 0,
+            revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("DELETE FROM daily_order_stats")
+    cursor.execute("""
+        INSERT INTO daily_order_stats (stat_date, order_count, cancelled_count, revenue)
+        SELECT DATE(created_at), COUNT(*),
+               SUM(status = 'Cancelled'),
+               COALESCE(SUM(CASE WHEN status != 'Cancelled' THEN total ELSE 0 END), 0)
+        FROM orders
+        GROUP BY DATE(created_at)
+    """)
@@ -0,0 +1,13 @@
+"""
+Per-user token version for JWT revocation
+
+Tokens carry the user's token_version as the `ver` claim; bumping the
+column (only a password reset does) invalidates every token issued before
+it. Admin status changes don't revoke tokens: the admin flag is read from
+the cached users row, so a demoted admin keeps access until that entry
+is invalidated or expires (up to AUTH_USER_CACHE_TTL on other workers).
+"""
+from migrate import add_column_if_missing
+
+def upgrade(cursor):
+    add_column_if_missing(cursor, 'users', 'token_version', 'INT NOT NULL DEFAULT 0')
@@ -0,0 +1,26 @@
+"""
+Outbound email queue
+
+Messages are written to email_outbox by the request that triggers them and
+delivered by the mailer worker threads (see mailer.py), which claim due
+rows, send them over a reused SMTP session and retry failures with backoff.
+"""
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            to_email VARCHAR(255) NOT NULL,
+            subject VARCHAR(255) NOT NULL,
+            html_body MEDIUMTEXT NOT NULL,
+            status ENUM('pending', 'sending', 'sent', 'failed') DEFAULT 'pending',
+            attempts INT NOT NULL DEFAULT 0,
+            next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            locked_by VARCHAR(64) NULL,
+            locked_at DATETIME NULL,
+            last_error TEXT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at DATETIME NULL,
+            INDEX idx_email_outbox_due (status, next_attempt_at)
+        )
+    """)
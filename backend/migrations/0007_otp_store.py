@@ -0,0 +1,24 @@
+"""
+One live OTP per email and purpose, with attempt counting
+
+Drops used/expired codes and older duplicates, then adds a unique key on
+(email, purpose) so issuing a code is an upsert, and an attempts counter
+so verification can be throttled in the same UPDATE. window_started_at
+marks when the current attempt window began; re-issued codes inherit the
+count until it ends.
+"""
+from migrate import add_column_if_missing, create_index_if_missing, index_exists
+
+def upgrade(cursor):
+    add_column_if_missing(cursor, 'otp_codes', 'attempts', 'INT NOT NULL DEFAULT 0')
+    add_column_if_missing(cursor, 'otp_codes', 'window_started_at', 'TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP')
+    cursor.execute("DELETE FROM otp_codes WHERE used = TRUE OR expires_at < NOW()")
+    cursor.execute("""
+        DELETE older FROM otp_codes older
+        JOIN otp_codes newer
+          ON newer.email = older.email AND newer.purpose = older.purpose AND newer.id > older.id
+    """)
+    if not index_exists(cursor, 'otp_codes', 'uq_otp_email_purpose'):
+        cursor.execute("CREATE UNIQUE INDEX uq_otp_email_purpose ON otp_codes (email, purpose)")
+    # Purge job scans by expiry
+    create_index_if_missing(cursor, 'otp_codes', 'idx_otp_expires', 'expires_at')
@@ -0,0 +1,32 @@
+"""
+Background media upload jobs
+
+Large uploads (videos) are spooled to local disk by the request and pushed
+to storage by a worker thread; upload_jobs tracks their progress so any
+worker process can answer GET /api/upload/jobs/<id>. owner and
+heartbeat_at identify the process running a job and when it last proved
+it is alive, so jobs orphaned by a dead worker can be failed.
+"""
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upload_jobs (
+            id CHAR(32) PRIMARY KEY,
+            kind VARCHAR(20) NOT NULL,
+            filename VARCHAR(255) NOT NULL,
+            status ENUM('queued', 'uploading', 'done', 'failed') DEFAULT 'queued',
+            bytes_total BIGINT NOT NULL DEFAULT 0,
+            bytes_uploaded BIGINT NOT NULL DEFAULT 0,
+            url VARCHAR(1000) NULL,
+            public_id VARCHAR(255) NULL,
+            result JSON NULL,
+            error TEXT NULL,
+            created_by INT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            owner VARCHAR(64) NULL,
+            heartbeat_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_upload_jobs_owner (owner, status),
+            INDEX idx_upload_jobs_status_heartbeat (status, heartbeat_at)
+        )
+    """)
@@ -0,0 +1,26 @@
+"""
+Content-hash registry of uploaded media
+
+One row per distinct file (SHA-256) with the URL it was stored under, so
+re-uploads are answered from here. ref_count is the number of products
+using the URL; see media_assets.py for recount/cleanup.
+"""
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS media_assets (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            sha256 CHAR(64) NOT NULL UNIQUE,
+            kind VARCHAR(20) NOT NULL DEFAULT 'image',
+            url VARCHAR(500) NOT NULL,
+            public_id VARCHAR(255) NOT NULL,
+            bytes BIGINT NULL,
+            width INT NULL,
+            height INT NULL,
+            ref_count INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_media_assets_url (url),
+            INDEX idx_media_assets_orphans (ref_count, last_used_at)
+        )
+    """)
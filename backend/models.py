@@ -1,38 +1,104 @@
 """
 Data models and database operations for the ecommerce application
 """
-import bcrypt
+import base64
 import json
+from datetime import datetime
 from decimal import Decimal
-from database import execute_query
+from database import execute_query, stream_query, transaction, unit_of_work
+from catalog_cache import cached, invalidate_catalog
+from settings_cache import SETTING_DEFAULTS, get_setting, read_settings, invalidate_settings
+from row_decoder import RowDecoder, PRODUCT_ROWS, ORDER_ROWS
+from rollups import record_order_created, record_status_change, get_rollup_totals
+from auth_context import invalidate_user
+from media_assets import adjust_media_refs, product_media_urls
+from passwords import UNUSABLE_PASSWORD, hash_password, check_password, needs_rehash, rehash_password
 
 # ==================== USER MODEL ====================
 
-def create_user(first_name, last_name, email, password, is_admin=False):
+def create_user(first_name, last_name, email, password, is_admin=False, tx=None):
     """Create a new user"""
     # Hash the password
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    password_hash = hash_password(password)
     
     query = """
         INSERT INTO users (first_name, last_name, email, password_hash, is_admin)
         VALUES (%s, %s, %s, %s, %s)
     """
-    user_id = execute_query(query, (first_name, last_name, email, password_hash, is_admin))
+    user_id = execute_query(query, (first_name, last_name, email, password_hash, is_admin), tx=tx)
     return user_id
 
-def find_user_by_email(email):
+def create_guest_user(first_name, last_name, email, phone, tx=None):
+    """Create a passwordless account for a guest checkout and return it
+
+    No hash is computed on the checkout path: the account can't be signed
+    into with a password until one is set through the reset flow, and OTP
+    login works immediately.
+    """
+    query = """
+        INSERT INTO users (first_name, last_name, email, password_hash, phone, is_verified)
+        VALUES (%s, %s, %s, %s, %s, TRUE)
+    """
+    user_id = execute_query(query, (first_name, last_name, email, UNUSABLE_PASSWORD, phone), tx=tx)
+    return {
+        'id': user_id,
+        'first_name': first_name,
+        'last_name': last_name,
+        'email': email,
+        'phone': phone,
+        'is_admin': False,
+        'token_version': 0
+    }
+
+def find_user_by_email(email, tx=None):
     """Find a user by email"""
     query = "SELECT * FROM users WHERE email = %s"
-    return execute_query(query, (email,), fetch_one=True)
+    return execute_query(query, (email,), fetch_one=True, tx=tx)
 
-def find_user_by_id(user_id):
+def find_user_by_id(user_id, tx=None):
     """Find a user by ID"""
     query = "SELECT id, first_name, last_name, email, phone, date_of_birth, is_admin, created_at FROM users WHERE id = %s"
-    return execute_query(query, (user_id,), fetch_one=True)
+    return execute_query(query, (user_id,), fetch_one=True, tx=tx)
+
+def update_user(user_id, first_name, last_name, phone, date_of_birth):
+    """Update a user's profile fields"""
+    query = """
+        UPDATE users SET first_name = %s, last_name = %s, phone = %s, date_of_birth = %s
+        WHERE id = %s
+    """
+    execute_query(query, (first_name, last_name, phone, date_of_birth, user_id))
+    invalidate_user(user_id)
+    return True
+
+def update_user_password(email, new_password):
+    """Set a new password and revoke every token issued before it"""
+    password_hash = hash_password(new_password)
+    user = find_user_by_email(email)
+    if not user:
+        return False
+    execute_query(
+        "UPDATE users SET password_hash = %s, token_version = token_version + 1 WHERE id = %s",
+        (password_hash, user['id'])
+    )
+    invalidate_user(user['id'])
+    return True
 
 def verify_password(stored_hash, password):
     """Verify a password against its hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+    return check_password(stored_hash, password)
+
+def upgrade_password_hash(user, password):
+    """After a successful login, re-hash in the background if the work factor changed"""
+    if not needs_rehash(user['password_hash']):
+        return False
+    def save(new_hash):
+        # Only replace the hash we verified against, never a newer password
+        execute_query(
+            "UPDATE users SET password_hash = %s WHERE id = %s AND password_hash = %s",
+            (new_hash, user['id'], user['password_hash'])
+        )
+    rehash_password(password, save)
+    return True
 
 def get_all_customers():
     """Get all non-admin users with their order statistics"""
@@ -47,48 +113,26 @@ def get_all_customers():
         GROUP BY u.id
         ORDER BY u.created_at DESC
     """
-    result = execute_query(query, fetch_all=True)
-    for customer in result:
-        if customer.get('total_spent'):
-            customer['total_spent'] = float(customer['total_spent'])
-    return result
+    return execute_query(query, fetch_all=True)
 
 # ==================== OTP FUNCTIONS ====================
-import random
-from datetime import datetime, timedelta
+import secrets
+from datetime import datetime
+from otp_store import otp_store
 
 def generate_otp():
     """Generate a 6-digit OTP"""
-    return str(random.randint(100000, 999999))
+    return str(100000 + secrets.randbelow(900000))
 
 def create_otp(email, purpose='register'):
-    """Create and store a new OTP code"""
+    """Create and store a new OTP code, replacing any earlier one"""
     code = generate_otp()
-    expires_at = datetime.now() + timedelta(minutes=10)
-    
-    # Delete any existing unused OTPs for this email and purpose
-    execute_query("DELETE FROM otp_codes WHERE email = %s AND purpose = %s AND used = FALSE", (email, purpose))
-    
-    # Create new OTP
-    query = "INSERT INTO otp_codes (email, code, purpose, expires_at) VALUES (%s, %s, %s, %s)"
-    execute_query(query, (email, code, purpose, expires_at))
+    otp_store.issue(email, purpose, code)
     return code
 
 def verify_otp(email, code, purpose='register'):
-    """Verify an OTP code"""
-    query = """
-        SELECT * FROM otp_codes 
-        WHERE email = %s AND code = %s AND purpose = %s 
-        AND used = FALSE AND expires_at > NOW()
-        ORDER BY created_at DESC LIMIT 1
-    """
-    otp = execute_query(query, (email, code, purpose), fetch_one=True)
-    
-    if otp:
-        # Mark OTP as used
-        execute_query("UPDATE otp_codes SET used = TRUE WHERE id = %s", (otp['id'],))
-        return True
-    return False
+    """Verify an OTP code (consumed on success, throttled after repeated misses)"""
+    return otp_store.verify(email, purpose, code)
 
 def set_user_verified(email):
     """Mark user as verified"""
@@ -97,7 +141,7 @@ def set_user_verified(email):
 
 def create_user_unverified(first_name, last_name, email, password):
     """Create a new unverified user"""
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    password_hash = hash_password(password)
     query = """
         INSERT INTO users (first_name, last_name, email, password_hash, is_admin, is_verified)
         VALUES (%s, %s, %s, %s, FALSE, FALSE)
@@ -122,12 +166,7 @@ def get_all_customers():
         GROUP BY u.id, u.first_name, u.last_name, u.email, u.created_at
         ORDER BY u.created_at DESC
     """
-    result = execute_query(query, fetch_all=True)
-    # Convert Decimal to float for JSON serialization
-    for customer in result:
-        if customer.get('total_spent'):
-            customer['total_spent'] = float(customer['total_spent'])
-    return result
+    return execute_query(query, fetch_all=True)
 
 # ==================== PRODUCT MODEL ====================
 
@@ -151,52 +190,110 @@ def create_product(name, category, price, stock, description=None, image_url=Non
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
     """
     product_id = execute_query(query, (name, description, category, price, original_price, stock, status, image_url, colors_json, sizes_json, gallery_json, video_url, is_featured, faqs_json, related_json))
+    adjust_media_refs([], product_media_urls({'image_url': image_url, 'video_url': video_url, 'gallery_images': gallery_images}))
+    invalidate_catalog()
     return product_id
 
+@cached('products')
 def get_all_products():
     """Get all products"""
     query = "SELECT * FROM products ORDER BY created_at DESC"
     result = execute_query(query, fetch_all=True)
     # Convert Decimal to float and parse JSON fields
-    for product in result:
-        if product.get('price'):
-            product['price'] = float(product['price'])
-        if product.get('original_price'):
-            product['original_price'] = float(product['original_price'])
-        # Parse JSON fields
-        if product.get('colors') and isinstance(product['colors'], str):
-            product['colors'] = json.loads(product['colors'])
-        if product.get('sizes') and isinstance(product['sizes'], str):
-            product['sizes'] = json.loads(product['sizes'])
-        if product.get('gallery_images') and isinstance(product['gallery_images'], str):
-            product['gallery_images'] = json.loads(product['gallery_images'])
-        if product.get('faqs') and isinstance(product['faqs'], str):
-            product['faqs'] = json.loads(product['faqs'])
-        if product.get('related_products') and isinstance(product['related_products'], str):
-            product['related_products'] = json.loads(product['related_products'])
-    return result
+    return PRODUCT_ROWS.decode_rows(result)
+
+# Sort options for the paginated listing: column and direction
+PRODUCT_SORTS = {
+    'newest': ('created_at', 'DESC'),
+    'oldest': ('created_at', 'ASC'),
+    'price_asc': ('price', 'ASC'),
+    'price_desc': ('price', 'DESC'),
+    'name': ('name', 'ASC')
+}
+PRODUCT_PAGE_DEFAULT_LIMIT = 24
+PRODUCT_PAGE_MAX_LIMIT = 100
+
+def encode_cursor(sort_value, row_id):
+    """Encode the last row's sort key and id as an opaque keyset cursor"""
+    if isinstance(sort_value, (datetime, Decimal)):
+        sort_value = str(sort_value)
+    raw = json.dumps([sort_value, row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return sort_value, int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def get_products_page(filters=None, sort='newest', after=None, limit=PRODUCT_PAGE_DEFAULT_LIMIT):
+    """Get one keyset-paginated page of products
+
+    filters may contain category, min_price, max_price, status, size and color.
+    Returns {'items': [...], 'next_cursor': str or None, 'has_more': bool}.
+    """
+    filters = filters or {}
+    if sort not in PRODUCT_SORTS:
+        raise ValueError(f"Unknown sort '{sort}'")
+    sort_column, direction = PRODUCT_SORTS[sort]
+    limit = max(1, min(int(limit), PRODUCT_PAGE_MAX_LIMIT))
 
+    conditions = []
+    values = []
+    if filters.get('category'):
+        conditions.append("category = %s")
+        values.append(filters['category'])
+    if filters.get('status'):
+        conditions.append("status = %s")
+        values.append(filters['status'])
+    if filters.get('min_price') is not None:
+        conditions.append("price >= %s")
+        values.append(filters['min_price'])
+    if filters.get('max_price') is not None:
+        conditions.append("price <= %s")
+        values.append(filters['max_price'])
+    if filters.get('size'):
+        conditions.append("JSON_CONTAINS(sizes, JSON_QUOTE(%s))")
+        values.append(filters['size'])
+    if filters.get('color'):
+        conditions.append("JSON_CONTAINS(colors, JSON_OBJECT('name', %s))")
+        values.append(filters['color'])
+
+    # Keyset condition: rows strictly after the cursor in (sort_column, id) order
+    if after:
+        sort_value, last_id = decode_cursor(after)
+        op = '<' if direction == 'DESC' else '>'
+        conditions.append(f"({sort_column} {op} %s OR ({sort_column} = %s AND id {op} %s))")
+        values.extend([sort_value, sort_value, last_id])
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    query = f"""
+        SELECT * FROM products {where}
+        ORDER BY {sort_column} {direction}, id {direction}
+        LIMIT %s
+    """
+    # Fetch one extra row to know whether another page exists
+    values.append(limit + 1)
+    result = execute_query(query, values, fetch_all=True)
+
+    has_more = len(result) > limit
+    result = result[:limit]
+    next_cursor = None
+    if has_more:
+        last = result[-1]
+        next_cursor = encode_cursor(last[sort_column], last['id'])
+
+    PRODUCT_ROWS.decode_rows(result)
+    return {'items': result, 'next_cursor': next_cursor, 'has_more': has_more}
+
+@cached('product')
 def get_product_by_id(product_id):
     """Get a product by ID"""
     query = "SELECT * FROM products WHERE id = %s"
     result = execute_query(query, (product_id,), fetch_one=True)
-    if result:
-        if result.get('price'):
-            result['price'] = float(result['price'])
-        if result.get('original_price'):
-            result['original_price'] = float(result['original_price'])
-        # Parse JSON fields
-        if result.get('colors') and isinstance(result['colors'], str):
-            result['colors'] = json.loads(result['colors'])
-        if result.get('sizes') and isinstance(result['sizes'], str):
-            result['sizes'] = json.loads(result['sizes'])
-        if result.get('gallery_images') and isinstance(result['gallery_images'], str):
-            result['gallery_images'] = json.loads(result['gallery_images'])
-        if result.get('faqs') and isinstance(result['faqs'], str):
-            result['faqs'] = json.loads(result['faqs'])
-        if result.get('related_products') and isinstance(result['related_products'], str):
-            result['related_products'] = json.loads(result['related_products'])
-    return result
+    return PRODUCT_ROWS.decode_row(result)
 
 def update_product(product_id, **kwargs):
     """Update a product"""
@@ -231,28 +328,49 @@ def update_product(product_id, **kwargs):
     
     if not update_fields:
         return False
+    
+    # Media reference counts follow the product's image/video/gallery URLs
+    media_changes = {f: kwargs[f] for f in MEDIA_FIELDS if kwargs.get(f) is not None}
+    old_media = get_product_media(product_id) if media_changes else None
         
     values.append(product_id)
     query = f"UPDATE products SET {', '.join(update_fields)} WHERE id = %s"
     execute_query(query, values)
+    if old_media is not None:
+        adjust_media_refs(product_media_urls(old_media), product_media_urls({**old_media, **media_changes}))
+    invalidate_catalog()
     return True
 
 def delete_product(product_id):
     """Delete a product"""
+    old_media = get_product_media(product_id)
     query = "DELETE FROM products WHERE id = %s"
     execute_query(query, (product_id,))
+    adjust_media_refs(product_media_urls(old_media), [])
+    invalidate_catalog()
     return True
 
+MEDIA_FIELDS = ('image_url', 'video_url', 'gallery_images')
+
+def get_product_media(product_id):
+    """Current media URLs of a product (uncached, for reference counting)"""
+    return execute_query(
+        "SELECT image_url, video_url, gallery_images FROM products WHERE id = %s",
+        (product_id,), fetch_one=True
+    ) or {}
+
 # ==================== ORDER MODEL ====================
 
-def create_order(customer_id, items, total, shipping_address=None, payment_method=None, customer_name=None, customer_email=None, customer_phone=None, payment_id=None):
+def create_order(customer_id, items, total, shipping_address=None, payment_method=None, customer_name=None, customer_email=None, customer_phone=None, payment_id=None, tx=None):
     """Create a new order"""
     items_json = json.dumps(items)
     query = """
         INSERT INTO orders (customer_id, customer_name, customer_email, customer_phone, items, total, shipping_address, payment_method, payment_id, status)
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'Pending')
     """
-    order_id = execute_query(query, (customer_id, customer_name, customer_email, customer_phone, items_json, total, shipping_address, payment_method, payment_id))
+    with unit_of_work(tx) as tx:
+        order_id = execute_query(query, (customer_id, customer_name, customer_email, customer_phone, items_json, total, shipping_address, payment_method, payment_id), tx=tx)
+        record_order_created(total, tx=tx)
     return order_id
 
 def get_all_orders():
@@ -275,17 +393,9 @@ def get_all_orders():
         ORDER BY o.created_at DESC
     """
     result = execute_query(query, fetch_all=True)
-    for order in result:
-        if order.get('total'):
-            order['total'] = float(order['total'])
-        if order.get('items') and isinstance(order['items'], str):
-            order['items'] = json.loads(order['items'])
-    return result
+    return ORDER_ROWS.decode_rows(result)
 
-def get_user_orders(user_id):
-    """Get all orders for a specific user"""
-    query = """
-        SELECT 
+USER_ORDER_COLUMNS = """
             o.id,
             o.customer_id,
             COALESCE(o.customer_name, CONCAT(u.first_name, ' ', u.last_name)) as customer_name,
@@ -297,20 +407,79 @@ def get_user_orders(user_id):
             o.shipping_address,
             o.payment_method,
             o.created_at
-        FROM orders o
+"""
+
+# List view projection: everything except the items JSON
+USER_ORDER_SUMMARY_COLUMNS = """
+            o.id,
+            o.customer_id,
+            COALESCE(o.customer_name, CONCAT(u.first_name, ' ', u.last_name)) as customer_name,
+            COALESCE(o.customer_email, u.email) as customer_email,
+            o.total,
+            o.status,
+            JSON_LENGTH(o.items) as item_count,
+            o.payment_method,
+            o.created_at
+"""
+
+USER_ORDERS_DEFAULT_LIMIT = 20
+USER_ORDERS_MAX_LIMIT = 100
+
+def _fetch_user_orders(user_id, email=None, limit=None, before=None, summary=False):
+    """Orders placed by the account or as a guest with the account's email
+
+    Each branch of the UNION is a separate indexed lookup
+    (idx_orders_customer_created / idx_orders_email_created), which MySQL
+    cannot do for `customer_id = ? OR customer_email = ?`.
+    """
+    if email is None:
+        user = find_user_by_id(user_id)
+        email = user['email'] if user else None
+
+    cursor_condition = ''
+    cursor_values = []
+    if before:
+        created_at, order_id = decode_cursor(before)
+        cursor_condition = "AND (created_at < %s OR (created_at = %s AND id < %s))"
+        cursor_values = [created_at, created_at, order_id]
+    branch_limit = "LIMIT %s" if limit else ''
+    limit_values = [limit] if limit else []
+
+    branches = [f"(SELECT id FROM orders WHERE customer_id = %s {cursor_condition} ORDER BY created_at DESC, id DESC {branch_limit})"]
+    values = [user_id] + cursor_values + limit_values
+    if email:
+        branches.append(f"(SELECT id FROM orders WHERE customer_email = %s {cursor_condition} ORDER BY created_at DESC, id DESC {branch_limit})")
+        values += [email] + cursor_values + limit_values
+
+    query = f"""
+        SELECT {USER_ORDER_SUMMARY_COLUMNS if summary else USER_ORDER_COLUMNS}
+        FROM ({' UNION '.join(branches)}) matched
+        JOIN orders o ON o.id = matched.id
         LEFT JOIN users u ON o.customer_id = u.id
-        WHERE o.customer_id = %s OR o.customer_email = (SELECT email FROM users WHERE id = %s)
-        ORDER BY o.created_at DESC
+        ORDER BY o.created_at DESC, o.id DESC
+        {branch_limit}
     """
-    result = execute_query(query, (user_id, user_id), fetch_all=True)
-    for order in result:
-        if order.get('total'):
-            order['total'] = float(order['total'])
-        if order.get('items') and isinstance(order['items'], str):
-            order['items'] = json.loads(order['items'])
-    return result
+    result = execute_query(query, values + limit_values, fetch_all=True)
+    return ORDER_ROWS.decode_rows(result)
+
+def get_user_orders(user_id, email=None):
+    """Get all orders for a specific user"""
+    return _fetch_user_orders(user_id, email)
+
+def get_user_orders_page(user_id, email=None, limit=USER_ORDERS_DEFAULT_LIMIT, before=None, summary=False):
+    """Get one keyset-paginated page of a user's orders, newest first
 
-def get_order_by_id(order_id, user_id=None):
+    Returns {'items': [...], 'next_cursor': str or None, 'has_more': bool}.
+    """
+    limit = max(1, min(int(limit), USER_ORDERS_MAX_LIMIT))
+    # Fetch one extra row to know whether another page exists
+    result = _fetch_user_orders(user_id, email, limit + 1, before, summary)
+    has_more = len(result) > limit
+    result = result[:limit]
+    next_cursor = encode_cursor(result[-1]['created_at'], result[-1]['id']) if has_more else None
+    return {'items': result, 'next_cursor': next_cursor, 'has_more': has_more}
+
+def get_order_by_id(order_id, user_id=None, tx=None):
     """Get a specific order, optionally filtered by user"""
     query = """
         SELECT 
@@ -331,47 +500,33 @@ def get_order_by_id(order_id, user_id=None):
     """
     params = [order_id]
     
-    result = execute_query(query, params, fetch_one=True)
-    if result:
-        if result.get('total'):
-            result['total'] = float(result['total'])
-        if result.get('items') and isinstance(result['items'], str):
-            result['items'] = json.loads(result['items'])
-    return result
+    result = execute_query(query, params, fetch_one=True, tx=tx)
+    return ORDER_ROWS.decode_row(result)
 
-def update_order_status(order_id, status):
+def update_order_status(order_id, status, tx=None):
     """Update an order's status"""
     # If status is Delivered, also set completed_at timestamp
     if status == 'Delivered':
         query = "UPDATE orders SET status = %s, completed_at = NOW() WHERE id = %s"
     else:
         query = "UPDATE orders SET status = %s WHERE id = %s"
-    execute_query(query, (status, order_id))
+    with unit_of_work(tx) as tx:
+        current = execute_query(
+            "SELECT status, total, DATE(created_at) as order_date FROM orders WHERE id = %s FOR UPDATE",
+            (order_id,), fetch_one=True, tx=tx
+        )
+        execute_query(query, (status, order_id), tx=tx)
+        # Keep the daily rollup in step when an order is (un)cancelled
+        if current:
+            record_status_change(current['order_date'], current['status'], status, current['total'], tx=tx)
     return True
 
 # ==================== DASHBOARD STATS ====================
 
 def get_dashboard_stats():
     """Get dashboard statistics"""
-    # Total revenue
-    revenue_query = "SELECT COALESCE(SUM(total), 0) as total FROM orders WHERE status != 'Cancelled'"
-    revenue_result = execute_query(revenue_query, fetch_one=True)
-    total_revenue = float(revenue_result['total']) if revenue_result['total'] else 0
-    
-    # Total orders
-    orders_query = "SELECT COUNT(*) as total FROM orders"
-    orders_result = execute_query(orders_query, fetch_one=True)
-    total_orders = orders_result['total'] or 0
-    
-    # Total products
-    products_query = "SELECT COUNT(*) as total FROM products"
-    products_result = execute_query(products_query, fetch_one=True)
-    total_products = products_result['total'] or 0
-    
-    # Total customers
-    customers_query = "SELECT COUNT(*) as total FROM users WHERE is_admin = FALSE"
-    customers_result = execute_query(customers_query, fetch_one=True)
-    total_customers = customers_result['total'] or 0
+    # Revenue / order totals come from the daily_order_stats rollup
+    totals = get_rollup_totals()
     
     # Recent orders
     recent_query = """
@@ -386,25 +541,17 @@ def get_dashboard_stats():
         ORDER BY o.created_at DESC
         LIMIT 5
     """
-    recent_orders = execute_query(recent_query, fetch_all=True)
-    for order in recent_orders:
-        if order.get('total'):
-            order['total'] = float(order['total'])
-    
-    return {
-        'total_revenue': total_revenue,
-        'total_orders': total_orders,
-        'total_products': total_products,
-        'total_customers': total_customers,
-        'recent_orders': recent_orders
-    }
+    totals['recent_orders'] = execute_query(recent_query, fetch_all=True)
+    return totals
 
 # ==================== CATEGORY MODEL ====================
 
 def create_category(name, description=None, parent_id=None):
     """Create a new category or subcategory"""
     query = "INSERT INTO categories (name, description, parent_id) VALUES (%s, %s, %s)"
-    return execute_query(query, (name, description, parent_id))
+    category_id = execute_query(query, (name, description, parent_id))
+    invalidate_catalog()
+    return category_id
 
 def get_all_categories():
     """Get all categories with parent info"""
@@ -460,27 +607,24 @@ def update_category(category_id, name=None, description=None, is_active=None, pa
     values.append(category_id)
     query = f"UPDATE categories SET {', '.join(updates)} WHERE id = %s"
     execute_query(query, values)
+    invalidate_catalog()
     return True
 
 def delete_category(category_id):
     """Delete a category and its subcategories"""
-    # First delete subcategories
-    execute_query("DELETE FROM categories WHERE parent_id = %s", (category_id,))
-    # Then delete the category
-    query = "DELETE FROM categories WHERE id = %s"
-    execute_query(query, (category_id,))
+    with transaction() as tx:
+        # First delete subcategories
+        execute_query("DELETE FROM categories WHERE parent_id = %s", (category_id,), tx=tx)
+        # Then delete the category
+        query = "DELETE FROM categories WHERE id = %s"
+        execute_query(query, (category_id,), tx=tx)
+    invalidate_catalog()
     return True
 
 # ==================== SITE SETTINGS MODEL ====================
 
-def get_setting(key):
-    """Get a setting by key"""
-    query = "SELECT setting_value FROM site_settings WHERE setting_key = %s"
-    result = execute_query(query, (key,), fetch_one=True)
-    if result and result.get('setting_value'):
-        value = result['setting_value']
-        return json.loads(value) if isinstance(value, str) else value
-    return None
+# Settings rendered on the homepage (see get_home_page)
+HOME_SETTING_KEYS = ('sale_banner', 'hero_slides', 'scrolling_text', 'our_story', 'testimonials', 'shop_the_look')
 
 def update_setting(key, value):
     """Update or create a setting"""
@@ -490,15 +634,15 @@ def update_setting(key, value):
         ON DUPLICATE KEY UPDATE setting_value = %s
     """
     execute_query(query, (key, json_value, json_value))
+    invalidate_settings()
+    if key in HOME_SETTING_KEYS:
+        # The cached homepage payload embeds these
+        invalidate_catalog()
     return True
 
 def get_sale_banner():
     """Get sale banner settings"""
-    return get_setting('sale_banner') or {
-        'enabled': True,
-        'text': 'LIMITED TIME OFFER - UP TO 50% OFF',
-        'end_date': '2025-12-31T23:59:59'
-    }
+    return get_setting('sale_banner')
 
 def update_sale_banner(enabled, text, end_date):
     """Update sale banner settings"""
@@ -512,10 +656,7 @@ def update_sale_banner(enabled, text, end_date):
 
 def get_hero_slides():
     """Get hero slider settings"""
-    return get_setting('hero_slides') or {
-        'slides': [],
-        'recommended_size': '1920x1080'
-    }
+    return get_setting('hero_slides')
 
 def update_hero_slides(slides, recommended_size='1920x1080'):
     """Update hero slides"""
@@ -526,10 +667,7 @@ def update_hero_slides(slides, recommended_size='1920x1080'):
 
 def get_scrolling_text():
     """Get scrolling text settings"""
-    return get_setting('scrolling_text') or {
-        'enabled': True,
-        'text': 'Free Shipping on Orders Over $100'
-    }
+    return get_setting('scrolling_text')
 
 def update_scrolling_text(enabled, text):
     """Update scrolling text"""
@@ -542,9 +680,7 @@ def update_scrolling_text(enabled, text):
 
 def get_our_story():
     """Get Our Story section settings"""
-    return get_setting('our_story') or {
-        'enabled': True, 'title': 'Our Story', 'description': '', 'video_url': ''
-    }
+    return get_setting('our_story')
 
 def update_our_story(enabled, title, description, video_url):
     """Update Our Story section"""
@@ -554,9 +690,7 @@ def update_our_story(enabled, title, description, video_url):
 
 def get_testimonials():
     """Get testimonials section settings"""
-    return get_setting('testimonials') or {
-        'enabled': True, 'title': 'What Our Fellows Say', 'videos': []
-    }
+    return get_setting('testimonials')
 
 def update_testimonials(enabled, title, videos):
     """Update testimonials section"""
@@ -566,9 +700,7 @@ def update_testimonials(enabled, title, videos):
 
 def get_shop_the_look():
     """Get Shop The Look section settings"""
-    return get_setting('shop_the_look') or {
-        'enabled': True, 'title': 'Shop The Look', 'product_ids': []
-    }
+    return get_setting('shop_the_look')
 
 def update_shop_the_look(enabled, title, product_ids):
     """Update Shop The Look section"""
@@ -578,25 +710,18 @@ def update_shop_the_look(enabled, title, product_ids):
 
 # ==================== FEATURED PRODUCTS ====================
 
+@cached('featured')
 def get_featured_products():
     """Get featured products"""
     query = "SELECT * FROM products WHERE is_featured = TRUE ORDER BY created_at DESC"
     result = execute_query(query, fetch_all=True)
-    for product in result:
-        if product.get('price'):
-            product['price'] = float(product['price'])
-        if product.get('colors') and isinstance(product['colors'], str):
-            product['colors'] = json.loads(product['colors'])
-        if product.get('sizes') and isinstance(product['sizes'], str):
-            product['sizes'] = json.loads(product['sizes'])
-        if product.get('gallery_images') and isinstance(product['gallery_images'], str):
-            product['gallery_images'] = json.loads(product['gallery_images'])
-    return result
+    return PRODUCT_ROWS.decode_rows(result)
 
 def set_product_featured(product_id, is_featured):
     """Set product featured status"""
     query = "UPDATE products SET is_featured = %s WHERE id = %s"
     execute_query(query, (is_featured, product_id))
+    invalidate_catalog()
     return True
 
 # ==================== COLLECTIONS ====================
@@ -605,7 +730,9 @@ def create_collection(title, description=None, cover_image=None, format_type='sh
     """Create a new collection"""
     query = """INSERT INTO collections (title, description, cover_image, format_type) 
                VALUES (%s, %s, %s, %s)"""
-    return execute_query(query, (title, description, cover_image, format_type))
+    collection_id = execute_query(query, (title, description, cover_image, format_type))
+    invalidate_catalog()
+    return collection_id
 
 def get_all_collections():
     """Get all collections with product count"""
@@ -655,12 +782,14 @@ def update_collection(collection_id, **kwargs):
     values.append(collection_id)
     query = f"UPDATE collections SET {', '.join(updates)} WHERE id = %s"
     execute_query(query, values)
+    invalidate_catalog()
     return True
 
 def delete_collection(collection_id):
     """Delete a collection"""
     query = "DELETE FROM collections WHERE id = %s"
     execute_query(query, (collection_id,))
+    invalidate_catalog()
     return True
 
 # Collection Products Management
@@ -668,14 +797,17 @@ def add_product_to_collection(collection_id, product_id):
     """Add a product to a collection"""
     query = "INSERT IGNORE INTO collection_products (collection_id, product_id) VALUES (%s, %s)"
     execute_query(query, (collection_id, product_id))
+    invalidate_catalog()
     return True
 
 def remove_product_from_collection(collection_id, product_id):
     """Remove a product from a collection"""
     query = "DELETE FROM collection_products WHERE collection_id = %s AND product_id = %s"
     execute_query(query, (collection_id, product_id))
+    invalidate_catalog()
     return True
 
+@cached('collection_products')
 def get_collection_products(collection_id):
     """Get all products in a collection"""
     query = """
@@ -685,27 +817,59 @@ def get_collection_products(collection_id):
         ORDER BY cp.display_order ASC
     """
     result = execute_query(query, (collection_id,), fetch_all=True)
-    for product in result:
-        if product.get('price'):
-            product['price'] = float(product['price'])
-        if product.get('colors') and isinstance(product['colors'], str):
-            product['colors'] = json.loads(product['colors'])
-        if product.get('sizes') and isinstance(product['sizes'], str):
-            product['sizes'] = json.loads(product['sizes'])
-        if product.get('gallery_images') and isinstance(product['gallery_images'], str):
-            product['gallery_images'] = json.loads(product['gallery_images'])
-    return result
+    return PRODUCT_ROWS.decode_rows(result)
 
 def set_collection_products(collection_id, product_ids):
     """Set all products for a collection (replaces existing)"""
-    # Remove existing
-    execute_query("DELETE FROM collection_products WHERE collection_id = %s", (collection_id,))
-    # Add new
-    for idx, product_id in enumerate(product_ids):
-        query = "INSERT INTO collection_products (collection_id, product_id, display_order) VALUES (%s, %s, %s)"
-        execute_query(query, (collection_id, product_id, idx))
+    with transaction() as tx:
+        # Remove existing
+        execute_query("DELETE FROM collection_products WHERE collection_id = %s", (collection_id,), tx=tx)
+        # Add new
+        for idx, product_id in enumerate(product_ids):
+            query = "INSERT INTO collection_products (collection_id, product_id, display_order) VALUES (%s, %s, %s)"
+            execute_query(query, (collection_id, product_id, idx), tx=tx)
+    invalidate_catalog()
     return True
 
+# ==================== HOMEPAGE ====================
+
+PRODUCT_CARD_COLUMNS = "id, name, category, price, original_price, image_url, status, stock"
+
+def get_product_cards(product_ids):
+    """Card fields for the given products, in the given order (missing ids are skipped)"""
+    ids = [int(product_id) for product_id in product_ids]
+    if not ids:
+        return []
+    placeholders = ', '.join(['%s'] * len(ids))
+    rows = execute_query(
+        f"SELECT {PRODUCT_CARD_COLUMNS} FROM products WHERE id IN ({placeholders})",
+        tuple(ids), fetch_all=True
+    )
+    by_id = {row['id']: row for row in PRODUCT_ROWS.decode_rows(rows)}
+    return [by_id[product_id] for product_id in dict.fromkeys(ids) if product_id in by_id]
+
+def get_home_page():
+    """Everything the homepage renders: one settings query plus the catalog reads"""
+    # Read settings directly: the result is cached under the catalog version,
+    # which this worker's settings cache may not have caught up with yet
+    settings = read_settings(HOME_SETTING_KEYS)
+    for key, value in settings.items():
+        settings[key] = value or SETTING_DEFAULTS[key]
+    shop_the_look = dict(settings['shop_the_look'])
+    shop_the_look['products'] = (
+        get_product_cards(shop_the_look.get('product_ids') or []) if shop_the_look.get('enabled') else []
+    )
+    return {
+        'sale_banner': settings['sale_banner'],
+        'hero': settings['hero_slides'],
+        'scrolling_text': settings['scrolling_text'],
+        'our_story': settings['our_story'],
+        'testimonials': settings['testimonials'],
+        'shop_the_look': shop_the_look,
+        'featured_products': get_featured_products(),
+        'collections': get_home_collections()
+    }
+
 # ==================== COUPONS ====================
 
 def create_coupon(code, discount_type, discount_value, min_order_amount=0, max_uses=None, expires_at=None):
@@ -718,17 +882,12 @@ def create_coupon(code, discount_type, discount_value, min_order_amount=0, max_u
 
 def get_all_coupons():
     """Get all coupons"""
-    result = execute_query("SELECT * FROM coupons ORDER BY created_at DESC", fetch_all=True)
-    for coupon in result:
-        if coupon.get('discount_value'):
-            coupon['discount_value'] = float(coupon['discount_value'])
-        if coupon.get('min_order_amount'):
-            coupon['min_order_amount'] = float(coupon['min_order_amount'])
-    return result
+    return execute_query("SELECT * FROM coupons ORDER BY created_at DESC", fetch_all=True)
 
 def get_coupon_by_code(code):
     """Get coupon by code"""
     result = execute_query("SELECT * FROM coupons WHERE code = %s AND is_active = TRUE", (code.upper(),), fetch_one=True)
+    # validate_coupon does float arithmetic with these
     if result:
         if result.get('discount_value'):
             result['discount_value'] = float(result['discount_value'])
@@ -764,9 +923,9 @@ def validate_coupon(code, order_total):
     
     return discount, coupon
 
-def use_coupon(coupon_id):
+def use_coupon(coupon_id, tx=None):
     """Increment coupon usage count"""
-    execute_query("UPDATE coupons SET used_count = used_count + 1 WHERE id = %s", (coupon_id,))
+    execute_query("UPDATE coupons SET used_count = used_count + 1 WHERE id = %s", (coupon_id,), tx=tx)
 
 def update_coupon(coupon_id, **kwargs):
     """Update a coupon"""
@@ -867,3 +1026,87 @@ def delete_contact(contact_id):
     """Delete a contact submission"""
     execute_query("DELETE FROM contact_submissions WHERE id = %s", (contact_id,))
     return True
+
+# ==================== TRANSACTIONS ====================
+
+TRANSACTIONS_QUERY = """
+    SELECT
+        o.id as order_id,
+        COALESCE(o.customer_name, CONCAT(u.first_name, ' ', u.last_name), 'Guest') as customer_name,
+        COALESCE(o.customer_email, u.email, '') as customer_email,
+        COALESCE(o.customer_phone, u.phone, '') as customer_phone,
+        COALESCE(o.total, 0) as amount,
+        COALESCE(o.payment_method, 'cod') as payment_method,
+        COALESCE(o.payment_id, '') as payment_id,
+        o.status,
+        o.created_at
+    FROM orders o
+    LEFT JOIN users u ON o.customer_id = u.id
+    ORDER BY o.created_at DESC
+"""
+
+def get_transactions():
+    """Every order as a payment transaction, newest first
+
+    created_at stays the naive "YYYY-MM-DD HH:MM:SS" string ('' when missing)
+    the admin transactions page has always received; it is shown as local
+    time, so the provider's UTC ISO format would shift it.
+    """
+    rows = execute_query(TRANSACTIONS_QUERY, fetch_all=True)
+    for row in rows:
+        row['created_at'] = str(row['created_at']) if row['created_at'] else ''
+    return rows
+
+# ==================== ADMIN EXPORTS ====================
+
+EXPORT_BATCH_SIZE = 500
+
+# name -> (query, decoder); rows are streamed in SELECT column order
+EXPORTS = {
+    'orders': ("""
+        SELECT
+            o.id,
+            o.customer_id,
+            COALESCE(o.customer_name, CONCAT(u.first_name, ' ', u.last_name)) as customer_name,
+            COALESCE(o.customer_email, u.email) as customer_email,
+            o.customer_phone,
+            o.total,
+            o.status,
+            o.items,
+            o.shipping_address,
+            o.payment_method,
+            o.payment_id,
+            o.created_at
+        FROM orders o
+        LEFT JOIN users u ON o.customer_id = u.id
+        ORDER BY o.created_at DESC
+    """, ORDER_ROWS),
+    'transactions': (TRANSACTIONS_QUERY, RowDecoder()),
+    'customers': ("""
+        SELECT
+            u.id,
+            u.first_name,
+            u.last_name,
+            u.email,
+            u.phone,
+            u.created_at,
+            COUNT(o.id) as total_orders,
+            COALESCE(SUM(o.total), 0) as total_spent
+        FROM users u
+        LEFT JOIN orders o ON u.id = o.customer_id
+        WHERE u.is_admin = FALSE
+        GROUP BY u.id, u.first_name, u.last_name, u.email, u.phone, u.created_at
+        ORDER BY u.created_at DESC
+    """, RowDecoder()),
+    'contacts': ("""
+        SELECT id, first_name, last_name, email, subject, message, status, created_at
+        FROM contact_submissions
+        ORDER BY created_at DESC
+    """, RowDecoder())
+}
+
+def stream_export(name, batch_size=EXPORT_BATCH_SIZE):
+    """Yield decoded batches of rows for an admin export without loading the whole table"""
+    query, decoder = EXPORTS[name]
+    for rows in stream_query(query, batch_size=batch_size):
+        yield decoder.decode_rows(rows)
@@ -0,0 +1,191 @@
+"""
+Storage for one-time passcodes
+
+Each (email, purpose) has at most one live code. Verification counts
+attempts and a code stops working after OTP_MAX_ATTEMPTS wrong guesses.
+The count carries over when a new code is issued, until
+OTP_ATTEMPT_WINDOW seconds after the first code of the window or a
+successful verification, so requesting fresh codes doesn't buy more
+guesses. Once the attempts are spent, issue() raises OTPLockedError.
+
+Backends (OTP_STORE):
+    mysql   otp_codes table; used/expired rows are purged periodically
+            (also `python otp_store.py purge` from cron)
+    memory  per-process dict with TTL; only for single-process deployments,
+            since codes issued by one worker are invisible to the others
+"""
+import hmac
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from database import execute_query, execute_update
+
+OTP_CONFIG = {
+    'backend': os.getenv('OTP_STORE', 'mysql'),
+    'ttl': int(os.getenv('OTP_TTL_SECONDS', 600)),
+    'max_attempts': int(os.getenv('OTP_MAX_ATTEMPTS', 5)),
+    'attempt_window': int(os.getenv('OTP_ATTEMPT_WINDOW', 3600)),
+    'purge_interval': int(os.getenv('OTP_PURGE_INTERVAL', 3600))
+}
+
+PURGE_BATCH = 1000
+
+class OTPLockedError(Exception):
+    """The email has used up its verification attempts for the current window"""
+
+class OTPStore(ABC):
+    """Common interface; purge() runs at most once per purge_interval from issue()"""
+
+    def __init__(self, ttl, max_attempts, attempt_window, purge_interval, **_):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.attempt_window = attempt_window
+        self.purge_interval = purge_interval
+        self._purge_lock = threading.Lock()
+        self._purged_at = time.monotonic()
+
+    @abstractmethod
+    def issue(self, email, purpose, code):
+        """Store code as the only live code for (email, purpose)
+
+        Raises OTPLockedError while the attempts of the current window are used up.
+        """
+
+    @abstractmethod
+    def verify(self, email, purpose, code):
+        """Consume the code if it matches; every wrong guess counts an attempt"""
+
+    @abstractmethod
+    def purge(self):
+        """Drop used codes and expired codes whose attempt window is over; returns how many were removed"""
+
+    def maybe_purge(self):
+        now = time.monotonic()
+        if now - self._purged_at < self.purge_interval or not self._purge_lock.acquire(blocking=False):
+            return
+        self._purged_at = now
+
+        def run():
+            try:
+                removed = self.purge()
+                if removed:
+                    print(f"🧹 Purged {removed} used/expired OTP codes")
+            except Exception as e:
+                print(f"⚠️  OTP purge failed: {e}")
+            finally:
+                self._purge_lock.release()
+
+        threading.Thread(target=run, name='otp-purge', daemon=True).start()
+
+class MySQLOTPStore(OTPStore):
+    """otp_codes table, one row per (email, purpose)"""
+
+    def issue(self, email, purpose, code):
+        current = execute_query("""
+            SELECT attempts FROM otp_codes
+            WHERE email = %s AND purpose = %s AND used = FALSE
+              AND window_started_at > NOW() - INTERVAL %s SECOND
+        """, (email, purpose, self.attempt_window), fetch_one=True)
+        if current and current['attempts'] >= self.max_attempts:
+            raise OTPLockedError('Too many OTP attempts')
+        expires_at = datetime.now() + timedelta(seconds=self.ttl)
+        # Assignments apply left to right: attempts and the window read the old row before used is reset
+        execute_query("""
+            INSERT INTO otp_codes (email, code, purpose, expires_at) VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                attempts = IF(used = FALSE AND window_started_at > NOW() - INTERVAL %s SECOND, attempts, 0),
+                window_started_at = IF(used = FALSE AND window_started_at > NOW() - INTERVAL %s SECOND,
+                                       window_started_at, CURRENT_TIMESTAMP),
+                code = VALUES(code), expires_at = VALUES(expires_at),
+                used = FALSE, created_at = CURRENT_TIMESTAMP
+        """, (email, code, purpose, expires_at, self.attempt_window, self.attempt_window))
+        self.maybe_purge()
+
+    def verify(self, email, purpose, code):
+        # Success costs one round trip; only a wrong code needs a second to count it
+        consumed = execute_update("""
+            UPDATE otp_codes SET used = TRUE, attempts = attempts + 1
+            WHERE email = %s AND purpose = %s AND code = %s
+              AND used = FALSE AND expires_at > NOW() AND attempts < %s
+        """, (email, purpose, code, self.max_attempts))
+        if consumed:
+            return True
+        execute_update("""
+            UPDATE otp_codes SET attempts = attempts + 1
+            WHERE email = %s AND purpose = %s AND used = FALSE
+        """, (email, purpose))
+        return False
+
+    def purge(self):
+        removed = 0
+        while True:
+            # Expired rows stay until their window ends so the attempt count survives
+            count = execute_update("""
+                DELETE FROM otp_codes
+                WHERE used = TRUE
+                   OR (expires_at < NOW() AND window_started_at < NOW() - INTERVAL %s SECOND)
+                LIMIT %s
+            """, (self.attempt_window, PURGE_BATCH))
+            removed += count
+            if count < PURGE_BATCH:
+                return removed
+
+class MemoryOTPStore(OTPStore):
+    """In-process TTL map: (email, purpose) -> [code, expires_at, attempts, window_ends_at]"""
+
+    def __init__(self, **config):
+        super().__init__(**config)
+        self._lock = threading.Lock()
+        self._codes = {}
+
+    def issue(self, email, purpose, code):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._codes.get((email, purpose))
+            if entry and entry[3] > now:
+                if entry[2] >= self.max_attempts:
+                    raise OTPLockedError('Too many OTP attempts')
+                attempts, window_ends_at = entry[2], entry[3]
+            else:
+                attempts, window_ends_at = 0, now + self.attempt_window
+            self._codes[(email, purpose)] = [code, now + self.ttl, attempts, window_ends_at]
+        self.maybe_purge()
+
+    def verify(self, email, purpose, code):
+        key = (email, purpose)
+        with self._lock:
+            entry = self._codes.get(key)
+            if not entry or entry[1] <= time.monotonic() or entry[2] >= self.max_attempts:
+                return False
+            entry[2] += 1
+            if hmac.compare_digest(entry[0], str(code)):
+                del self._codes[key]
+                return True
+            return False
+
+    def purge(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, entry in self._codes.items() if entry[1] <= now and entry[3] <= now]
+            for key in expired:
+                del self._codes[key]
+        return len(expired)
+
+OTP_BACKENDS = {
+    'mysql': MySQLOTPStore,
+    'memory': MemoryOTPStore
+}
+
+if OTP_CONFIG['backend'] not in OTP_BACKENDS:
+    raise ValueError(f"Unknown OTP_STORE '{OTP_CONFIG['backend']}' (expected one of {', '.join(OTP_BACKENDS)})")
+
+otp_store = OTP_BACKENDS[OTP_CONFIG['backend']](**OTP_CONFIG)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'purge':
+        print("Usage: python otp_store.py purge")
+        sys.exit(1)
+    print(f"✅ Purged {otp_store.purge()} used/expired OTP codes")
@@ -0,0 +1,136 @@
+"""
+Password hashing service
+
+bcrypt hashing and verification run on a small, dedicated thread pool
+(bcrypt releases the GIL while it works), so at most PASSWORD_HASH_WORKERS
+hashes burn CPU at once and a login burst queues up behind them instead of
+starving every other request thread. The work factor is configurable;
+hashes made with a different cost are upgraded on the next successful login.
+"""
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+
+PASSWORD_CONFIG = {
+    'rounds': int(os.getenv('BCRYPT_ROUNDS', 12)),
+    'workers': int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+}
+
+BCRYPT_COST = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+# Stored for accounts without a password (e.g. guest checkout); never matches
+UNUSABLE_PASSWORD = '!'
+
+class PasswordHasher:
+    """bcrypt on a bounded worker pool, with queue and latency counters"""
+
+    def __init__(self, rounds, workers):
+        self.rounds = rounds
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._wait_times = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+        self.stats = {'hashes': 0, 'verifications': 0, 'rehashes': 0, 'max_queue_depth': 0}
+
+    def _task(self, queued_at, fn, args):
+        started = time.monotonic()
+        with self._lock:
+            self._wait_times.append(started - queued_at)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._run_times.append(time.monotonic() - started)
+
+    def submit(self, fn, *args):
+        """Run fn(*args) on the hashing pool and return its Future"""
+        with self._lock:
+            self._pending += 1
+            queued = max(0, self._pending - self.workers)
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], queued)
+        return self._executor.submit(self._task, time.monotonic(), fn, args)
+
+    def hash(self, password):
+        """Hash a password at the configured work factor"""
+        with self._lock:
+            self.stats['hashes'] += 1
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self.submit(bcrypt.hashpw, password.encode('utf-8'), salt).result().decode('utf-8')
+
+    def verify(self, stored_hash, password):
+        """Check a password against a stored hash"""
+        if not BCRYPT_COST.match(stored_hash or ''):
+            return False
+        with self._lock:
+            self.stats['verifications'] += 1
+        return self.submit(bcrypt.checkpw, password.encode('utf-8'), stored_hash.encode('utf-8')).result()
+
+    def rehash_in_background(self, password, save):
+        """Hash at the current work factor on the pool and pass the result to save(new_hash)"""
+        def task():
+            salt = bcrypt.gensalt(rounds=self.rounds)
+            save(bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8'))
+            with self._lock:
+                self.stats['rehashes'] += 1
+
+        def report(future):
+            if future.exception():
+                print(f"⚠️  Password rehash failed: {future.exception()}")
+
+        self.submit(task).add_done_callback(report)
+
+    def needs_rehash(self, stored_hash):
+        """True when a hash was made with a different work factor"""
+        match = BCRYPT_COST.match(stored_hash or '')
+        return not match or int(match.group(1)) != self.rounds
+
+    def get_stats(self):
+        with self._lock:
+            waits = sorted(self._wait_times)
+            runs = sorted(self._run_times)
+            snapshot = dict(self.stats)
+            snapshot.update({
+                'rounds': self.rounds,
+                'workers': self.workers,
+                'in_flight': min(self._pending, self.workers),
+                'queue_depth': max(0, self._pending - self.workers)
+            })
+
+        def percentile(values, p):
+            if not values:
+                return 0
+            return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 2)
+
+        snapshot['wait_ms_p50'] = percentile(waits, 0.50)
+        snapshot['wait_ms_p99'] = percentile(waits, 0.99)
+        snapshot['hash_ms_p50'] = percentile(runs, 0.50)
+        snapshot['hash_ms_p99'] = percentile(runs, 0.99)
+        return snapshot
+
+password_hasher = PasswordHasher(**PASSWORD_CONFIG)
+
+def hash_password(password):
+    """Hash a password on the hashing pool"""
+    return password_hasher.hash(password)
+
+def check_password(stored_hash, password):
+    """Verify a password on the hashing pool"""
+    return password_hasher.verify(stored_hash, password)
+
+def needs_rehash(stored_hash):
+    return password_hasher.needs_rehash(stored_hash)
+
+def rehash_password(password, save):
+    """Upgrade a hash to the current work factor without blocking the caller"""
+    password_hasher.rehash_in_background(password, save)
+
+def get_password_stats():
+    """Get queue depth and latency counters of the hashing pool"""
+    return password_hasher.get_stats()
@@ -0,0 +1,120 @@
+"""
+Materialized order rollups for the admin dashboard
+
+daily_order_stats keeps one row per day with the order count, cancelled
+count and revenue (non-cancelled orders only, matching the dashboard's
+definition). Rows are updated in the same transaction as the order write,
+so the dashboard never has to aggregate the orders table.
+
+Repair / backfill from the orders table:
+    python rollups.py rebuild
+"""
+import sys
+from datetime import date, timedelta
+from database import execute_query, transaction
+
+GRANULARITIES = {
+    'day': "stat_date",
+    'week': "DATE_SUB(stat_date, INTERVAL WEEKDAY(stat_date) DAY)",
+    'month': "DATE_SUB(stat_date, INTERVAL DAYOFMONTH(stat_date) - 1 DAY)"
+}
+
+def record_order_created(total, tx=None):
+    """Count a new (Pending) order against today's row"""
+    execute_query("""
+        INSERT INTO daily_order_stats (stat_date, order_count, revenue) VALUES (CURDATE(), 1, %s)
+        ON DUPLICATE KEY UPDATE order_count = order_count + 1, revenue = revenue + %s
+    """, (total, total), tx=tx)
+
+def record_status_change(order_date, old_status, new_status, total, tx=None):
+    """Move an order's revenue in or out of its day when it is (un)cancelled"""
+    was_cancelled = old_status == 'Cancelled'
+    is_cancelled = new_status == 'Cancelled'
+    if was_cancelled == is_cancelled:
+        return
+    sign = -1 if is_cancelled else 1
+    execute_query("""
+        UPDATE daily_order_stats
+        SET revenue = revenue + %s, cancelled_count = cancelled_count - %s
+        WHERE stat_date = %s
+    """, (sign * total, sign, order_date), tx=tx)
+
+def get_rollup_totals():
+    """All-time dashboard counters in one query"""
+    result = execute_query("""
+        SELECT
+            (SELECT COALESCE(SUM(revenue), 0) FROM daily_order_stats) as total_revenue,
+            (SELECT COALESCE(SUM(order_count), 0) FROM daily_order_stats) as total_orders,
+            (SELECT COUNT(*) FROM products) as total_products,
+            (SELECT COUNT(*) FROM users WHERE is_admin = FALSE) as total_customers
+    """, fetch_one=True)
+    return {
+        'total_revenue': float(result['total_revenue']),
+        'total_orders': int(result['total_orders']),
+        'total_products': result['total_products'] or 0,
+        'total_customers': result['total_customers'] or 0
+    }
+
+def get_order_stats_series(start=None, end=None, granularity='day'):
+    """Revenue, order count and average order value per day/week/month
+
+    start and end are inclusive dates (default: the last 30 days).
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}'")
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise ValueError('start must not be after end')
+
+    period = GRANULARITIES[granularity]
+    rows = execute_query(f"""
+        SELECT {period} as period,
+               SUM(order_count) as orders,
+               SUM(cancelled_count) as cancelled,
+               SUM(revenue) as revenue
+        FROM daily_order_stats
+        WHERE stat_date BETWEEN %s AND %s
+        GROUP BY period
+        ORDER BY period
+    """, (start, end), fetch_all=True)
+
+    series = []
+    for row in rows:
+        orders = int(row['orders'] or 0)
+        paid_orders = orders - int(row['cancelled'] or 0)
+        revenue = float(row['revenue'] or 0)
+        series.append({
+            'period': str(row['period']),
+            'orders': orders,
+            'revenue': revenue,
+            'average_order_value': round(revenue / paid_orders, 2) if paid_orders else 0
+        })
+    return {
+        'start': str(start),
+        'end': str(end),
+        'granularity': granularity,
+        'series': series
+    }
+
+def rebuild_daily_order_stats():
+    """Recompute every daily row from the orders table"""
+    with transaction() as tx:
+        execute_query("DELETE FROM daily_order_stats", tx=tx)
+        execute_query("""
+            INSERT INTO daily_order_stats (stat_date, order_count, cancelled_count, revenue)
+            SELECT DATE(created_at), COUNT(*),
+                   SUM(status = 'Cancelled'),
+                   COALESCE(SUM(CASE WHEN status != 'Cancelled' THEN total ELSE 0 END), 0)
+            FROM orders
+            GROUP BY DATE(created_at)
+        """, tx=tx)
+        result = execute_query("SELECT COUNT(*) as days FROM daily_order_stats", fetch_one=True, tx=tx)
+    return result['days']
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'rebuild':
+        print("Usage: python rollups.py rebuild")
+        sys.exit(1)
+    days = rebuild_daily_order_stats()
+    print(f"✅ Rebuilt daily_order_stats ({days} days)")
@@ -0,0 +1,49 @@
+"""
+Result-set decoding for rows returned by mysql-connector
+
+Parses the JSON columns of a whole result set; DECIMAL values are left as
+Decimal for json_provider to encode. The speedup over per-row json.loads
+blocks comes from parsing with orjson; without it decoding falls back to
+the stdlib parser at about the same speed as before (see
+benchmarks/bench_row_decoder.py).
+"""
+import json
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+class RowDecoder:
+    """Decode JSON columns of dictionary rows in place"""
+
+    def __init__(self, json_columns=()):
+        self.json_columns = tuple(json_columns)
+
+    def decode_rows(self, rows):
+        """Decode every row of a result set and return it"""
+        if not rows:
+            return rows
+        json_columns = [c for c in self.json_columns if c in rows[0]]
+        loads = json_loads
+        for row in rows:
+            for column in json_columns:
+                value = row[column]
+                if value and isinstance(value, (str, bytes)):
+                    row[column] = loads(value)
+        return rows
+
+    def decode_row(self, row):
+        """Decode a single row (or pass through None)"""
+        if row:
+            self.decode_rows([row])
+        return row
+
+PRODUCT_ROWS = RowDecoder(
+    json_columns=('colors', 'sizes', 'gallery_images', 'faqs', 'related_products')
+)
+
+ORDER_ROWS = RowDecoder(
+    json_columns=('items',)
+)
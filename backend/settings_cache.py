@@ -0,0 +1,177 @@
+"""
+In-process cache for public site settings
+
+All public settings are read with one `WHERE setting_key IN (...)` query and
+kept per worker as a decoded dict. update_setting (models.py) bumps a shared
+version row in site_settings, the same way catalog_cache does, so every
+worker reloads within a few seconds.
+
+The bundle is serialized and hashed once per load, so GET /api/settings can
+answer with an ETag (and 304) without encoding anything per request.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from database import execute_query
+from catalog_cache import read_version, bump_catalog_version
+
+SETTINGS_CONFIG = {
+    'ttl': int(os.getenv('SETTINGS_CACHE_TTL', 300)),
+    'version_check_interval': float(os.getenv('SETTINGS_VERSION_CHECK_INTERVAL', 5))
+}
+
+VERSION_KEY = 'settings_version'
+
+# Public settings and the values used until they are first saved (shared, treat as read-only)
+SETTING_DEFAULTS = {
+    'sale_banner': {
+        'enabled': True,
+        'text': 'LIMITED TIME OFFER - UP TO 50% OFF',
+        'end_date': '2025-12-31T23:59:59'
+    },
+    'hero_slides': {'slides': [], 'recommended_size': '1920x1080'},
+    'scrolling_text': {'enabled': True, 'text': 'Free Shipping on Orders Over $100'},
+    'our_story': {'enabled': True, 'title': 'Our Story', 'description': '', 'video_url': ''},
+    'testimonials': {'enabled': True, 'title': 'What Our Fellows Say', 'videos': []},
+    'shop_the_look': {'enabled': True, 'title': 'Shop The Look', 'product_ids': []},
+    'payment_methods': {'cod_enabled': True, 'online_enabled': True},
+    # Free delivery for orders >= 800, else 85 charge
+    'shipping_settings': {'free_delivery_minimum': 800, 'delivery_charge': 85},
+    'whatsapp_settings': {'whatsapp_number': '', 'whatsapp_message': 'Hi! I am interested in your products.'}
+}
+
+PUBLIC_SETTING_KEYS = tuple(SETTING_DEFAULTS)
+
+def read_settings(keys):
+    """Read settings from the database in one query; keys without a row map to None"""
+    settings = dict.fromkeys(keys)
+    if not settings:
+        return settings
+    placeholders = ', '.join(['%s'] * len(settings))
+    rows = execute_query(
+        f"SELECT setting_key, setting_value FROM site_settings WHERE setting_key IN ({placeholders})",
+        tuple(settings), fetch_all=True
+    )
+    for row in rows:
+        value = row['setting_value']
+        settings[row['setting_key']] = json.loads(value) if isinstance(value, str) else value
+    return settings
+
+class SettingsCache:
+    """Whole public settings bundle with a TTL and a shared invalidation version"""
+
+    def __init__(self, ttl, version_check_interval):
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._lock = threading.Lock()
+        self._bundle = None  # (settings, body, etag)
+        self._expires_at = 0
+        self._generation = 0  # Bumped on clear so in-flight loads are not stored
+        self._version = None
+        self._modified_at = None
+        self._version_checked_at = 0
+        self.stats = {'hits': 0, 'loads': 0, 'invalidations': 0}
+
+    def get(self):
+        """Return (settings dict, JSON body, etag), loading the bundle if needed"""
+        self._check_version()
+        with self._lock:
+            if self._bundle and self._expires_at > time.monotonic():
+                self.stats['hits'] += 1
+                return self._bundle
+            self.stats['loads'] += 1
+            generation = self._generation
+
+        bundle = self._load()
+        with self._lock:
+            if generation == self._generation:
+                self._bundle = bundle
+                self._expires_at = time.monotonic() + self.ttl
+        return bundle
+
+    def _load(self):
+        settings = read_settings(PUBLIC_SETTING_KEYS)
+        for key, value in settings.items():
+            settings[key] = value or SETTING_DEFAULTS[key]
+        body = json.dumps(settings, separators=(',', ':'))
+        etag = hashlib.sha1(body.encode('utf-8')).hexdigest()
+        return settings, body, etag
+
+    def clear(self):
+        with self._lock:
+            self._bundle = None
+            self._generation += 1
+            self.stats['invalidations'] += 1
+
+    def _check_version(self):
+        """Drop the bundle when another worker bumped the shared version"""
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_interval:
+            return
+        self._version_checked_at = now
+        try:
+            version, modified_at = read_version(VERSION_KEY)
+        except Exception as e:
+            print(f"Settings version check error: {e}")
+            return
+        if version != self._version:
+            if self._version is not None:
+                self.clear()
+            self._version = version
+        self._modified_at = modified_at
+
+    def validator(self):
+        """(version, last changed) of the shared settings, or (None, None) if unknown"""
+        self._check_version()
+        return self._version, self._modified_at
+
+    def invalidate(self):
+        """Clear this worker's bundle and bump the shared version for the others"""
+        self.clear()
+        try:
+            bump_catalog_version(VERSION_KEY)
+            self._version, self._modified_at = read_version(VERSION_KEY)
+            self._version_checked_at = time.monotonic()
+        except Exception as e:
+            print(f"Settings version bump error: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            snapshot = dict(self.stats)
+            snapshot.update({
+                'loaded': self._bundle is not None,
+                'etag': self._bundle[2] if self._bundle else None,
+                'version': self._version
+            })
+        return snapshot
+
+settings_cache = SettingsCache(**SETTINGS_CONFIG)
+
+def get_settings(keys):
+    """Get several settings with defaults filled in; public keys come from the cache"""
+    settings = {}
+    if any(key in SETTING_DEFAULTS for key in keys):
+        public = settings_cache.get()[0]
+        settings.update((key, public[key]) for key in keys if key in public)
+    private = [key for key in keys if key not in settings]
+    if private:
+        settings.update(read_settings(private))
+    return settings
+
+def get_setting(key):
+    """Get one setting (its default if never saved, None if it has none)"""
+    return get_settings([key])[key]
+
+def get_settings_bundle():
+    """(settings dict, JSON body, etag) for all public settings"""
+    return settings_cache.get()
+
+def invalidate_settings():
+    """Invalidate cached settings in every worker"""
+    settings_cache.invalidate()
+
+def get_settings_cache_stats():
+    """Get hit/load counters and the current ETag of the settings cache"""
+    return settings_cache.get_stats()
@@ -0,0 +1,78 @@
+"""
+Local SMTP stand-in for development
+
+Accepts any login and prints every message it receives instead of
+delivering it. Point the mailer at it with:
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_STARTTLS=false
+    SMTP_USER=dev@localhost SMTP_PASSWORD=dev
+
+Usage:
+    python smtp_debug_server.py --port 1025
+"""
+import argparse
+import socketserver
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue: EHLO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode('utf-8'))
+
+    def handle(self):
+        self.reply("220 localhost debug SMTP ready")
+        mail_from, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply("250-localhost")
+                self.reply("250 AUTH PLAIN")
+            elif verb == 'AUTH':
+                self.reply("235 Authentication successful")
+            elif verb == 'MAIL':
+                mail_from, recipients = command[10:].strip(), []
+                self.reply("250 OK")
+            elif verb == 'RCPT':
+                recipients.append(command[8:].strip())
+                self.reply("250 OK")
+            elif verb == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b".\r\n", b".\n"):
+                        break
+                    data.append(chunk.decode('utf-8', 'replace'))
+                print(f"📧 From {mail_from} to {', '.join(recipients)}")
+                print(''.join(data).rstrip())
+                print('-' * 60)
+                self.reply("250 OK queued")
+            elif verb == 'RSET':
+                mail_from, recipients = None, []
+                self.reply("250 OK")
+            elif verb == 'NOOP':
+                self.reply("250 OK")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+class DebugSMTPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print outgoing mail instead of sending it")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=1025)
+    args = parser.parse_args(argv)
+    with DebugSMTPServer((args.host, args.port), SMTPHandler) as server:
+        print(f"✅ Debug SMTP server listening on {args.host}:{args.port}")
+        server.serve_forever()
+
+if __name__ == '__main__':
+    main()
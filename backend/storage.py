@@ -0,0 +1,174 @@
+"""
+Media storage backends
+
+Every upload route goes through `media_storage`, picked by MEDIA_STORAGE:
+    cloudinary  Cloudinary (default); images get the quality/format transformations
+    local       files on disk under MEDIA_ROOT, named by the SHA-256 of their
+                content and served from /media/<public_id> with a one-year
+                immutable Cache-Control (the bytes behind a URL never change)
+
+A backend returns Cloudinary-shaped result dicts ('secure_url', 'public_id',
+plus 'width', 'height', 'bytes', ... when it knows them), so callers and the
+media_assets registry don't care which one is active. Switching backends
+doesn't move existing files; old URLs keep pointing where they were stored.
+
+Compare throughput with benchmarks/bench_storage_backends.py.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from dotenv import load_dotenv
+import cloudinary
+import cloudinary.uploader
+
+load_dotenv()
+
+STORAGE_CONFIG = {
+    'backend': os.getenv('MEDIA_STORAGE', 'cloudinary'),
+    'root': os.getenv('MEDIA_ROOT', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media')),
+    'base_url': os.getenv('MEDIA_BASE_URL', 'http://localhost:8000/media').rstrip('/')
+}
+
+MEDIA_CACHE_MAX_AGE = 365 * 24 * 3600
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# quality: 90 for crystal clear images, auto format for best compression
+IMAGE_UPLOAD_OPTIONS = {
+    'quality': "auto:best",
+    'fetch_format': "auto",
+    'transformation': [
+        {"quality": 90, "fetch_format": "auto"},
+        {"flags": "preserve_transparency"}
+    ]
+}
+
+class MediaStorage(ABC):
+    """Common interface; kind is 'image' or 'video'"""
+
+    @abstractmethod
+    def upload(self, fileobj, kind='image', folder=None, filename=None):
+        """Store a file object and return its result dict"""
+
+    @abstractmethod
+    def upload_large(self, fileobj, kind='video', folder=None, filename=None, chunk_size=None):
+        """Store a large file without holding it in memory"""
+
+    @abstractmethod
+    def destroy(self, public_id, kind):
+        """Delete a stored file"""
+
+    @abstractmethod
+    def owns(self, url):
+        """Whether url points at this backend (cleanup skips files stored elsewhere)"""
+
+class CloudinaryStorage(MediaStorage):
+    """Cloudinary uploads, chunked for large files"""
+
+    def __init__(self, **_):
+        # Configure Cloudinary with optimized settings
+        cloudinary.config(
+            cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
+            api_key=os.getenv('CLOUDINARY_API_KEY'),
+            api_secret=os.getenv('CLOUDINARY_API_SECRET'),
+            secure=True
+        )
+
+    def _options(self, kind, folder):
+        options = dict(IMAGE_UPLOAD_OPTIONS) if kind == 'image' else {'resource_type': kind}
+        if folder:
+            options['folder'] = folder
+        return options
+
+    def upload(self, fileobj, kind='image', folder=None, filename=None):
+        return cloudinary.uploader.upload(fileobj, **self._options(kind, folder))
+
+    def upload_large(self, fileobj, kind='video', folder=None, filename=None, chunk_size=None):
+        # One request per chunk_size bytes
+        return cloudinary.uploader.upload_large(
+            fileobj, filename=filename, chunk_size=chunk_size, **self._options(kind, folder)
+        )
+
+    def destroy(self, public_id, kind):
+        cloudinary.uploader.destroy(public_id, resource_type='video' if kind == 'video' else 'image')
+
+    def owns(self, url):
+        return '://res.cloudinary.com/' in url
+
+class LocalStorage(MediaStorage):
+    """Content-addressed files: <root>/<kind>/<sha[:2]>/<sha><ext>"""
+
+    def __init__(self, root, base_url, **_):
+        self.root = root
+        self.base_url = base_url
+
+    def _extension(self, filename):
+        ext = os.path.splitext(filename or '')[1].lower()
+        return ext if re.fullmatch(r'\.[a-z0-9]{1,8}', ext) else ''
+
+    def upload(self, fileobj, kind='image', folder=None, filename=None, chunk_size=COPY_CHUNK_SIZE):
+        # Hash while copying to a temp file, then move it to its content address;
+        # folder is ignored since identical bytes share one path anyway
+        tmp_dir = os.path.join(self.root, '.tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = fileobj.read(chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            sha256 = digest.hexdigest()
+            public_id = f"{kind}/{sha256[:2]}/{sha256}{self._extension(filename)}"
+            path = self.path(public_id)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return {
+            'secure_url': f"{self.base_url}/{public_id}",
+            'public_id': public_id,
+            'bytes': size,
+            'format': self._extension(filename).lstrip('.') or None
+        }
+
+    def upload_large(self, fileobj, kind='video', folder=None, filename=None, chunk_size=None):
+        return self.upload(fileobj, kind, folder, filename, chunk_size or COPY_CHUNK_SIZE)
+
+    def destroy(self, public_id, kind):
+        path = self.path(public_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def owns(self, url):
+        return url.startswith(self.base_url + '/')
+
+    def path(self, public_id):
+        """Filesystem path for a public_id; refuses anything outside root"""
+        root = os.path.abspath(self.root)
+        path = os.path.abspath(os.path.join(root, public_id))
+        if not path.startswith(root + os.sep):
+            raise ValueError(f"Invalid media path: {public_id}")
+        return path
+
+STORAGE_BACKENDS = {
+    'cloudinary': CloudinaryStorage,
+    'local': LocalStorage
+}
+
+if STORAGE_CONFIG['backend'] not in STORAGE_BACKENDS:
+    raise ValueError(f"Unknown MEDIA_STORAGE '{STORAGE_CONFIG['backend']}' (expected one of {', '.join(STORAGE_BACKENDS)})")
+
+media_storage = STORAGE_BACKENDS[STORAGE_CONFIG['backend']](**STORAGE_CONFIG)
@@ -0,0 +1,35 @@
+"""
+collect_queries picks up the statements EXPLAIN should plan, and nothing else
+
+Runs without a database: only the AST walk is exercised.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from explain_check import DEFAULT_SOURCES, STATEMENT, collect_queries
+
+MODELS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models.py')
+
+def test_models_queries_are_statements_not_docstrings():
+    queries = list(collect_queries(MODELS))
+    assert queries
+    for scope, line, sql in queries:
+        assert sql is not None, f"models.py:{line} {scope} has no sample bindings"
+        assert STATEMENT.match(sql), f"models.py:{line} {scope}: {sql[:40]!r}"
+
+def test_fstring_queries_are_rendered():
+    sql_by_scope = {}
+    for scope, _, sql in collect_queries(MODELS):
+        sql_by_scope.setdefault(scope, []).append(sql)
+    page = sql_by_scope['get_products_page'][0]
+    assert 'WHERE category = %s' in page and '{' not in page
+    orders = sql_by_scope['_fetch_user_orders'][0]
+    assert 'UNION' in orders and 'JSON_LENGTH' in orders
+    assert 'TRANSACTIONS_QUERY' in sql_by_scope
+
+def test_default_sources_render_completely():
+    for path in DEFAULT_SOURCES:
+        for scope, line, sql in collect_queries(path):
+            assert sql is not None, f"{os.path.basename(path)}:{line} {scope} has no sample bindings"
@@ -0,0 +1,36 @@
+"""
+product_media_urls handles both gallery shapes the products table holds
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from media_assets import product_media_urls
+
+def test_gallery_objects_and_legacy_strings():
+    product = {
+        'image_url': 'https://cdn/a.jpg',
+        'video_url': None,
+        'gallery_images': [
+            {'url': 'https://cdn/b.jpg', 'color': 'Navy'},
+            {'url': 'https://cdn/c.jpg', 'color': None},
+            'https://cdn/d.jpg',
+            {'url': '', 'color': 'Cream'},
+            {'color': 'Red'},
+            ''
+        ]
+    }
+    assert product_media_urls(product) == {
+        'https://cdn/a.jpg', 'https://cdn/b.jpg', 'https://cdn/c.jpg', 'https://cdn/d.jpg'
+    }
+
+def test_gallery_as_json_column():
+    gallery = json.dumps([{'url': 'https://cdn/b.jpg', 'color': 'Navy'}, 'https://cdn/d.jpg'])
+    product = {'image_url': '', 'gallery_images': gallery}
+    assert product_media_urls(product) == {'https://cdn/b.jpg', 'https://cdn/d.jpg'}
+
+def test_empty_product():
+    assert product_media_urls(None) == set()
+    assert product_media_urls({'gallery_images': None}) == set()
@@ -0,0 +1,184 @@
+"""
+Background upload jobs for large media (videos)
+
+The request only streams the file to UPLOAD_SPOOL_DIR and records a job;
+a small pool of worker threads pushes it to storage in chunks and updates
+the job row as it goes, so the request worker is free again in the time it
+takes to write the file to local disk.
+
+Job status lives in the upload_jobs table, so any worker process can
+report it. The spooled file is only on the disk of the process that
+accepted the upload, which is also the one running the job.
+
+Each job records its owner (host, pid and a per-process boot id), and the
+owner refreshes heartbeat_at on all of its queued and in-flight jobs every
+UPLOAD_JOB_HEARTBEAT seconds, however long they wait in the pool or a chunk
+takes. A job whose heartbeat is older than UPLOAD_JOB_STALE_SECONDS has
+lost its owner (gunicorn recycling a worker, a deploy) and is marked failed
+when polled, or by `python upload_jobs.py reap` from cron.
+"""
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from database import execute_query, execute_update
+from row_decoder import json_loads
+from storage import media_storage
+from uploads import ProgressReader
+
+UPLOAD_JOB_CONFIG = {
+    'spool_dir': os.getenv('UPLOAD_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'vurel-uploads')),
+    'workers': int(os.getenv('UPLOAD_JOB_WORKERS', 2)),
+    'chunk_size': int(os.getenv('UPLOAD_CHUNK_SIZE', 6 * 1024 * 1024)),  # Cloudinary minimum is 5MB
+    'heartbeat_interval': int(os.getenv('UPLOAD_JOB_HEARTBEAT', 30)),
+    'stale_after': int(os.getenv('UPLOAD_JOB_STALE_SECONDS', 180))  # No heartbeat for this long: owner is gone
+}
+
+STALE_JOB_ERROR = 'Upload was interrupted by a server restart; please upload the file again'
+
+SPOOL_BUFFER_SIZE = 1024 * 1024
+
+class UploadJobRunner:
+    """Spools uploads to disk and runs them on a bounded thread pool"""
+
+    def __init__(self, spool_dir, workers, chunk_size, heartbeat_interval, stale_after,
+                 upload_large=media_storage.upload_large):
+        self.spool_dir = spool_dir
+        self.chunk_size = chunk_size
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.upload_large = upload_large
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upload-job')
+        self._lock = threading.Lock()
+        self._pid = None
+        self.owner = None
+
+    def _start_heartbeat(self):
+        """Pick this process's owner id and start its heartbeat thread (once per process)"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return self.owner
+            self._pid = os.getpid()
+            self.owner = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        threading.Thread(target=self._heartbeat, args=(self.owner,), name='upload-job-heartbeat', daemon=True).start()
+        return self.owner
+
+    def _heartbeat(self, owner):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                execute_query("""
+                    UPDATE upload_jobs SET heartbeat_at = CURRENT_TIMESTAMP
+                    WHERE owner = %s AND status IN ('queued', 'uploading')
+                """, (owner,))
+            except Exception as e:
+                print(f"⚠️  Upload job heartbeat failed: {e}")
+
+    def submit(self, file, kind, options, user_id=None):
+        """Spool a werkzeug FileStorage to disk, record the job and queue it"""
+        owner = self._start_heartbeat()
+        os.makedirs(self.spool_dir, exist_ok=True)
+        job_id = uuid.uuid4().hex
+        path = os.path.join(self.spool_dir, job_id)
+        file.save(path, buffer_size=SPOOL_BUFFER_SIZE)
+        size = os.path.getsize(path)
+        try:
+            execute_query("""
+                INSERT INTO upload_jobs (id, kind, filename, bytes_total, created_by, owner)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (job_id, kind, file.filename, size, user_id, owner))
+        except Exception:
+            os.remove(path)
+            raise
+        self._executor.submit(self._run, job_id, path, kind, file.filename, options)
+        return {'job_id': job_id, 'status': 'queued', 'bytes_total': size}
+
+    def _run(self, job_id, path, kind, filename, options):
+        try:
+            started = execute_update(
+                "UPDATE upload_jobs SET status = 'uploading' WHERE id = %s AND status = 'queued'", (job_id,)
+            )
+            if not started:
+                # Already failed by a reaper (e.g. after a database outage stopped the heartbeat)
+                return
+
+            def on_progress(sent):
+                execute_query("UPDATE upload_jobs SET bytes_uploaded = %s WHERE id = %s", (sent, job_id))
+
+            with ProgressReader(open(path, 'rb'), on_progress) as reader:
+                result = self.upload_large(reader, kind=kind, filename=filename, chunk_size=self.chunk_size, **options)
+
+            details = {k: result.get(k) for k in ('duration', 'format', 'width', 'height', 'bytes')}
+            execute_query("""
+                UPDATE upload_jobs
+                SET status = 'done', bytes_uploaded = bytes_total, url = %s, public_id = %s, result = %s
+                WHERE id = %s
+            """, (result['secure_url'], result['public_id'], json.dumps(details), job_id))
+            print(f"✅ Upload job {job_id} done: {result['secure_url']}")
+        except Exception as e:
+            print(f"❌ Upload job {job_id} failed: {e}")
+            try:
+                execute_query(
+                    "UPDATE upload_jobs SET status = 'failed', error = %s WHERE id = %s",
+                    (str(e)[:1000], job_id)
+                )
+            except Exception as db_error:
+                print(f"❌ Could not record upload job failure: {db_error}")
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def fail_if_stale(self, job_id):
+        """Mark a queued/uploading job failed if its owner stopped heartbeating"""
+        failed = execute_update("""
+            UPDATE upload_jobs SET status = 'failed', error = %s
+            WHERE id = %s AND status IN ('queued', 'uploading')
+              AND heartbeat_at < NOW() - INTERVAL %s SECOND
+        """, (STALE_JOB_ERROR, job_id, self.stale_after))
+        if failed:
+            # The owner is gone; its spool file is only here if it ran on this host
+            path = os.path.join(self.spool_dir, job_id)
+            if os.path.exists(path):
+                os.remove(path)
+        return bool(failed)
+
+    def reap_stale(self):
+        """Fail every job whose owner is gone; returns how many"""
+        rows = execute_query("""
+            SELECT id FROM upload_jobs
+            WHERE status IN ('queued', 'uploading') AND heartbeat_at < NOW() - INTERVAL %s SECOND
+        """, (self.stale_after,), fetch_all=True)
+        return sum(self.fail_if_stale(row['id']) for row in rows)
+
+upload_jobs = UploadJobRunner(**UPLOAD_JOB_CONFIG)
+
+def get_upload_job(job_id):
+    """Get a job's status, progress and (when done) its URL"""
+    query = """
+        SELECT id, kind, filename, status, bytes_total, bytes_uploaded, url, public_id, result, error,
+               created_at, updated_at,
+               heartbeat_at < NOW() - INTERVAL %s SECOND as stale
+        FROM upload_jobs WHERE id = %s
+    """
+    job = execute_query(query, (upload_jobs.stale_after, job_id), fetch_one=True)
+    if not job:
+        return None
+    if job.pop('stale') and job['status'] in ('queued', 'uploading') and upload_jobs.fail_if_stale(job_id):
+        job['status'], job['error'] = 'failed', STALE_JOB_ERROR
+    result = job.pop('result')
+    if result and isinstance(result, (str, bytes)):
+        result = json_loads(result)
+    job.update(result or {})
+    job['progress'] = round(job['bytes_uploaded'] / job['bytes_total'], 3) if job['bytes_total'] else 0
+    return job
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'reap':
+        print("Usage: python upload_jobs.py reap")
+        sys.exit(1)
+    print(f"✅ Marked {upload_jobs.reap_stale()} orphaned upload job(s) failed")
@@ -0,0 +1,93 @@
+"""
+Media uploads through the configured storage backend (storage.py)
+
+Gallery uploads fan out over a bounded thread pool shared by all requests,
+so a 10-image gallery costs roughly one upload round trip instead of ten.
+Each file gets its own result, failures don't abort the rest, and the
+whole batch is bounded by GALLERY_UPLOAD_TIMEOUT.
+
+The upload function is injectable (ParallelUploader(upload=...)) so the
+fan-out can be exercised against a local fake; see
+benchmarks/bench_gallery_upload.py.
+"""
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from media_assets import upload_deduplicated
+from storage import media_storage
+
+UPLOAD_CONFIG = {
+    'workers': int(os.getenv('UPLOAD_WORKERS', 4)),
+    'timeout': float(os.getenv('GALLERY_UPLOAD_TIMEOUT', 60))
+}
+
+def deduplicated(upload, kind='image'):
+    """Wrap an upload function so identical bytes reuse the stored asset (see media_assets.py)"""
+    def wrapper(fileobj, **options):
+        return upload_deduplicated(fileobj, upload, kind, **options)
+    return wrapper
+
+class ProgressReader:
+    """File wrapper that reports how many bytes have been handed to the uploader"""
+
+    def __init__(self, fileobj, on_progress):
+        self._file = fileobj
+        self._on_progress = on_progress
+        self._read = 0
+
+    def read(self, size=-1):
+        # Everything read before this call has been sent by a chunked uploader
+        if self._read:
+            self._on_progress(self._read)
+        data = self._file.read(size)
+        self._read += len(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+class ParallelUploader:
+    """Upload several files concurrently with per-file results"""
+
+    def __init__(self, upload=media_storage.upload, workers=4, timeout=60):
+        self.upload = upload
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upload')
+
+    def upload_all(self, files, **options):
+        """Upload (filename, bytes) pairs; results come back in input order
+
+        Each result is {'filename', 'url', 'public_id'} on success or
+        {'filename', 'error'} on failure or timeout.
+        """
+        futures = [
+            self._executor.submit(self.upload, io.BytesIO(data), filename=filename, **options)
+            for filename, data in files
+        ]
+        wait(futures, timeout=self.timeout)
+
+        results = []
+        for (filename, _), future in zip(files, futures):
+            if not future.done():
+                # Queued uploads are dropped; ones already running finish in the background
+                future.cancel()
+                results.append({'filename': filename, 'error': f'Timed out after {self.timeout}s'})
+            elif future.exception():
+                results.append({'filename': filename, 'error': str(future.exception())})
+            else:
+                result = future.result()
+                results.append({
+                    'filename': filename,
+                    'url': result['secure_url'],
+                    'public_id': result['public_id'],
+                    'deduplicated': result.get('deduplicated', False)
+                })
+        return results
+
+gallery_uploader = ParallelUploader(upload=deduplicated(media_storage.upload), **UPLOAD_CONFIG)
@@ -12,6 +12,7 @@ CREATE TABLE IF NOT EXISTS users (
     date_of_birth DATE,
     is_admin BOOLEAN DEFAULT FALSE,
     is_verified BOOLEAN DEFAULT TRUE,
+    token_version INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -23,7 +24,10 @@ CREATE TABLE IF NOT EXISTS otp_codes (
     purpose ENUM('register', 'login', 'reset') DEFAULT 'register',
     expires_at TIMESTAMP NOT NULL,
     used BOOLEAN DEFAULT FALSE,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    attempts INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_otp_email_purpose (email, purpose),
+    INDEX idx_otp_expires (expires_at)
 );
 
 -- Products table
@@ -44,7 +48,12 @@ CREATE TABLE IF NOT EXISTS products (
     faqs JSON,
     related_products JSON,
     is_featured BOOLEAN DEFAULT FALSE,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_products_created (created_at, id),
+    INDEX idx_products_category_created (category, created_at, id),
+    INDEX idx_products_status_created (status, created_at, id),
+    INDEX idx_products_price (price, id),
+    INDEX idx_products_featured_created (is_featured, created_at)
 );
 
 -- Orders table
@@ -62,7 +71,10 @@ CREATE TABLE IF NOT EXISTS orders (
     payment_id VARCHAR(100),
     completed_at TIMESTAMP NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE SET NULL
+    FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE SET NULL,
+    INDEX idx_orders_created (created_at),
+    INDEX idx_orders_customer_created (customer_id, created_at),
+    INDEX idx_orders_email_created (customer_email, created_at)
 );
 
 -- Categories table
@@ -86,7 +98,8 @@ CREATE TABLE IF NOT EXISTS collections (
     is_active BOOLEAN DEFAULT TRUE,
     show_on_home BOOLEAN DEFAULT FALSE,
     display_order INT DEFAULT 0,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_collections_home (show_on_home, is_active, display_order)
 );
 
 -- Collection products junction table
@@ -135,7 +148,8 @@ CREATE TABLE IF NOT EXISTS reviews (
     is_admin_review BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
-    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL,
+    INDEX idx_reviews_product_verified_created (product_id, is_verified, created_at)
 );
 
 -- Contact submissions table
@@ -150,6 +164,66 @@ CREATE TABLE IF NOT EXISTS contact_submissions (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Daily order rollups (dashboard stats)
+CREATE TABLE IF NOT EXISTS daily_order_stats (
+    stat_date DATE PRIMARY KEY,
+    order_count INT NOT NULL DEFAULT 0,
+    cancelled_count INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Outbound email queue
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    to_email VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    html_body MEDIUMTEXT NOT NULL,
+    status ENUM('pending', 'sending', 'sent', 'failed') DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_by VARCHAR(64) NULL,
+    locked_at DATETIME NULL,
+    last_error TEXT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME NULL,
+    INDEX idx_email_outbox_due (status, next_attempt_at)
+);
+
+-- Background media upload jobs
+CREATE TABLE IF NOT EXISTS upload_jobs (
+    id CHAR(32) PRIMARY KEY,
+    kind VARCHAR(20) NOT NULL,
+    filename VARCHAR(255) NOT NULL,
+    status ENUM('queued', 'uploading', 'done', 'failed') DEFAULT 'queued',
+    bytes_total BIGINT NOT NULL DEFAULT 0,
+    bytes_uploaded BIGINT NOT NULL DEFAULT 0,
+    url VARCHAR(1000) NULL,
+    public_id VARCHAR(255) NULL,
+    result JSON NULL,
+    error TEXT NULL,
+    created_by INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Uploaded media by content hash (dedup + reference counts)
+CREATE TABLE IF NOT EXISTS media_assets (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    sha256 CHAR(64) NOT NULL UNIQUE,
+    kind VARCHAR(20) NOT NULL DEFAULT 'image',
+    url VARCHAR(500) NOT NULL,
+    public_id VARCHAR(255) NOT NULL,
+    bytes BIGINT NULL,
+    width INT NULL,
+    height INT NULL,
+    ref_count INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_media_assets_url (url),
+    INDEX idx_media_assets_orphans (ref_count, last_used_at)
+);
+
 -- Insert default settings
 INSERT IGNORE INTO site_settings (setting_key, setting_value) VALUES 
 ('sale_banner', '{"enabled": true, "text": "LIMITED TIME OFFER - UP TO 50% OFF", "end_date": "2025-12-31T23:59:59"}'),
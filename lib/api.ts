@@ -132,6 +132,40 @@ async function apiRequest<T>(
   return response.json()
 }
 
+// Resolve an upload response to the uploaded file's URL. Video uploads
+// return 202 with a job id; poll the job until it is done or failed, giving
+// up after UPLOAD_POLL_TIMEOUT_MS or a few consecutive network errors.
+const UPLOAD_POLL_INTERVAL_MS = 2000
+const UPLOAD_POLL_TIMEOUT_MS = 20 * 60 * 1000
+const UPLOAD_POLL_MAX_ERRORS = 3
+
+export async function resolveUploadUrl(apiBaseUrl: string, response: Response): Promise<string> {
+  const data = await response.json().catch(() => ({ detail: "Upload failed" }))
+  if (!response.ok) throw new Error(data.detail || "Upload failed")
+  if (!data.job_id) return data.url
+
+  const deadline = Date.now() + UPLOAD_POLL_TIMEOUT_MS
+  let errors = 0
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, UPLOAD_POLL_INTERVAL_MS))
+    let jobResponse: Response
+    try {
+      jobResponse = await fetch(`${apiBaseUrl}/api/upload/jobs/${data.job_id}`, {
+        headers: { Authorization: `Bearer ${getAuthToken()}` },
+      })
+    } catch {
+      if (++errors >= UPLOAD_POLL_MAX_ERRORS) throw new Error("Lost connection while processing the upload")
+      continue
+    }
+    errors = 0
+    const job = await jobResponse.json().catch(() => ({ detail: "Upload failed" }))
+    if (!jobResponse.ok) throw new Error(job.detail || "Upload failed")
+    if (job.status === "done") return job.url
+    if (job.status === "failed") throw new Error(job.error || "Upload failed")
+  }
+  throw new Error("Upload is taking too long, please try again")
+}
+
 // Authentication API
 export const authAPI = {
   register: async (data: {
@@ -347,6 +381,11 @@ export interface ScrollingTextSettings {
 }
 
 export const settingsAPI = {
+  // All public settings keyed by setting name (sale_banner, hero_slides, payment_methods, ...)
+  getAll: async (): Promise<Record<string, any>> => {
+    return apiRequest<Record<string, any>>("/api/settings")
+  },
+
   getSaleBanner: async (): Promise<SaleBannerSettings> => {
     return apiRequest<SaleBannerSettings>("/api/settings/sale-banner")
   },
@@ -482,3 +521,26 @@ export const collectionsAPI = {
     })
   },
 }
+
+// Homepage payload (all homepage sections in one request)
+export interface HomePageData {
+  sale_banner: SaleBannerSettings
+  hero: HeroSettings
+  scrolling_text: ScrollingTextSettings
+  our_story: { enabled: boolean; title: string; description: string; video_url: string }
+  testimonials: { enabled: boolean; title: string; videos: { name: string; video_url: string; thumbnail?: string }[] }
+  shop_the_look: {
+    enabled: boolean
+    title: string
+    product_ids: number[]
+    products: Pick<Product, "id" | "name" | "category" | "price" | "original_price" | "image_url" | "status" | "stock">[]
+  }
+  featured_products: Product[]
+  collections: Collection[]
+}
+
+export const homeAPI = {
+  get: async (): Promise<HomePageData> => {
+    return apiRequest<HomePageData>("/api/home")
+  },
+}